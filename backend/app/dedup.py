@@ -0,0 +1,55 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+# Read size for hashing raw uploads
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+class ContentIndex:
+    """
+    Maps upload hashes to the run that analyzed them, so repeat uploads can be
+    answered from the cached result. Two kinds of keys are stored:
+      - file:<sha256>    raw upload bytes (checked before parsing)
+      - content:<sha256> canonical normalized transactions (checked after parsing,
+                         matches re-exports that differ only in column order)
+    Keeps the most recent `max_entries` keys.
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Optional[str]) -> Optional[str]:
+        if key is None:
+            return None
+        with self._lock:
+            run_id = self._entries.get(key)
+            if run_id is not None:
+                self._entries.move_to_end(key)
+            return run_id
+
+    def add(self, key: Optional[str], run_id: str):
+        if key is None:
+            return
+        with self._lock:
+            self._entries[key] = run_id
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def file_digest(fileobj) -> str:
+    """sha256 of a seekable file's raw bytes; leaves the file rewound."""
+    digest = hashlib.sha256()
+    fileobj.seek(0)
+    for block in iter(lambda: fileobj.read(HASH_BLOCK_SIZE), b""):
+        digest.update(block)
+    fileobj.seek(0)
+    return "file:" + digest.hexdigest()
+
+
+def content_key(store) -> Optional[str]:
+    return "content:" + store.content_hash if store.content_hash else None
@@ -0,0 +1,193 @@
+import os
+import pandas as pd
+from .model.graph_builder import StoreBuilder
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: only needed for Parquet / Arrow IPC uploads
+    pa = pq = None
+
+# Map frontend columns to backend columns if needed
+# Expected: transaction_id,sender_id,receiver_id,amount,timestamp
+# Frontend might send: from_account, to_account
+RENAME_MAP = {
+    'from_account': 'sender_id',
+    'to_account': 'receiver_id',
+    'from': 'sender_id',
+    'to': 'receiver_id'
+}
+
+REQUIRED_COLUMNS = {'sender_id', 'receiver_id', 'amount'}
+
+# Columns the graph builder uses; typed uploads are projected to these
+TRANSACTION_COLUMNS = ('transaction_id', 'sender_id', 'receiver_id', 'amount', 'timestamp')
+
+# Identifier columns, always read as text
+ID_COLUMNS = ('transaction_id', 'sender_id', 'receiver_id')
+
+# Upload file extension -> format
+UPLOAD_FORMATS = {
+    '.csv': 'csv',
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.arrow': 'arrow',
+    '.feather': 'arrow',
+    '.ipc': 'arrow',
+}
+
+# Rows parsed per chunk; bounds the transient DataFrame size during ingestion
+CHUNK_ROWS = 200_000
+
+
+class IngestError(ValueError):
+    """Upload content that cannot be turned into transactions (maps to HTTP 400)."""
+
+
+def upload_format(filename: str):
+    """'csv', 'parquet' or 'arrow' for a supported upload file name, else None."""
+    return UPLOAD_FORMATS.get(os.path.splitext(filename or '')[1].lower())
+
+
+def read_transactions(fileobj, filename: str, chunk_rows=None, builder=None):
+    """Reads an upload into a TransactionStore, dispatching on its file extension."""
+    fmt = upload_format(filename)
+    if fmt == 'parquet':
+        return read_transactions_parquet(fileobj, chunk_rows, builder)
+    if fmt == 'arrow':
+        return read_transactions_arrow(fileobj, chunk_rows, builder)
+    return read_transactions_csv(fileobj, chunk_rows, builder)
+
+
+def read_transactions_csv(fileobj, chunk_rows=None, builder=None):
+    """
+    Streams a CSV upload into a TransactionStore chunk by chunk.
+    Each chunk is renamed, validated, given generated transaction ids if the
+    column is missing, timestamp-parsed and handed to the StoreBuilder, so peak
+    memory follows the compact store rather than the raw file plus its copies.
+    Pass a seeded builder (StoreBuilder.from_store) to append to existing data.
+    """
+    builder = builder or StoreBuilder()
+
+    try:
+        # Header first: validates header-only files (no chunks) and fixes the id
+        # column types, which read_csv would otherwise infer chunk by chunk
+        # ("00123" -> 123 in one chunk, "00123" in another)
+        start = fileobj.tell()
+        header = list(pd.read_csv(fileobj, nrows=0).columns)
+        fileobj.seek(start)
+        _check_columns({RENAME_MAP.get(c, c) for c in header})
+        dtype = {c: str for c in header if RENAME_MAP.get(c, c) in ID_COLUMNS}
+
+        reader = pd.read_csv(fileobj, chunksize=chunk_rows or CHUNK_ROWS, dtype=dtype)
+        for chunk in reader:
+            add_chunk(builder, chunk)
+    except IngestError:
+        raise
+    except (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError, ValueError):
+        raise IngestError("Corrupt CSV file")
+
+    return builder.build()
+
+
+def read_transactions_parquet(fileobj, chunk_rows=None, builder=None):
+    """
+    Streams a Parquet upload into a TransactionStore. Only the transaction
+    columns (after RENAME_MAP) are read, row group by row group, and their
+    typed buffers go to the builder without a text round-trip: timestamp
+    columns stay timestamps and decimals are cast to float64 in Arrow.
+    """
+    _require_pyarrow()
+    builder = builder or StoreBuilder()
+
+    try:
+        parquet = pq.ParquetFile(fileobj)
+        columns = _project(parquet.schema_arrow.names)
+        for batch in parquet.iter_batches(batch_size=chunk_rows or CHUNK_ROWS, columns=columns):
+            add_chunk(builder, _arrow_frame(batch))
+    except IngestError:
+        raise
+    except (pa.ArrowException, OSError, ValueError):
+        raise IngestError("Corrupt Parquet file")
+
+    return builder.build()
+
+
+def read_transactions_arrow(fileobj, chunk_rows=None, builder=None):
+    """
+    Reads an Arrow IPC upload (file or stream format) into a TransactionStore,
+    record batch by record batch, with the same projection and typing as Parquet.
+    """
+    _require_pyarrow()
+    builder = builder or StoreBuilder()
+
+    try:
+        try:
+            reader = pa.ipc.open_file(fileobj)
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        except pa.ArrowInvalid:
+            fileobj.seek(0)
+            reader = pa.ipc.open_stream(fileobj)
+            batches = iter(reader)
+
+        columns = _project(reader.schema.names)
+        for batch in batches:
+            batch = batch.select(columns)
+            for start in range(0, batch.num_rows, chunk_rows or CHUNK_ROWS):
+                add_chunk(builder, _arrow_frame(batch.slice(start, chunk_rows or CHUNK_ROWS)))
+    except IngestError:
+        raise
+    except (pa.ArrowException, OSError, ValueError):
+        raise IngestError("Corrupt Arrow file")
+
+    return builder.build()
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise IngestError("Parquet/Arrow uploads require the pyarrow package")
+
+
+def _project(names):
+    """Source columns that map (through RENAME_MAP) onto a transaction column; validates them."""
+    columns = [c for c in names if RENAME_MAP.get(c, c) in TRANSACTION_COLUMNS]
+    _check_columns({RENAME_MAP.get(c, c) for c in columns})
+    return columns
+
+
+def _arrow_frame(batch) -> pd.DataFrame:
+    """Record batch -> DataFrame with builder-ready types (float amounts, datetime timestamps)."""
+    arrays = []
+    for field, column in zip(batch.schema, batch.columns):
+        if pa.types.is_decimal(field.type):
+            column = column.cast(pa.float64())
+        elif pa.types.is_date(field.type):
+            column = column.cast(pa.timestamp('ms'))
+        arrays.append(column)
+    return pa.RecordBatch.from_arrays(arrays, names=batch.schema.names).to_pandas()
+
+
+def _check_columns(columns):
+    if not REQUIRED_COLUMNS.issubset(columns):
+        raise IngestError(f"Missing columns. Required: {REQUIRED_COLUMNS}")
+    if 'timestamp' not in columns:
+        raise IngestError("Missing timestamp column")
+
+
+def add_chunk(builder: StoreBuilder, chunk: pd.DataFrame):
+    """Normalizes one chunk of raw upload rows and feeds it to the builder."""
+    chunk = chunk.rename(columns=RENAME_MAP)
+    _check_columns(chunk.columns)
+
+    # If transaction_id missing, generate it (numbered across chunks)
+    if 'transaction_id' not in chunk.columns:
+        start = builder.rows
+        chunk['transaction_id'] = [f"TXN_{i}" for i in range(start, start + len(chunk))]
+
+    if not pd.api.types.is_datetime64_any_dtype(chunk['timestamp']):
+        try:
+            chunk['timestamp'] = pd.to_datetime(chunk['timestamp'])
+        except (ValueError, TypeError):
+            raise IngestError("Invalid timestamp values")
+
+    builder.add_frame(chunk)
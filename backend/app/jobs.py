@@ -0,0 +1,113 @@
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+class Job:
+    """
+    Status record for one background analysis run.
+    Stages are entered in order through `enter_stage`; the previous stage is
+    closed with its duration when the next one starts.
+    """
+
+    def __init__(self, run_id: str, filename: str):
+        self.run_id = run_id
+        self.filename = filename
+        self.status = "queued"
+        self.stages = []
+        self.error: Optional[str] = None
+        self.result_run_id: Optional[str] = None  # differs from run_id when served from cache
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def enter_stage(self, name: str):
+        now = time.time()
+        with self._lock:
+            self._close_stage(now)
+            self.stages.append({"name": name, "status": "running", "started_at": now, "seconds": None})
+
+    def _close_stage(self, now: float, status: str = "done"):
+        if self.stages and self.stages[-1]["status"] == "running":
+            stage = self.stages[-1]
+            stage["status"] = status
+            stage["seconds"] = round(now - stage["started_at"], 3)
+
+    def start(self):
+        self.status = "running"
+        self.started_at = time.time()
+
+    def finish(self, error: Optional[str] = None):
+        now = time.time()
+        with self._lock:
+            self._close_stage(now, "failed" if error else "done")
+            self.status = "failed" if error else "done"
+            self.error = error
+            self.finished_at = now
+
+    @property
+    def stage(self) -> Optional[str]:
+        return self.stages[-1]["name"] if self.stages else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "run_id": self.run_id,
+                "filename": self.filename,
+                "status": self.status,
+                "stage": self.stage,
+                "stages": [
+                    {"name": s["name"], "status": s["status"], "seconds": s["seconds"]}
+                    for s in self.stages
+                ],
+                "error": self.error,
+                "result_run_id": self.result_run_id,
+                "submitted_at": self.submitted_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+            }
+
+
+class JobManager:
+    """
+    Runs analysis jobs on a thread pool so the event loop stays free, and keeps
+    the status of the most recent `max_jobs` runs for polling.
+    """
+
+    def __init__(self, max_workers: int = 2, max_jobs: int = 1000):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analysis")
+        self.max_jobs = max_jobs
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, run_id: str, filename: str, fn: Callable[[Job], Any]) -> Job:
+        """Queues fn(job); fn reports progress through job.enter_stage."""
+        job = Job(run_id, filename)
+        with self._lock:
+            self.jobs[run_id] = job
+            self._prune()
+        self.executor.submit(self._run, job, fn)
+        return job
+
+    def get(self, run_id: str) -> Optional[Job]:
+        return self.jobs.get(run_id)
+
+    def _run(self, job: Job, fn: Callable[[Job], Any]):
+        job.start()
+        try:
+            fn(job)
+        except Exception as e:
+            traceback.print_exc()
+            job.finish(error=getattr(e, "detail", None) or str(e))
+        else:
+            job.finish()
+
+    def _prune(self):
+        # Drop the oldest finished jobs beyond the retention limit
+        excess = len(self.jobs) - self.max_jobs
+        for run_id in [rid for rid, j in self.jobs.items() if j.status in ("done", "failed")][:max(excess, 0)]:
+            del self.jobs[run_id]
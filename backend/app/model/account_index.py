@@ -0,0 +1,166 @@
+import numpy as np
+import networkx as nx
+from .graph_builder import TransactionStore
+
+
+class AccountIndex:
+    """
+    Per-account view of a TransactionStore, built in one vectorized pass.
+
+    For every account (store node id) it holds CSR-style groups of
+      - incoming transactions: timestamp / amount / sender id, ordered by time
+      - outgoing transactions: timestamp / amount / receiver id, ordered by time
+      - all timestamps (both directions), ordered by time, with the store row and
+        direction of each (all_entry: row for incoming, row + number of rows for outgoing)
+    plus in/out totals and first/last seen timestamps (epoch ns).
+    """
+
+    def __init__(self, store: TransactionStore):
+        self.store = store
+        self.nodes = store.nodes
+        self._ids = None
+        n = store.num_nodes
+        ts = store.timestamp
+
+        # Incoming, grouped by receiver (lexsort is stable: ties keep store order)
+        order = np.lexsort((ts, store.dst))
+        self.in_offsets = _group_offsets(store.dst, n)
+        self.in_ts = ts[order]
+        self.in_amount = store.amount[order]
+        self.in_partner = store.src[order]
+
+        # Outgoing, grouped by sender
+        order = np.lexsort((ts, store.src))
+        self.out_offsets = _group_offsets(store.src, n)
+        self.out_ts = ts[order]
+        self.out_amount = store.amount[order]
+        self.out_partner = store.dst[order]
+
+        # Both directions (a self-loop counts once per direction, like the graph walk)
+        all_node = np.concatenate([store.dst, store.src])
+        all_ts = np.concatenate([ts, ts])
+        order = np.lexsort((all_ts, all_node))
+        self.all_offsets = _group_offsets(all_node, n)
+        self.all_ts = all_ts[order]
+        self.all_entry = order.astype(np.int64)
+
+        self.in_total = np.bincount(store.dst, weights=store.amount, minlength=n)
+        self.out_total = np.bincount(store.src, weights=store.amount, minlength=n)
+
+        has_txs = np.diff(self.all_offsets) > 0
+        first = np.minimum(self.all_offsets[:-1], max(len(self.all_ts) - 1, 0))
+        last = np.maximum(self.all_offsets[1:] - 1, 0)
+        if len(self.all_ts):
+            self.first_seen = np.where(has_txs, self.all_ts[first], 0)
+            self.last_seen = np.where(has_txs, self.all_ts[last], 0)
+        else:
+            self.first_seen = np.zeros(n, dtype=np.int64)
+            self.last_seen = np.zeros(n, dtype=np.int64)
+
+        self.window_stats = None  # filled lazily by fan_detector.get_window_stats
+
+    # Arrays that fully describe the index (what a snapshot saves)
+    ARRAYS = (
+        'in_offsets', 'in_ts', 'in_amount', 'in_partner',
+        'out_offsets', 'out_ts', 'out_amount', 'out_partner',
+        'all_offsets', 'all_ts', 'all_entry', 'in_total', 'out_total', 'first_seen', 'last_seen',
+    )
+
+    @classmethod
+    def from_arrays(cls, store: TransactionStore, arrays):
+        """Index over precomputed arrays (keys: ARRAYS), e.g. memory-mapped from a snapshot."""
+        index = object.__new__(cls)
+        index.store = store
+        index.nodes = store.nodes
+        index._ids = None
+        for name in cls.ARRAYS:
+            setattr(index, name, arrays[name])
+        index.window_stats = None
+        return index
+
+    @property
+    def ids(self):
+        # label -> id, built on first lookup
+        if self._ids is None:
+            self._ids = {label: i for i, label in enumerate(self.nodes.tolist())}
+        return self._ids
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def id_of(self, label):
+        return self.ids[label]
+
+    def incoming(self, i):
+        a, b = self.in_offsets[i], self.in_offsets[i + 1]
+        return self.in_ts[a:b], self.in_amount[a:b], self.in_partner[a:b]
+
+    def outgoing(self, i):
+        a, b = self.out_offsets[i], self.out_offsets[i + 1]
+        return self.out_ts[a:b], self.out_amount[a:b], self.out_partner[a:b]
+
+    def timestamps(self, i):
+        return self.all_ts[self.all_offsets[i]:self.all_offsets[i + 1]]
+
+    def transaction_page(self, i, limit, cursor=None, direction=None, start=None, end=None):
+        """
+        One page of account i's transactions, newest first, as (rows, incoming, next_cursor, total):
+          - rows: store rows of the page; incoming: whether each row was received by i
+          - next_cursor: pass back as `cursor` for the next (older) page; None on the last page
+          - total: transactions matching the filters
+        direction is 'in', 'out' or None (both); start/end bound the timestamp (epoch ns,
+        inclusive). The cursor is a position in the account's time-ordered entries, so
+        pages stay consistent however they are interleaved. Cost: two binary searches
+        plus the filter over the date range; nothing outside it is touched.
+        """
+        a, b = int(self.all_offsets[i]), int(self.all_offsets[i + 1])
+        ts = self.all_ts[a:b]
+        lo = 0 if start is None else int(np.searchsorted(ts, start, side='left'))
+        hi = len(ts) if end is None else int(np.searchsorted(ts, end, side='right'))
+        lo = min(lo, hi)
+
+        entries = self.all_entry[a + lo:a + hi]
+        m = len(self.store.src)
+        if direction == 'in':
+            positions = np.flatnonzero(entries < m) + lo
+        elif direction == 'out':
+            positions = np.flatnonzero(entries >= m) + lo
+        else:
+            positions = np.arange(lo, hi)
+        total = len(positions)
+
+        if cursor is not None:
+            positions = positions[:np.searchsorted(positions, cursor, side='left')]
+        page = positions[::-1][:limit]
+        next_cursor = int(page[-1]) if len(page) and len(positions) > len(page) else None
+
+        page_entries = self.all_entry[a + page]
+        incoming = page_entries < m
+        rows = np.where(incoming, page_entries, page_entries - m)
+        return rows.tolist(), incoming.tolist(), next_cursor, total
+
+    @property
+    def durations(self):
+        """Active span (last seen - first seen) per account, in ns."""
+        return self.last_seen - self.first_seen
+
+
+def _group_offsets(keys, n):
+    return np.concatenate(([0], np.cumsum(np.bincount(keys, minlength=n)))).astype(np.int64)
+
+
+def get_account_index(G: nx.DiGraph) -> AccountIndex:
+    """
+    Returns the AccountIndex for G, building it on first use and caching it in
+    G.graph['account_index']. Graphs not produced by build_graph get a store
+    built from their edge transaction lists.
+    """
+    index = G.graph.get('account_index')
+    if index is None:
+        store = G.graph.get('store')
+        if store is None:
+            store = TransactionStore.from_graph(G)
+            G.graph['store'] = store
+        index = AccountIndex(store)
+        G.graph['account_index'] = index
+    return index
@@ -0,0 +1,284 @@
+import numpy as np
+from .graph_builder import TransactionStore, EdgeTransactions
+from .account_index import _group_offsets
+
+
+class CSRGraph:
+    """
+    Compressed sparse row graph over a TransactionStore, a compact alternative to
+    the NetworkX DiGraph from graph_from_store.
+
+    Nodes are the store's int32 node ids. Successors and predecessors are CSR
+    arrays (offsets + neighbour ids), and each edge's transactions are a slice of
+    the store's shared amount/timestamp columns, so there are no per-node,
+    per-edge or per-transaction Python objects. It implements the read-only part
+    of the DiGraph API used by the detectors, the scorer and the API endpoints,
+    with node labels in and out. Neighbours come in the same order as in the
+    DiGraph (first appearance in the upload), so results are identical.
+    """
+
+    def __init__(self, store: TransactionStore, graph=None):
+        n = store.num_nodes
+
+        # Edge table positions in order of first appearance, grouped by endpoint
+        order = store.edge_order()
+        by_src = order[np.argsort(store.edge_src[order], kind='stable')]
+        by_dst = order[np.argsort(store.edge_dst[order], kind='stable')]
+
+        self._init(
+            store, graph,
+            succ_offsets=_group_offsets(store.edge_src, n),
+            succ=store.edge_dst[by_src],
+            pred_offsets=_group_offsets(store.edge_dst, n),
+            pred=store.edge_src[by_dst],
+        )
+
+    def _init(self, store, graph, succ_offsets, succ, pred_offsets, pred):
+        self.store = store
+        self.graph = {'store': store} if graph is None else graph
+        self.succ_offsets = succ_offsets
+        self.succ = succ
+        self.pred_offsets = pred_offsets
+        self.pred = pred
+        # Label list / label -> id map, built on first use (a reopened snapshot
+        # does not pay for them until a lookup needs them)
+        self._labels = None
+        self._ids = None
+
+    @classmethod
+    def from_arrays(cls, store: TransactionStore, succ_offsets, succ, pred_offsets, pred, graph=None):
+        """CSR graph over precomputed adjacency arrays (e.g. memory-mapped from a snapshot)."""
+        G = object.__new__(cls)
+        G._init(store, graph, succ_offsets, succ, pred_offsets, pred)
+        return G
+
+    @property
+    def labels(self):
+        if self._labels is None:
+            self._labels = self.store.nodes.tolist()
+        return self._labels
+
+    @property
+    def ids(self):
+        if self._ids is None:
+            self._ids = {label: i for i, label in enumerate(self.labels)}
+        return self._ids
+
+    @classmethod
+    def from_graph(cls, G):
+        """CSR graph over the store behind a graph_from_store DiGraph (same graph attributes)."""
+        return cls(G.graph['store'], dict(G.graph))
+
+    def topology(self):
+        """A copy sharing the arrays but none of the graph attributes (e.g. for worker processes)."""
+        clone = object.__new__(CSRGraph)
+        clone.__dict__.update(self.__dict__)
+        clone.graph = {'store': self.store}
+        return clone
+
+    # ---- nodes ----
+
+    def __len__(self):
+        return self.store.num_nodes
+
+    def __iter__(self):
+        return iter(self.labels)
+
+    def __contains__(self, n):
+        return n in self.ids
+
+    def nodes(self):
+        return self.labels
+
+    def number_of_nodes(self):
+        return self.store.num_nodes
+
+    def number_of_edges(self):
+        return self.store.num_edges
+
+    def is_directed(self):
+        return True
+
+    # ---- adjacency ----
+
+    def successors(self, n):
+        i = self.ids[n]
+        labels = self.labels
+        return (labels[j] for j in self.succ[self.succ_offsets[i]:self.succ_offsets[i + 1]].tolist())
+
+    neighbors = successors
+
+    def predecessors(self, n):
+        i = self.ids[n]
+        labels = self.labels
+        return (labels[j] for j in self.pred[self.pred_offsets[i]:self.pred_offsets[i + 1]].tolist())
+
+    def out_degree(self, n):
+        i = self.ids[n]
+        return int(self.succ_offsets[i + 1] - self.succ_offsets[i])
+
+    def in_degree(self, n):
+        i = self.ids[n]
+        return int(self.pred_offsets[i + 1] - self.pred_offsets[i])
+
+    def degree(self, n=None):
+        """Total degree of n; without n, (node, degree) pairs for every node."""
+        if n is not None:
+            return self.in_degree(n) + self.out_degree(n)
+        degrees = np.diff(self.succ_offsets) + np.diff(self.pred_offsets)
+        return zip(self.labels, degrees.tolist())
+
+    def edges(self, data=False):
+        """(u, v) pairs node by node, each node's successors in order (like DiGraph.edges)."""
+        for u in self.labels:
+            for v in self.successors(u):
+                yield (u, v, self.get_edge_data(u, v)) if data else (u, v)
+
+    def has_edge(self, u, v):
+        return self._edge_position(u, v) is not None
+
+    def get_edge_data(self, u, v, default=None):
+        k = self._edge_position(u, v)
+        return default if k is None else self._edge_data(k)
+
+    def __getitem__(self, u):
+        if u not in self.ids:
+            raise KeyError(u)
+        return _Adjacency(self, u)
+
+    def subgraph(self, nodes):
+        return _Subgraph(self, nodes)
+
+    def _edge_position(self, u, v):
+        # The store's edge table is sorted by (sender, receiver): binary search u's block
+        i, j = self.ids.get(u), self.ids.get(v)
+        if i is None or j is None:
+            return None
+        lo, hi = self.succ_offsets[i], self.succ_offsets[i + 1]
+        k = lo + int(np.searchsorted(self.store.edge_dst[lo:hi], j))
+        if k < hi and self.store.edge_dst[k] == j:
+            return k
+        return None
+
+    def _edge_data(self, k):
+        offsets = self.store.edge_offsets
+        return {'transactions': EdgeTransactions(self.store, int(offsets[k]), int(offsets[k + 1]))}
+
+    # ---- algorithms ----
+
+    def strongly_connected_components(self):
+        """Yields the strongly connected components as sets of labels (iterative Tarjan)."""
+        n = len(self.labels)
+        offsets = self.succ_offsets.tolist()
+        succ = self.succ.tolist()
+        labels = self.labels
+        order = [-1] * n
+        low = [0] * n
+        on_stack = [False] * n
+        stack = []
+        counter = 0
+
+        for root in range(n):
+            if order[root] != -1:
+                continue
+            order[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = True
+            work = [[root, offsets[root]]]
+
+            while work:
+                frame = work[-1]
+                v, k = frame
+                if k < offsets[v + 1]:
+                    frame[1] = k + 1
+                    w = succ[k]
+                    if order[w] == -1:
+                        order[w] = low[w] = counter
+                        counter += 1
+                        stack.append(w)
+                        on_stack[w] = True
+                        work.append([w, offsets[w]])
+                    elif on_stack[w] and order[w] < low[v]:
+                        low[v] = order[w]
+                    continue
+
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    if low[v] < low[parent]:
+                        low[parent] = low[v]
+                if low[v] == order[v]:
+                    component = set()
+                    while True:
+                        w = stack.pop()
+                        on_stack[w] = False
+                        component.add(labels[w])
+                        if w == v:
+                            break
+                    yield component
+
+    def estimated_bytes(self):
+        arrays = (self.succ_offsets, self.succ, self.pred_offsets, self.pred)
+        # Label -> id dict and the label list
+        return sum(a.nbytes for a in arrays) + 120 * self.store.num_nodes
+
+
+class _Adjacency:
+    """G[u]: the successors of u, with G[u][v] giving the edge attributes."""
+    __slots__ = ('G', 'u')
+
+    def __init__(self, G, u):
+        self.G = G
+        self.u = u
+
+    def __iter__(self):
+        return self.G.successors(self.u)
+
+    def __len__(self):
+        return self.G.out_degree(self.u)
+
+    def __contains__(self, v):
+        return self.G.has_edge(self.u, v)
+
+    def __getitem__(self, v):
+        data = self.G.get_edge_data(self.u, v)
+        if data is None:
+            raise KeyError(v)
+        return data
+
+
+class _Subgraph:
+    """Node-induced view of a CSRGraph (what G.subgraph(...) gives for a DiGraph)."""
+
+    def __init__(self, G, nodes):
+        self.G = G
+        self.node_set = {n for n in nodes if n in G}
+
+    def __len__(self):
+        return len(self.node_set)
+
+    def __iter__(self):
+        return iter(self.node_set)
+
+    def __contains__(self, n):
+        return n in self.node_set
+
+    def nodes(self):
+        return list(self.node_set)
+
+    def number_of_nodes(self):
+        return len(self.node_set)
+
+    def successors(self, n):
+        if n not in self.node_set:
+            raise KeyError(n)
+        return (v for v in self.G.successors(n) if v in self.node_set)
+
+    def predecessors(self, n):
+        if n not in self.node_set:
+            raise KeyError(n)
+        return (v for v in self.G.predecessors(n) if v in self.node_set)
+
+    def copy(self):
+        return self
@@ -1,46 +1,100 @@
 import networkx as nx
+from .csr_graph import CSRGraph
 
-def detect_cycles(G: nx.DiGraph):
+MIN_CYCLE_LENGTH = 3
+MAX_CYCLE_LENGTH = 5
+
+def detect_cycles(G: nx.DiGraph, min_length=MIN_CYCLE_LENGTH, max_length=MAX_CYCLE_LENGTH):
     """
-    Detects directed cycles of length 3, 4, or 5 using a deterministic DFS.
-    Returns a list of canonical cycles (tuples of node IDs).
+    Detects directed cycles of length 3, 4, or 5 (bounded Johnson-style search).
+    Every cycle lies inside one strongly connected component, so the graph is split
+    into SCCs first and each component is searched on its own.
+    Returns a sorted list of canonical cycles (tuples of node IDs, smallest node first).
     """
-    cycles = set()
-    nodes = sorted(list(G.nodes())) # Deterministic order
-    
-    for start_node in nodes:
-        stack = [(start_node, [start_node])]
-        
-        while stack:
-            curr, path = stack.pop()
-            
-            # Explore neighbors
-            # Sort neighbors for determinism
-            neighbors = sorted(list(G.successors(curr)))
-            
-            for neighbor in neighbors:
-                if neighbor == start_node:
-                    # Cycle found
-                    if 3 <= len(path) <= 5:
-                        cycle = tuple(path)
-                        canonical = _canonicalize(cycle)
-                        cycles.add(canonical)
-                elif neighbor not in path:
-                    # Continue detecting if depth limit not reached
-                    # path length current is len(path). 
-                    # If we add neighbor, length becomes len(path)+1.
-                    # We only care about cycles up to length 5.
-                    if len(path) < 5:
-                        stack.append((neighbor, path + [neighbor]))
-                        
+    cycles = []
+    for component in strongly_connected_components(G):
+        if len(component) >= min_length:
+            cycles.extend(find_component_cycles(G, component, min_length, max_length))
+
     # Sort cycles for deterministic output list
-    return sorted(list(cycles))
+    cycles.sort()
+    return cycles
+
+def strongly_connected_components(G):
+    """SCCs of a DiGraph or CSRGraph (which has its own array-based implementation)."""
+    if isinstance(G, CSRGraph):
+        return G.strongly_connected_components()
+    return nx.strongly_connected_components(G)
+
+def find_component_cycles(G: nx.DiGraph, component, min_length=MIN_CYCLE_LENGTH, max_length=MAX_CYCLE_LENGTH):
+    """
+    Enumerates the bounded-length cycles of one strongly connected component.
+    Nodes are ranked lexicographically and a search from `start` only visits nodes
+    ranked above it, so each cycle is found exactly once, already rotated to start
+    at its smallest node.
+    """
+    members = sorted(component)
+    rank = {n: i for i, n in enumerate(members)}
+
+    # Component-local adjacency by rank, sorted for determinism
+    succ = [
+        sorted(rank[v] for v in G.successors(u) if v in rank)
+        for u in members
+    ]
+
+    cycles = []
+    for start in range(len(members)):
+        path = [start]
+        on_path = {start}
+        stack = [iter(succ[start])]
 
-def _canonicalize(cycle):
+        while stack:
+            nxt = next(stack[-1], None)
+
+            if nxt is None:
+                stack.pop()
+                on_path.discard(path.pop())
+            elif nxt == start:
+                if len(path) >= min_length:
+                    cycles.append(tuple(members[i] for i in path))
+            elif nxt > start and nxt not in on_path and len(path) < max_length:
+                path.append(nxt)
+                on_path.add(nxt)
+                stack.append(iter(succ[nxt]))
+
+    return cycles
+
+def find_cycles_through_edges(G: nx.DiGraph, edges, min_length=MIN_CYCLE_LENGTH, max_length=MAX_CYCLE_LENGTH):
     """
-    Rotate cycle so the lexicographically smallest node is first.
-    E.g. ('B', 'C', 'A') -> ('A', 'B', 'C')
+    Bounded-length cycles of G that use at least one of `edges` (u, v), found by
+    searching v -> ... -> u paths only. Used when edges are added to a graph whose
+    other cycles are already known.
+    Returns a sorted list of canonical cycles (rotated to start at the smallest node).
     """
-    min_node = min(cycle)
-    min_index = cycle.index(min_node)
-    return cycle[min_index:] + cycle[:min_index]
+    found = set()
+    for u, v in edges:
+        if u == v:
+            continue
+        path = [u, v]
+        on_path = {u, v}
+        stack = [iter(sorted(G.successors(v)))]
+
+        while stack:
+            nxt = next(stack[-1], None)
+
+            if nxt is None:
+                stack.pop()
+                on_path.discard(path.pop())
+            elif nxt == u:
+                if len(path) >= min_length:
+                    found.add(_rotate_to_smallest(path))
+            elif nxt not in on_path and len(path) < max_length:
+                path.append(nxt)
+                on_path.add(nxt)
+                stack.append(iter(sorted(G.successors(nxt))))
+
+    return sorted(found)
+
+def _rotate_to_smallest(path):
+    k = path.index(min(path))
+    return tuple(path[k:] + path[:k])
@@ -0,0 +1,167 @@
+import io
+
+import numpy as np
+
+from .score_engine import PATTERN_BITS
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: only needed for Parquet / Arrow exports
+    pa = pq = None
+
+EXPORT_TABLES = ("accounts", "rings", "ring_members", "score_breakdowns")
+EXPORT_FORMATS = ("parquet", "arrow")
+
+MEDIA_TYPES = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.file",
+}
+
+# Archival exports: zstd for both formats, at a higher Parquet level
+ARCHIVE_CODEC = "zstd"
+ARCHIVE_PARQUET_LEVEL = 9
+
+# Output pattern names (ScoreTable.pattern_names) and the bits that set them
+_PATTERN_COLUMNS = [
+    ("cycle", PATTERN_BITS['cycle']),
+    ("cycle_length_3_5", PATTERN_BITS['cycle_length_3_5']),
+    ("fan_in", PATTERN_BITS['fan_in']),
+    ("fan_out", PATTERN_BITS['fan_out']),
+    ("high_velocity", PATTERN_BITS['high_velocity'] | PATTERN_BITS['in_cycle']),
+    ("shell", PATTERN_BITS['shell']),
+]
+
+
+class ExportError(RuntimeError):
+    """Export not possible (missing pyarrow, unknown table / format)."""
+
+
+class RunExport:
+    """
+    Columnar (Arrow) tables of one run, built from its ScoreTable arrays and
+    RingIndex rather than the per-account result dicts:
+
+      accounts          account_id, suspicion_score, detected_patterns, ring_id
+      rings             ring_id, pattern_type, risk_score, member_count
+      ring_members      ring_id, account_id, member_index (one row per member)
+      score_breakdowns  account_id, reason, points (ScoreTable.breakdown_columns)
+
+    accounts and score_breakdowns hold the accounts /download keeps (score > 0
+    or in a ring), in output order: score descending, then account id.
+    """
+
+    def __init__(self, score_table, ring_index):
+        if pa is None:
+            raise ExportError("Parquet/Arrow exports require the pyarrow package")
+        self.table = score_table
+        self.ring_index = ring_index
+        self.nodes = np.empty(len(score_table), dtype=object)
+        self.nodes[:] = score_table.nodes
+
+        ids = score_table.ids
+        rings = ring_index.rings
+        self.ring_ids = np.array([r['ring_id'] for r in rings], dtype=object)
+        counts = np.array([len(r['member_accounts']) for r in rings], dtype=np.int64)
+        # Exploded membership: ring position and account index per member
+        self.member_ring = np.repeat(np.arange(len(rings)), counts)
+        self.member_account = np.array([ids[m] for r in rings for m in r['member_accounts']], dtype=np.int64)
+        self.member_index = np.arange(len(self.member_ring)) - np.repeat(np.cumsum(counts) - counts, counts)
+
+        # Output scores are rounded to 2 places as text (np.round can differ in the last digit)
+        self.scores = np.array([float(f"{s:.2f}") for s in score_table.score.tolist()], dtype=np.float64)
+        self.best_ring = self._best_rings()
+        keep = np.flatnonzero((self.scores > 0) | (self.best_ring >= 0))
+        self.order = keep[np.lexsort((_ranks(self.nodes[keep]), -self.scores[keep]))]
+
+    def _best_rings(self):
+        """Ring position of each account's best ring (RingIndex.best_ring), -1 for none."""
+        best = np.full(len(self.nodes), -1, dtype=np.int64)
+        if not len(self.member_ring):
+            return best
+        risk = np.array([r['risk_score'] for r in self.ring_index.rings], dtype=np.float64)
+        rid_rank = _ranks(self.ring_ids)
+        ring, account = self.member_ring, self.member_account
+        order = np.lexsort((rid_rank[ring], -risk[ring], account))
+        first = order[np.r_[True, account[order][1:] != account[order][:-1]]]
+        best[account[first]] = ring[first]
+        return best
+
+    def accounts(self):
+        order = self.order
+        bits = self.table.patterns[order]
+        has = np.column_stack([(bits & bit) != 0 for _, bit in _PATTERN_COLUMNS]) if len(order) else \
+            np.zeros((0, len(_PATTERN_COLUMNS)), dtype=bool)
+        # Row-major nonzero lists each account's patterns in name order
+        _, codes = np.nonzero(has)
+        offsets = np.concatenate(([0], np.cumsum(has.sum(axis=1)))).astype(np.int32)
+        names = pa.DictionaryArray.from_arrays(
+            pa.array(codes.astype(np.int8)), pa.array([name for name, _ in _PATTERN_COLUMNS])
+        ).cast(pa.string())
+        best = self.best_ring[order]
+        ring_ids = np.full(len(order), None, dtype=object)
+        ring_ids[best >= 0] = self.ring_ids[best[best >= 0]]
+        return pa.table({
+            "account_id": pa.array(self.nodes[order], type=pa.string()),
+            "suspicion_score": pa.array(self.scores[order]),
+            "detected_patterns": pa.ListArray.from_arrays(pa.array(offsets), names),
+            "ring_id": pa.array(ring_ids, type=pa.string()),
+        })
+
+    def rings(self):
+        rings = self.ring_index.rings
+        return pa.table({
+            "ring_id": pa.array(self.ring_ids, type=pa.string()),
+            "pattern_type": pa.array([r['pattern_type'] for r in rings], type=pa.string()),
+            "risk_score": pa.array([r['risk_score'] for r in rings], type=pa.float64()),
+            "member_count": pa.array(np.bincount(self.member_ring, minlength=len(rings)).astype(np.int64)),
+        })
+
+    def ring_members(self):
+        return pa.table({
+            "ring_id": pa.array(self.ring_ids[self.member_ring], type=pa.string()),
+            "account_id": pa.array(self.nodes[self.member_account], type=pa.string()),
+            "member_index": pa.array(self.member_index.astype(np.int32)),
+        })
+
+    def score_breakdowns(self):
+        positions, reasons, points = self.table.breakdown_columns()
+        # Exported accounts only, in their output order (entries keep rule order)
+        rank = np.full(len(self.nodes), -1, dtype=np.int64)
+        rank[self.order] = np.arange(len(self.order))
+        kept = np.flatnonzero(rank[positions] >= 0)
+        kept = kept[np.argsort(rank[positions[kept]], kind='stable')]
+        return pa.table({
+            "account_id": pa.array(self.nodes[positions[kept]], type=pa.string()),
+            "reason": pa.array(reasons[kept], type=pa.string()),
+            "points": pa.array(points[kept], type=pa.float64()),
+        })
+
+    def build(self, name: str):
+        if name not in EXPORT_TABLES:
+            raise ExportError(f"Unknown export table: {name}")
+        return getattr(self, name)()
+
+
+def write_table(table, fmt: str, compressed: bool = False) -> bytes:
+    """Serializes an Arrow table as Parquet (snappy; zstd when compressed) or an Arrow IPC file."""
+    buf = io.BytesIO()
+    if fmt == "parquet":
+        if compressed:
+            pq.write_table(table, buf, compression=ARCHIVE_CODEC, compression_level=ARCHIVE_PARQUET_LEVEL)
+        else:
+            pq.write_table(table, buf)
+    elif fmt == "arrow":
+        options = pa.ipc.IpcWriteOptions(compression=ARCHIVE_CODEC if compressed else None)
+        with pa.ipc.new_file(buf, table.schema, options=options) as writer:
+            writer.write_table(table)
+    else:
+        raise ExportError(f"Unknown export format: {fmt}")
+    return buf.getvalue()
+
+
+def _ranks(values: np.ndarray) -> np.ndarray:
+    """Rank of each value in sorted order (for sorting object arrays inside lexsort)."""
+    ranks = np.empty(len(values), dtype=np.int64)
+    ranks[np.argsort(values, kind='stable')] = np.arange(len(values))
+    return ranks
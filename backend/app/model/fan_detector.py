@@ -1,167 +1,187 @@
 import networkx as nx
+import numpy as np
 from datetime import timedelta
-import pandas as pd
+from .account_index import get_account_index
 
-def detect_fan_patterns(G: nx.DiGraph):
+# Shared thresholds for the 72h window detectors
+FAN_WINDOW = timedelta(hours=72)
+FAN_WINDOW_NS = FAN_WINDOW // timedelta(microseconds=1) * 1000
+FAN_THRESHOLD = 10        # distinct counterparties
+VELOCITY_THRESHOLD = 20   # transactions, either direction
+
+def detect_fan_patterns(G: nx.DiGraph, index=None):
     """
     Detects fan-in and fan-out patterns.
     Fan-in: receiver has >= 10 distinct senders in 72h window.
     Fan-out: sender has >= 10 distinct receivers in 72h window.
-    
+
     Returns:
-        fan_in_nodes (set): Set of node IDs
-        fan_out_nodes (set): Set of node IDs
-    """
-    fan_in_nodes = set()
-    fan_out_nodes = set()
-    
-    nodes = sorted(list(G.nodes()))
-    
-    for node in nodes:
-        # Fan-in check: Look at incoming edges
-        incoming_txs = []
-        for sender in G.predecessors(node):
-            for tx in G[sender][node]['transactions']:
-                incoming_txs.append({'partner': sender, 'ts': tx['timestamp'], 'type': 'in'})
-        
-        if _check_fan_condition(incoming_txs):
-            fan_in_nodes.add(node)
-            
-        # Fan-out check: Look at outgoing edges
-        outgoing_txs = []
-        for receiver in G.successors(node):
-            for tx in G[node][receiver]['transactions']:
-                outgoing_txs.append({'partner': receiver, 'ts': tx['timestamp'], 'type': 'out'})
-                
-        if _check_fan_condition(outgoing_txs):
-            fan_out_nodes.add(node)
-            
-    return sorted(list(fan_in_nodes)), sorted(list(fan_out_nodes))
-
-def _check_fan_condition(transactions):
+        fan_in_nodes (list): Sorted node IDs
+        fan_out_nodes (list): Sorted node IDs
     """
-    Check if there are >= 10 distinct partners in any 72h window.
-    transactions: list of dicts {'partner': str, 'ts': datetime}
-    """
-    if not transactions:
-        return False
-        
-    # Sort by timestamp
-    transactions.sort(key=lambda x: x['ts'])
-    
-    # Sliding window
-    # Optimized: for each tx as start of window, count distinct partners in next 72h
-    for i in range(len(transactions)):
-        start_time = transactions[i]['ts']
-        end_time = start_time + timedelta(hours=72)
-        
-        window_partners = set()
-        for j in range(i, len(transactions)):
-            if transactions[j]['ts'] > end_time:
-                break
-            window_partners.add(transactions[j]['partner'])
-            
-            if len(window_partners) >= 10:
-                return True
-                
-    return False
-
-def calculate_fan_counts(G: nx.DiGraph):
+    if index is None:
+        index = get_account_index(G)
+    stats = get_window_stats(index)
+
+    fan_in_nodes = index.nodes[stats['fan_in_hit']].tolist()
+    fan_out_nodes = index.nodes[stats['fan_out_hit']].tolist()
+    return sorted(fan_in_nodes), sorted(fan_out_nodes)
+
+def calculate_fan_counts(G: nx.DiGraph, index=None):
     """
     Calculates fan counts and amount stats.
     Returns:
-        fan_in_counts (dict)
-        fan_out_counts (dict)
+        fan_in_counts (dict): Max distinct senders in any 72h window
+        fan_out_counts (dict): Max distinct receivers in any 72h window
         fan_in_amounts (dict): Total amount received
         fan_out_amounts (dict): Total amount sent
     """
-    fan_in_counts = {}
-    fan_out_counts = {}
-    fan_in_amounts = {}
-    fan_out_amounts = {}
-    
-    for node in G.nodes():
-        # Fan-in
-        incoming_txs = []
-        total_in = 0
-        for sender in G.predecessors(node):
-            for tx in G[sender][node]['transactions']:
-                incoming_txs.append({'partner': sender, 'ts': tx['timestamp']})
-                total_in += tx['amount']
-        fan_in_counts[node] = _get_max_window_count(incoming_txs)
-        fan_in_amounts[node] = total_in
-        
-        # Fan-out
-        outgoing_txs = []
-        total_out = 0
-        for receiver in G.successors(node):
-            for tx in G[node][receiver]['transactions']:
-                outgoing_txs.append({'partner': receiver, 'ts': tx['timestamp']})
-                total_out += tx['amount']
-        fan_out_counts[node] = _get_max_window_count(outgoing_txs)
-        fan_out_amounts[node] = total_out
-        
+    if index is None:
+        index = get_account_index(G)
+    stats = get_window_stats(index)
+
+    labels = index.nodes.tolist()
+    fan_in_counts = dict(zip(labels, stats['fan_in_count'].tolist()))
+    fan_out_counts = dict(zip(labels, stats['fan_out_count'].tolist()))
+    fan_in_amounts = dict(zip(labels, index.in_total.tolist()))
+    fan_out_amounts = dict(zip(labels, index.out_total.tolist()))
+
     return fan_in_counts, fan_out_counts, fan_in_amounts, fan_out_amounts
 
-def _get_max_window_count(transactions):
-    if not transactions:
-        return 0
-        
-    # Sort by timestamp
-    transactions.sort(key=lambda x: x['ts'])
-    
-    max_count = 0
-    # Sliding window
-    for i in range(len(transactions)):
-        start_time = transactions[i]['ts']
-        end_time = start_time + timedelta(hours=72)
-        
-        window_partners = set()
-        for j in range(i, len(transactions)):
-            if transactions[j]['ts'] > end_time:
-                break
-            window_partners.add(transactions[j]['partner'])
-            
-        max_count = max(max_count, len(window_partners))
-        
-    return max_count
-
-def detect_high_velocity(G: nx.DiGraph):
+def detect_high_velocity(G: nx.DiGraph, index=None):
     """
     High velocity: detects nodes with >= 20 txns (send or receive) in 72h window.
-    Returns set of node IDs.
+    Returns sorted list of node IDs.
+    """
+    if index is None:
+        index = get_account_index(G)
+    stats = get_window_stats(index)
+
+    high_velocity_nodes = index.nodes[stats['max_velocity'] >= VELOCITY_THRESHOLD].tolist()
+    return sorted(high_velocity_nodes)
+
+def get_window_stats(index):
+    """
+    Per-account 72h window statistics for the whole index, computed on first use
+    and cached on the index so every detector shares one pass.
+    """
+    if index.window_stats is None:
+        index.window_stats = compute_window_stats(index)
+    return index.window_stats
+
+def compute_window_stats(index, start=0, stop=None):
+    """
+    Runs the sliding-window engine for accounts [start, stop) of the index:
+    once over incoming transactions, once over outgoing and once over both.
+    Returns a dict of arrays aligned with that account range.
+    """
+    if stop is None:
+        stop = len(index)
+    size = stop - start
+
+    stats = {
+        'fan_in_count': np.zeros(size, dtype=np.int64),
+        'fan_in_hit': np.zeros(size, dtype=bool),
+        'fan_out_count': np.zeros(size, dtype=np.int64),
+        'fan_out_hit': np.zeros(size, dtype=bool),
+        'max_velocity': np.zeros(size, dtype=np.int64),
+    }
+
+    for direction in ('in', 'out'):
+        offsets = getattr(index, f'{direction}_offsets')[start:stop + 1]
+        ts = getattr(index, f'{direction}_ts')[offsets[0]:offsets[-1]].tolist()
+        partners = getattr(index, f'{direction}_partner')[offsets[0]:offsets[-1]].tolist()
+        offsets = (offsets - offsets[0]).tolist()
+        counts = stats[f'fan_{direction}_count']
+        hits = stats[f'fan_{direction}_hit']
+
+        for k in range(size):
+            counts[k], hits[k], _ = _node_window_stats(ts, partners, offsets[k], offsets[k + 1])
+
+    offsets = index.all_offsets[start:stop + 1]
+    ts = index.all_ts[offsets[0]:offsets[-1]].tolist()
+    offsets = (offsets - offsets[0]).tolist()
+    velocity = stats['max_velocity']
+    for k in range(size):
+        velocity[k] = _node_window_stats(ts, None, offsets[k], offsets[k + 1])[2]
+
+    return stats
+
+def update_window_stats(index, previous, accounts):
+    """
+    Window stats for an index that grew by appended transactions, given the
+    stats of the index before (aligned with its first accounts). Only `accounts`
+    (ids whose transactions changed, including every new account) are swept
+    again; every other account keeps its previous values.
     """
-    high_velocity_nodes = set()
-    nodes = sorted(list(G.nodes()))
-    
-    for node in nodes:
-        all_txs = []
-        # Incoming
-        for sender in G.predecessors(node):
-            for tx in G[sender][node]['transactions']:
-                all_txs.append(tx['timestamp'])
-        # Outgoing
-        for receiver in G.successors(node):
-            for tx in G[node][receiver]['transactions']:
-                all_txs.append(tx['timestamp'])
-                
-        all_txs.sort()
-        
-        # Sliding window check
-        found = False
-        for i in range(len(all_txs)):
-            if found: break
-            start_time = all_txs[i]
-            end_time = start_time + timedelta(hours=72)
-            
-            count = 0
-            for j in range(i, len(all_txs)):
-                if all_txs[j] > end_time:
-                    break
-                count += 1
-                if count >= 20:
-                    high_velocity_nodes.add(node)
-                    found = True
-                    break
-                    
-    return sorted(list(high_velocity_nodes))
+    n = len(index)
+    stats = {}
+    for key, values in previous.items():
+        grown = np.zeros(n, dtype=values.dtype)
+        grown[:len(values)] = values
+        stats[key] = grown
+
+    for i in np.unique(accounts).tolist():
+        for direction, group in (('in', index.incoming), ('out', index.outgoing)):
+            ts, _, partners = group(i)
+            stats[f'fan_{direction}_count'][i], stats[f'fan_{direction}_hit'][i], _ = \
+                _node_window_stats(ts.tolist(), partners.tolist(), 0, len(ts))
+        ts = index.timestamps(i).tolist()
+        stats['max_velocity'][i] = _node_window_stats(ts, None, 0, len(ts))[2]
+
+    return stats
+
+def _node_window_stats(timestamps, partners, lo, hi):
+    """Window stats for one account's time-ordered slice [lo, hi)."""
+    if hi <= lo:
+        return 0, False, 0
+
+    # Everything fits in a single window: no sweep needed
+    if timestamps[hi - 1] - timestamps[lo] <= FAN_WINDOW_NS:
+        distinct = len(set(partners[lo:hi])) if partners is not None else 0
+        return distinct, distinct >= FAN_THRESHOLD, hi - lo
+
+    return sliding_window_stats(
+        timestamps[lo:hi],
+        partners[lo:hi] if partners is not None else None,
+        window=FAN_WINDOW_NS,
+    )
+
+def sliding_window_stats(timestamps, partners=None, window=FAN_WINDOW, threshold=FAN_THRESHOLD):
+    """
+    Two-pointer sweep over timestamps sorted ascending. A window opens at every
+    transaction and closes `window` later (inclusive), matching the per-start scan
+    it replaces, but each transaction enters and leaves the window exactly once.
+    partners (optional) is parallel to timestamps; distinct partners are tracked
+    with an incrementally updated partner -> count dict.
+
+    Returns (max_distinct_partners, max_distinct_partners >= threshold, max_txn_count).
+    """
+    n = len(timestamps)
+    counts = {}
+    max_distinct = 0
+    max_count = 0
+    j = 0
+
+    for i in range(n):
+        end_time = timestamps[i] + window
+        while j < n and timestamps[j] <= end_time:
+            if partners is not None:
+                p = partners[j]
+                counts[p] = counts.get(p, 0) + 1
+            j += 1
+
+        if len(counts) > max_distinct:
+            max_distinct = len(counts)
+        if j - i > max_count:
+            max_count = j - i
+
+        # Slide the window start past transaction i
+        if partners is not None:
+            p = partners[i]
+            if counts[p] == 1:
+                del counts[p]
+            else:
+                counts[p] -= 1
+
+    return max_distinct, max_distinct >= threshold, max_count
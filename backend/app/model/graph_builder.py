@@ -1,40 +1,310 @@
+import hashlib
 import pandas as pd
 import networkx as nx
-from datetime import datetime
+import numpy as np
+from collections.abc import Sequence
+
+
+class TransactionStore:
+    """
+    Columnar storage for every transaction of an upload.
+    Sender/receiver ids are factorized into integer node ids (in order of first
+    appearance) and all columns are sorted once by (sender, receiver, timestamp),
+    so each edge's transactions are one contiguous slice of the shared arrays.
+    """
+
+    def __init__(self, nodes, txn_ids, src, dst, amount, timestamp, txn_index, tz=None, content_hash=None,
+                 edge_table=None):
+        self.nodes = nodes              # node id -> account label (object array)
+        self.txn_ids = txn_ids          # original transaction ids, upload row order
+        self.src = src                  # int32 sender id per transaction
+        self.dst = dst                  # int32 receiver id per transaction
+        self.amount = amount            # float64
+        self.timestamp = timestamp      # int64 epoch nanoseconds (UTC)
+        self.txn_index = txn_index      # int64 row into txn_ids
+        self.tz = tz
+        self.content_hash = content_hash  # canonical hash of the normalized rows (StoreBuilder)
+
+        # Edge table: one entry per distinct (sender, receiver) pair
+        # (edge_table = (offsets, src, dst) when already known, e.g. from a snapshot)
+        if edge_table is not None:
+            self.edge_offsets, self.edge_src, self.edge_dst = edge_table
+            return
+        n = len(src)
+        if n:
+            change = np.flatnonzero((src[1:] != src[:-1]) | (dst[1:] != dst[:-1])) + 1
+            starts = np.concatenate(([0], change))
+        else:
+            starts = np.zeros(0, dtype=np.int64)
+        self.edge_offsets = np.append(starts, n).astype(np.int64)
+        self.edge_src = src[starts]
+        self.edge_dst = dst[starts]
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame):
+        return StoreBuilder().add_frame(df).build()
+
+    @classmethod
+    def from_graph(cls, G: nx.DiGraph):
+        """Builds a store from a plain DiGraph whose edges carry 'transactions' lists."""
+        ids = {n: i for i, n in enumerate(G.nodes())}
+        src, dst, txn_ids, amount, timestamp = [], [], [], [], []
+        for u, v, data in G.edges(data=True):
+            for tx in data.get('transactions', []):
+                src.append(ids[u])
+                dst.append(ids[v])
+                txn_ids.append(tx['transaction_id'])
+                amount.append(float(tx['amount']))
+                timestamp.append(tx['timestamp'])
+
+        ts = pd.DatetimeIndex(timestamp)
+        tz = ts.tz
+        if tz is not None:
+            ts = ts.tz_convert(None)
+        timestamp = ts.to_numpy(dtype='datetime64[ns]').view(np.int64)
+        src = np.asarray(src, dtype=np.int32)
+        dst = np.asarray(dst, dtype=np.int32)
+        order = np.lexsort((timestamp, dst, src))
+
+        nodes = np.empty(len(ids), dtype=object)
+        nodes[:] = list(ids)
+        return cls(
+            nodes=nodes,
+            txn_ids=np.asarray(txn_ids, dtype=object),
+            src=src[order],
+            dst=dst[order],
+            amount=np.asarray(amount, dtype=np.float64)[order],
+            timestamp=timestamp[order],
+            txn_index=order.astype(np.int64),
+            tz=tz,
+        )
+
+    @property
+    def num_nodes(self):
+        return len(self.nodes)
+
+    @property
+    def num_edges(self):
+        return len(self.edge_src)
+
+    def to_timestamp(self, ns):
+        return pd.Timestamp(int(ns), tz=self.tz)
+
+    def transaction(self, i):
+        txn_id = self.txn_ids[self.txn_index[i]]
+        if isinstance(txn_id, np.generic):
+            # Snapshot-backed ids are numpy scalars
+            txn_id = txn_id.item()
+        return {
+            'transaction_id': txn_id,
+            'amount': float(self.amount[i]),
+            'timestamp': self.to_timestamp(self.timestamp[i]),
+        }
+
+    def edge_order(self):
+        """Edge positions ordered by the upload row of each edge's first transaction."""
+        if not self.num_edges:
+            return np.zeros(0, dtype=np.int64)
+        first_row = np.minimum.reduceat(self.txn_index, self.edge_offsets[:-1])
+        return np.argsort(first_row, kind='stable')
+
+
+class StoreBuilder:
+    """
+    Accumulates transaction chunks into a TransactionStore. Each chunk is reduced
+    to compact columns as soon as it arrives (ids factorized against a running
+    label table), so the source DataFrame can be dropped before the next chunk.
+    """
+
+    def __init__(self):
+        self.labels = {}
+        self.tz = None
+        self.rows = 0
+        self._src, self._dst, self._amount, self._timestamp, self._txn_ids = [], [], [], [], []
+        self._hash = hashlib.sha256()
+
+    @classmethod
+    def from_store(cls, store: TransactionStore):
+        """
+        Builder seeded with an existing store's transactions (in upload row order),
+        so further chunks are appended to it. Existing accounts keep their node ids
+        and new accounts are numbered after them. The content hash is chained onto
+        the store's hash; it is None when the store has none.
+        """
+        builder = cls()
+        builder.labels = {label: i for i, label in enumerate(store.nodes.tolist())}
+        builder.tz = store.tz
+        builder.rows = len(store.txn_ids)
+
+        # Undo the (sender, receiver, timestamp) sort: row r of the upload is txn_index == r
+        for name, target in (('src', builder._src), ('dst', builder._dst),
+                             ('amount', builder._amount), ('timestamp', builder._timestamp)):
+            column = getattr(store, name)
+            upload_order = np.empty_like(column)
+            upload_order[store.txn_index] = column
+            target.append(upload_order)
+        builder._txn_ids.append(store.txn_ids)
+
+        if store.content_hash:
+            builder._hash.update(store.content_hash.encode())
+        else:
+            builder._hash = None
+        return builder
+
+    def add_frame(self, df: pd.DataFrame):
+        senders = df['sender_id'].astype(str).to_numpy(dtype=object)
+        receivers = df['receiver_id'].astype(str).to_numpy(dtype=object)
+
+        # Interleave sender/receiver so node ids follow first appearance in the upload
+        codes, uniques = pd.factorize(np.column_stack([senders, receivers]).ravel())
+        labels = self.labels
+        global_ids = np.array([labels.setdefault(u, len(labels)) for u in uniques], dtype=np.int32)
+        codes = global_ids[codes] if len(codes) else codes.astype(np.int32)
+        self._src.append(codes[0::2].astype(np.int32))
+        self._dst.append(codes[1::2].astype(np.int32))
+
+        ts = df['timestamp']
+        if ts.dt.tz is not None:
+            if self.tz is None:
+                self.tz = ts.dt.tz
+            ts = ts.dt.tz_convert(None)
+        timestamp = ts.to_numpy(dtype='datetime64[ns]').view(np.int64)
+        amount = df['amount'].to_numpy(dtype=np.float64)
+        txn_ids = df['transaction_id'].to_numpy(dtype=object)
+        self._timestamp.append(timestamp)
+        self._amount.append(amount)
+        self._txn_ids.append(txn_ids)
+
+        # Canonical content hash: per-row hashes of the normalized columns in a
+        # fixed order, so the source column order and chunking do not matter
+        if self._hash is not None:
+            row_hashes = pd.util.hash_pandas_object(pd.DataFrame({
+                'transaction_id': txn_ids,
+                'sender_id': senders,
+                'receiver_id': receivers,
+                'amount': amount,
+                'timestamp': timestamp,
+            }), index=False)
+            self._hash.update(row_hashes.to_numpy().tobytes())
+
+        self.rows += len(df)
+        return self
+
+    def build(self) -> TransactionStore:
+        src = _concat(self._src, np.int32)
+        dst = _concat(self._dst, np.int32)
+        amount = _concat(self._amount, np.float64)
+        timestamp = _concat(self._timestamp, np.int64)
+        txn_ids = _concat(self._txn_ids, object)
+        self._src, self._dst, self._amount, self._timestamp, self._txn_ids = [], [], [], [], []
+
+        # lexsort is stable, so same-timestamp transactions keep upload order
+        order = np.lexsort((timestamp, dst, src))
+
+        nodes = np.empty(len(self.labels), dtype=object)
+        nodes[:] = list(self.labels)
+        return TransactionStore(
+            nodes=nodes,
+            txn_ids=txn_ids,
+            src=src[order],
+            dst=dst[order],
+            amount=amount[order],
+            timestamp=timestamp[order],
+            txn_index=order.astype(np.int64),
+            tz=self.tz,
+            content_hash=self._hash.hexdigest() if self._hash is not None else None,
+        )
+
+
+def _concat(parts, dtype):
+    if not parts:
+        return np.zeros(0, dtype=dtype)
+    if len(parts) == 1:
+        return parts[0]
+    return np.concatenate(parts)
+
+
+class EdgeTransactions(Sequence):
+    """
+    Read-only list view of one edge's transactions. Items are materialized as
+    {'transaction_id', 'amount', 'timestamp'} dicts on access, so detectors written
+    against the list-of-dicts edge attribute keep working unchanged.
+    """
+    __slots__ = ('store', 'start', 'stop')
+
+    def __init__(self, store, start, stop):
+        self.store = store
+        self.start = start
+        self.stop = stop
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("transaction index out of range")
+        return self.store.transaction(self.start + i)
+
+    def __iter__(self):
+        for i in range(self.start, self.stop):
+            yield self.store.transaction(i)
+
+    @property
+    def amounts(self):
+        return self.store.amount[self.start:self.stop]
+
+    @property
+    def timestamps(self):
+        return self.store.timestamp[self.start:self.stop]
+
 
 def build_graph(df: pd.DataFrame) -> nx.DiGraph:
     """
     Builds a directed graph from the transaction DataFrame.
     Nodes: Account IDs (strings)
     Edges: Directed edge from sender_id to receiver_id.
-           Edge attributes: list of transaction dicts (transaction_id, amount, timestamp)
+           Edge attributes: 'transactions', a list-like EdgeTransactions view
+           (transaction_id, amount, timestamp) ordered by timestamp.
+    The columnar TransactionStore backing the edges is kept in G.graph['store'].
     """
-    G = nx.DiGraph()
-    
     # Ensure timestamps are datetime
     if not pd.api.types.is_datetime64_any_dtype(df['timestamp']):
         df['timestamp'] = pd.to_datetime(df['timestamp'])
 
-    # Add edges
-    for _, row in df.iterrows():
-        sender = str(row['sender_id'])
-        receiver = str(row['receiver_id'])
-        
-        # Add nodes implicitly or explicitly to ensure all are present
-        if sender not in G:
-            G.add_node(sender)
-        if receiver not in G:
-            G.add_node(receiver)
-            
-        attr = {
-            'transaction_id': row['transaction_id'],
-            'amount': float(row['amount']),
-            'timestamp': row['timestamp']
-        }
-        
-        if G.has_edge(sender, receiver):
-            G[sender][receiver]['transactions'].append(attr)
-        else:
-            G.add_edge(sender, receiver, transactions=[attr])
-            
+    store = TransactionStore.from_frame(df)
+    return graph_from_store(store)
+
+
+# Graph implementations graph_from_store can return
+GRAPH_BACKENDS = ('networkx', 'csr')
+
+def graph_from_store(store: TransactionStore, backend: str = 'networkx') -> nx.DiGraph:
+    """
+    Wraps a TransactionStore in a NetworkX DiGraph view. Nodes and edges are added
+    in order of first appearance in the upload.
+    backend='csr' returns a CSRGraph instead: same read API and results, roughly
+    an order of magnitude less memory per transaction.
+    """
+    if backend not in GRAPH_BACKENDS:
+        raise ValueError(f"Unknown graph backend: {backend}")
+    if backend == 'csr':
+        from .csr_graph import CSRGraph
+        return CSRGraph(store)
+
+    G = nx.DiGraph(store=store)
+    G.add_nodes_from(store.nodes.tolist())
+
+    order = store.edge_order()
+    senders = store.nodes[store.edge_src[order]].tolist()
+    receivers = store.nodes[store.edge_dst[order]].tolist()
+    starts = store.edge_offsets[order].tolist()
+    stops = store.edge_offsets[order + 1].tolist()
+    G.add_edges_from(
+        (u, v, {'transactions': EdgeTransactions(store, start, stop)})
+        for u, v, start, stop in zip(senders, receivers, starts, stops)
+    )
     return G
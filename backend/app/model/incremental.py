@@ -0,0 +1,75 @@
+import numpy as np
+import networkx as nx
+from .account_index import get_account_index
+from .cycle_detector import find_cycles_through_edges
+from .fan_detector import (
+    get_window_stats, update_window_stats, detect_fan_patterns, detect_high_velocity, calculate_fan_counts
+)
+from .shell_detector import update_shell_chains
+from .scoring import analyze_graph, assemble_results, _no_progress
+
+
+def analyze_appended(G: nx.DiGraph, base: nx.DiGraph, workers=None, progress=None, shell_compact=False, rules=None):
+    """
+    Analyzes G, the graph of `base` plus appended transactions (built from
+    StoreBuilder.from_store, so base accounts keep their node ids), reusing the
+    analysis kept on base:
+      - 72h windows are swept again only for accounts in the appended rows
+      - cycles are searched only through edges that did not exist in base
+      - shell chains are searched again only around the endpoints of new edges
+      - only accounts whose pattern bits, totals or durations changed are
+        scored again; the others keep base's scores (ScoreTable.updated)
+    Rings are then assembled from the merged detections, so the output matches
+    a full analysis of G. Falls back to analyze_graph when base carries no
+    analysis (e.g. a session restored from its snapshot).
+    """
+    previous = base.graph.get('analysis')
+    if previous is None:
+        return analyze_graph(G, None, workers=workers, progress=progress, shell_compact=shell_compact, rules=rules)
+
+    progress = progress or _no_progress
+    before = previous['detections']
+
+    progress('index')
+    index = get_account_index(G)
+    base_index = get_account_index(base)
+    store = G.graph['store']
+
+    # Appended rows are the ones past the base upload
+    appended = store.txn_index >= len(base.graph['store'].txn_ids)
+    src, dst = store.src[appended], store.dst[appended]
+    touched_ids = np.unique(np.concatenate([src, dst]))
+
+    pairs = np.unique(np.column_stack([src, dst]), axis=0) if len(src) else np.zeros((0, 2), dtype=np.int32)
+    new_edges = [
+        (u, v) for u, v in zip(store.nodes[pairs[:, 0]].tolist(), store.nodes[pairs[:, 1]].tolist())
+        if not base.has_edge(u, v)
+    ]
+
+    progress('cycles')
+    new_cycles = find_cycles_through_edges(G, new_edges)
+    cycles = sorted(before['cycles'] + new_cycles)
+
+    progress('fan_patterns')
+    index.window_stats = update_window_stats(index, get_window_stats(base_index), touched_ids)
+    fan_in_nodes, fan_out_nodes = detect_fan_patterns(G, index)
+    fan_in_counts, fan_out_counts, fan_in_amounts, fan_out_amounts = calculate_fan_counts(G, index)
+
+    progress('high_velocity')
+    high_velocity = detect_high_velocity(G, index)
+
+    progress('shell_chains')
+    shell_chains = update_shell_chains(G, before['shell_chains'], new_edges, compact=shell_compact)
+
+    detections = {
+        'cycles': cycles,
+        'fan_in_nodes': fan_in_nodes,
+        'fan_out_nodes': fan_out_nodes,
+        'fan_in_counts': fan_in_counts,
+        'fan_out_counts': fan_out_counts,
+        'fan_in_amounts': fan_in_amounts,
+        'fan_out_amounts': fan_out_amounts,
+        'high_velocity': high_velocity,
+        'shell_chains': shell_chains,
+    }
+    return assemble_results(G, index, detections, progress, rules, previous=previous['score_table'])
@@ -0,0 +1,121 @@
+import os
+import numpy as np
+import networkx as nx
+from concurrent.futures import ProcessPoolExecutor
+from .cycle_detector import find_component_cycles, strongly_connected_components, MIN_CYCLE_LENGTH
+from .fan_detector import (
+    compute_window_stats, detect_fan_patterns, calculate_fan_counts, detect_high_velocity
+)
+from .shell_detector import detect_shell_chains
+from .csr_graph import CSRGraph
+
+# Per-process state, set once by the pool initializer (inherited on fork)
+_WORKER = {}
+
+# Small components are batched so each task carries a reasonable amount of work
+CYCLE_BATCH_NODES = 2000
+
+def default_workers():
+    return os.cpu_count() or 1
+
+def run_detectors_parallel(G: nx.DiGraph, index, workers=None, shell_compact=False):
+    """
+    Runs the detectors on a process pool and merges the results in the same
+    order as the serial path, so the output is identical:
+      - cycle search is sharded by strongly connected component
+      - fan / velocity windows are sharded by account range (balanced by txn count)
+      - shell chain detection runs as one task on the topology
+    Workers receive a topology-only copy of G plus the AccountIndex.
+    """
+    workers = workers or default_workers()
+
+    if isinstance(G, CSRGraph):
+        # Arrays only, already compact
+        topology = G.topology()
+    else:
+        topology = nx.DiGraph()
+        topology.add_nodes_from(G.nodes())
+        topology.add_edges_from(G.edges())
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(topology, index)) as pool:
+        shell_future = pool.submit(_shell_task, shell_compact)
+
+        window_futures = [
+            pool.submit(_window_task, start, stop)
+            for start, stop in _account_ranges(index, workers * 4)
+        ]
+
+        cycle_futures = [
+            pool.submit(_cycle_task, batch)
+            for batch in _component_batches(topology)
+        ]
+
+        window_parts = [f.result() for f in window_futures]
+        cycles = []
+        for f in cycle_futures:
+            cycles.extend(f.result())
+        shell_chains = shell_future.result()
+
+    cycles.sort()
+
+    if window_parts:
+        index.window_stats = {
+            key: np.concatenate([part[key] for part in window_parts])
+            for key in window_parts[0]
+        }
+
+    fan_in_nodes, fan_out_nodes = detect_fan_patterns(G, index)
+    fan_in_counts, fan_out_counts, fan_in_amounts, fan_out_amounts = calculate_fan_counts(G, index)
+
+    return {
+        'cycles': cycles,
+        'fan_in_nodes': fan_in_nodes,
+        'fan_out_nodes': fan_out_nodes,
+        'fan_in_counts': fan_in_counts,
+        'fan_out_counts': fan_out_counts,
+        'fan_in_amounts': fan_in_amounts,
+        'fan_out_amounts': fan_out_amounts,
+        'high_velocity': detect_high_velocity(G, index),
+        'shell_chains': shell_chains,
+    }
+
+def _account_ranges(index, parts):
+    """Splits [0, n) into contiguous ranges holding roughly equal transaction counts."""
+    n = len(index)
+    if n == 0:
+        return []
+    cum = index.all_offsets[1:]
+    total = int(cum[-1])
+    bounds = np.searchsorted(cum, np.linspace(0, total, parts + 1)[1:-1], side='left') + 1
+    edges = sorted(set([0, *bounds.tolist(), n]))
+    return [(a, b) for a, b in zip(edges, edges[1:]) if a < b]
+
+def _component_batches(topology):
+    batch, size = [], 0
+    for component in strongly_connected_components(topology):
+        if len(component) < MIN_CYCLE_LENGTH:
+            continue
+        batch.append(component)
+        size += len(component)
+        if size >= CYCLE_BATCH_NODES:
+            yield batch
+            batch, size = [], 0
+    if batch:
+        yield batch
+
+def _init_worker(topology, index):
+    _WORKER['G'] = topology
+    _WORKER['index'] = index
+
+def _window_task(start, stop):
+    return compute_window_stats(_WORKER['index'], start, stop)
+
+def _cycle_task(components):
+    cycles = []
+    for component in components:
+        cycles.extend(find_component_cycles(_WORKER['G'], component))
+    return cycles
+
+def _shell_task(compact):
+    return detect_shell_chains(_WORKER['G'], compact=compact)
@@ -0,0 +1,115 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+
+_EMPTY = np.zeros(0, dtype=np.int64)
+
+
+class ResultQuery:
+    """
+    Filtered, paged reads of one run's accounts and rings.
+
+    Accounts are put in output order (score descending, then account id; a run's
+    accounts usually already are, which the sort passes over in linear time), so a
+    minimum score is a prefix found by binary search on the score column. Each
+    pattern and ring has a sorted posting list of account positions, so a
+    pattern / ring filter reads only the accounts that carry it. Rings get the
+    same treatment, ordered by risk score (descending, ties in creation order)
+    with a posting list per pattern type.
+
+    Cursors are positions in that order: a page continues at the first match at
+    or after the cursor, so pages stay stable while a client walks them.
+    """
+
+    def __init__(self, accounts: List[dict], ring_index):
+        self.accounts = sorted(accounts, key=lambda acc: (-acc['suspicion_score'], acc['account_id']))
+        accounts = self.accounts
+        self.ring_index = ring_index
+        self.position = {acc['account_id']: i for i, acc in enumerate(accounts)}
+        # Negated so both columns are ascending for searchsorted
+        self._neg_score = -np.array([acc['suspicion_score'] for acc in accounts], dtype=np.float64)
+        self._pattern_postings = _postings((i, p) for i, acc in enumerate(accounts) for p in acc['detected_patterns'])
+
+        rings = ring_index.rings
+        self.rings = sorted(rings, key=lambda r: -r['risk_score'])   # stable: ties keep creation order
+        self._neg_risk = -np.array([r['risk_score'] for r in self.rings], dtype=np.float64)
+        self._type_postings = _postings((i, r['pattern_type']) for i, r in enumerate(self.rings))
+
+    def ring_members(self, ring_id: str) -> np.ndarray:
+        """Sorted account positions of a ring's members; KeyError for an unknown ring."""
+        ring = self.ring_index.get(ring_id)
+        if ring is None:
+            raise KeyError(ring_id)
+        positions = [self.position[m] for m in ring['member_accounts'] if m in self.position]
+        return np.unique(np.asarray(positions, dtype=np.int64))
+
+    def accounts_page(self, limit: int, cursor: int = 0, min_score: Optional[float] = None,
+                      pattern: Optional[str] = None, ring: Optional[str] = None):
+        """(accounts, next cursor or None, total matches) of one page of matching accounts."""
+        stop = _prefix(self._neg_score, min_score)
+        matches = None
+        if pattern is not None:
+            matches = _below(self._pattern_postings.get(pattern, _EMPTY), stop)
+        if ring is not None:
+            members = _below(self.ring_members(ring), stop)
+            matches = members if matches is None else np.intersect1d(matches, members, assume_unique=True)
+        rows, next_cursor, total = _page(matches, stop, cursor, limit)
+        return [self.accounts[i] for i in rows], next_cursor, total
+
+    def rings_page(self, limit: int, cursor: int = 0, min_risk: Optional[float] = None,
+                   pattern_type: Optional[str] = None):
+        """(rings, next cursor or None, total matches) of one page of matching rings, highest risk first."""
+        stop = _prefix(self._neg_risk, min_risk)
+        matches = None
+        if pattern_type is not None:
+            matches = _below(self._type_postings.get(pattern_type, _EMPTY), stop)
+        rows, next_cursor, total = _page(matches, stop, cursor, limit)
+        return [self.rings[i] for i in rows], next_cursor, total
+
+
+def top_result(result: dict, n: int) -> dict:
+    """
+    The result document cut to its n highest-scoring accounts and n highest-risk
+    rings (rings keep their output order); the summary still counts everything.
+    """
+    rings = result['fraud_rings']
+    if len(rings) > n:
+        keep = sorted(sorted(range(len(rings)), key=lambda i: -rings[i]['risk_score'])[:n])
+        rings = [rings[i] for i in keep]
+    return {
+        "suspicious_accounts": result['suspicious_accounts'][:n],
+        "fraud_rings": rings,
+        "summary": result['summary'],
+    }
+
+
+def _postings(pairs) -> Dict[str, np.ndarray]:
+    lists: Dict[str, list] = {}
+    for i, key in pairs:
+        lists.setdefault(key, []).append(i)
+    # Positions are appended in increasing order, so each list is already sorted
+    return {key: np.asarray(positions, dtype=np.int64) for key, positions in lists.items()}
+
+
+def _prefix(neg_values: np.ndarray, minimum: Optional[float]) -> int:
+    """Length of the prefix with value >= minimum (values sorted descending, stored negated)."""
+    if minimum is None:
+        return len(neg_values)
+    return int(np.searchsorted(neg_values, -minimum, side='right'))
+
+
+def _below(positions: np.ndarray, stop: int) -> np.ndarray:
+    return positions[:np.searchsorted(positions, stop)]
+
+
+def _page(matches: Optional[np.ndarray], stop: int, cursor: int, limit: int):
+    """(positions, next cursor, total) of the page at `cursor`; matches=None means every position below stop."""
+    if matches is None:
+        start = min(max(cursor, 0), stop)
+        end = min(start + limit, stop)
+        rows = range(start, end)
+        return rows, (end if end < stop else None), stop
+    start = int(np.searchsorted(matches, cursor))
+    rows = matches[start:start + limit].tolist()
+    next_cursor = rows[-1] + 1 if start + limit < len(matches) else None
+    return rows, next_cursor, len(matches)
@@ -0,0 +1,59 @@
+from typing import Dict, Iterable, List, Optional
+
+
+class RingIndex:
+    """
+    Fraud rings keyed by ring_id, plus an account -> ring ids index, both filled
+    as rings are created. Lookups of a ring, of an account's rings or of an
+    account's best ring cost O(rings of that account), not a scan of every ring.
+    """
+
+    def __init__(self):
+        self.rings: List[dict] = []             # creation order (the output order)
+        self.by_id: Dict[str, dict] = {}
+        self.by_account: Dict[str, List[str]] = {}
+
+    @classmethod
+    def from_rings(cls, rings: Iterable[dict]) -> "RingIndex":
+        """Index over finished ring dicts (e.g. loaded back from a session snapshot)."""
+        index = cls()
+        for ring in rings:
+            index._insert(ring)
+        return index
+
+    def add(self, pattern_type: str, members: List[str]) -> str:
+        """Creates the next ring (RING_001, RING_002, ...) and returns its id."""
+        rid = f"RING_{len(self.rings) + 1:03d}"
+        self._insert({
+            "ring_id": rid,
+            "member_accounts": members,
+            "pattern_type": pattern_type,
+        })
+        return rid
+
+    def _insert(self, ring):
+        rid = ring['ring_id']
+        self.rings.append(ring)
+        self.by_id[rid] = ring
+        for m in ring['member_accounts']:
+            self.by_account.setdefault(m, []).append(rid)
+
+    def __len__(self):
+        return len(self.rings)
+
+    def __iter__(self):
+        return iter(self.rings)
+
+    def get(self, ring_id: str) -> Optional[dict]:
+        return self.by_id.get(ring_id)
+
+    def rings_of(self, account) -> List[str]:
+        """Ids of the rings the account is a member of, in creation order."""
+        return self.by_account.get(account, [])
+
+    def best_ring(self, account) -> Optional[str]:
+        """The account's highest-risk ring (ties: lowest ring_id); rings must be scored."""
+        rids = self.by_account.get(account)
+        if not rids:
+            return None
+        return min(rids, key=lambda rid: (-self.by_id[rid]['risk_score'], rid))
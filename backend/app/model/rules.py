@@ -0,0 +1,157 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from numbers import Real
+
+logger = logging.getLogger("money_muling_detector")
+
+# Scoring rule file shipped with the app (see RuleSet for the layout)
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scoring_rules.json")
+
+RULES_SCHEMA = 1
+
+# Keys every rule file must define, by section
+RULE_KEYS = {
+    "points": (
+        "cycle", "short_cycle",
+        "fan_in", "fan_in_pass_through", "fan_in_merchant",
+        "fan_out", "fan_out_pass_through", "fan_out_payroll",
+        "shell", "shell_pass_through", "high_velocity",
+        "confirmed_mule", "long_duration",
+    ),
+    "volume": ("min_pattern_points", "log10_multiplier", "max_points"),
+    "flow": (
+        "pass_through_min", "pass_through_max",
+        "merchant_max_ratio", "merchant_min_in",
+        "payroll_min_ratio", "payroll_min_out",
+        "no_inflow_ratio",
+    ),
+    "ring": ("max_weight", "mean_weight"),
+}
+TOP_LEVEL_KEYS = ("long_duration_days", "trust_cap", "score_min", "score_max")
+
+NS_PER_DAY = 24 * 3600 * 10**9
+
+
+class RuleError(ValueError):
+    """Malformed or incompatible scoring rule file."""
+
+
+class RuleSet:
+    """
+    A scoring rule set, compiled from its JSON form:
+
+      {"schema": 1, "version": "...",
+       "points": {pattern points, e.g. "cycle": 50, "long_duration": -30},
+       "volume": {"min_pattern_points", "log10_multiplier", "max_points"},
+       "flow": {pass-through / merchant / payroll flow ratio and amount limits},
+       "ring": {"max_weight", "mean_weight"} (ring risk from its members' scores),
+       "long_duration_days", "trust_cap", "score_min", "score_max"}
+
+    Compiling checks every key and value once and flattens them into attributes
+    (points_cycle, flow_merchant_min_in, long_duration_ns, ...), which
+    ScoreTable reads directly in its vectorized pass. Numbers keep their JSON
+    type, so integer points stay integers in score breakdowns.
+
+    digest (sha256 of the canonical JSON) identifies the rules, so two rule
+    sets can be compared without walking their specs (see same_as).
+    """
+
+    def __init__(self, spec: dict):
+        if not isinstance(spec, dict):
+            raise RuleError("Rule file must be a JSON object")
+        if spec.get("schema") != RULES_SCHEMA:
+            raise RuleError(f"Unsupported rule schema {spec.get('schema')!r} (expected {RULES_SCHEMA})")
+        self.version = str(spec.get("version", ""))
+
+        for section, keys in RULE_KEYS.items():
+            values = spec.get(section)
+            if not isinstance(values, dict):
+                raise RuleError(f"Missing rule section: {section}")
+            unknown = sorted(set(values) - set(keys))
+            if unknown:
+                raise RuleError(f"Unknown {section} rules: {unknown}")
+            for key in keys:
+                setattr(self, f"{section}_{key}", _number(values, key, section))
+        for key in TOP_LEVEL_KEYS:
+            setattr(self, key, _number(spec, key))
+
+        if self.score_min > self.score_max:
+            raise RuleError("score_min is above score_max")
+        self.long_duration_ns = int(self.long_duration_days * NS_PER_DAY)
+        self.spec = spec
+        self.digest = hashlib.sha256(json.dumps(spec, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+    @classmethod
+    def load(cls, path: str) -> "RuleSet":
+        try:
+            with open(path) as f:
+                spec = json.load(f)
+        except OSError as e:
+            raise RuleError(f"Cannot read rule file {path}: {e}")
+        except ValueError as e:
+            raise RuleError(f"Rule file {path} is not valid JSON: {e}")
+        return cls(spec)
+
+    def to_dict(self) -> dict:
+        return self.spec
+
+    def same_as(self, other: "RuleSet") -> bool:
+        return self.version == other.version and self.digest == other.digest
+
+
+class RuleSource:
+    """
+    The rule set in a file, reloaded when the file changes. get() compares the
+    file's mtime and size with the loaded version (one stat call), so it can be
+    asked for every analysis. A file that fails to compile is logged and the
+    last good rule set stays in use.
+    """
+
+    def __init__(self, path: str = DEFAULT_RULES_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._rules = None
+        self.get()
+        if self._rules is None:
+            raise RuleError(f"No valid scoring rules at {path}")
+
+    def get(self) -> RuleSet:
+        try:
+            st = os.stat(self.path)
+            stamp = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            stamp = None
+        with self._lock:
+            if stamp is not None and stamp != self._stamp:
+                try:
+                    self._rules = RuleSet.load(self.path)
+                    logger.info("Loaded scoring rules %s (version %s)", self.path, self._rules.version)
+                except RuleError as e:
+                    logger.error("Keeping previous scoring rules: %s", e)
+                self._stamp = stamp
+            return self._rules
+
+
+_default_rules = None
+
+
+def default_rules() -> RuleSet:
+    """The shipped rule set (loaded once)."""
+    global _default_rules
+    if _default_rules is None:
+        _default_rules = RuleSet.load(DEFAULT_RULES_PATH)
+    return _default_rules
+
+
+def _number(values, key, section=None):
+    name = f"{section}.{key}" if section else key
+    if key not in values:
+        raise RuleError(f"Missing rule: {name}")
+    value = values[key]
+    if isinstance(value, bool) or not isinstance(value, Real):
+        raise RuleError(f"Rule {name} must be a number")
+    return value
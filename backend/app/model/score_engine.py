@@ -0,0 +1,315 @@
+import math
+import numpy as np
+from .rules import RuleSet, default_rules
+
+# Pattern flags, one bit each in ScoreTable.patterns
+PATTERN_BITS = {
+    'in_cycle': 1,
+    'cycle': 2,
+    'cycle_length_3_5': 4,
+    'fan_in': 8,
+    'fan_out': 16,
+    'shell': 32,
+    'high_velocity': 64,
+}
+
+
+class ScoreTable:
+    """
+    Suspicion scores of every account, evaluated rule by rule over account
+    arrays (index order) instead of account by account.
+
+    Inputs are the pattern bits per account (PATTERN_BITS), the in/out totals and
+    the active durations (ns); the points and limits come from a RuleSet (the
+    shipped rule file by default). Each rule adds its points in the same order
+    as the per-account rules did, so the float results are identical. The volume
+    score goes through math.log10: np.log10 can differ from it in the last bit.
+
+    The human-readable breakdown is not stored; breakdown(account) derives it on
+    request from the same arrays.
+    """
+
+    def __init__(self, nodes, patterns, in_amount, out_amount, durations, rules: RuleSet = None):
+        self.nodes = list(nodes)
+        self.patterns = np.asarray(patterns, dtype=np.uint8)
+        self.in_amount = np.asarray(in_amount, dtype=np.float64)
+        self.out_amount = np.asarray(out_amount, dtype=np.float64)
+        self.durations = np.asarray(durations, dtype=np.int64)
+        self.rules = rules or default_rules()
+        self._ids = None
+        self.score = self._evaluate()
+
+    @classmethod
+    def from_index(cls, index, patterns, rules: RuleSet = None):
+        """Table over an AccountIndex (totals and durations) and its accounts' pattern bits."""
+        return cls(index.nodes.tolist(), patterns, index.in_total, index.out_total, index.durations, rules)
+
+    def with_rules(self, rules: RuleSet) -> "ScoreTable":
+        """The same accounts and features scored with other rules (no detector work)."""
+        table = object.__new__(ScoreTable)
+        table.__dict__.update(self.__dict__)
+        table.rules = rules
+        table.score = table._evaluate()
+        return table
+
+    @classmethod
+    def updated(cls, previous: "ScoreTable", index, patterns, rules: RuleSet = None):
+        """
+        Table over an AccountIndex that extends previous's accounts (an append:
+        existing accounts keep their positions, new ones follow). Only accounts
+        that are new or whose pattern bits, totals or duration changed are
+        evaluated; the rest keep previous's scores. Falls back to a full
+        evaluation when the rules differ or the accounts are not a prefix.
+        """
+        table = object.__new__(cls)
+        table.nodes = index.nodes.tolist()
+        table.patterns = np.asarray(patterns, dtype=np.uint8)
+        table.in_amount = np.asarray(index.in_total, dtype=np.float64)
+        table.out_amount = np.asarray(index.out_total, dtype=np.float64)
+        table.durations = np.asarray(index.durations, dtype=np.int64)
+        table.rules = rules or default_rules()
+        table._ids = None
+
+        m = len(previous)
+        if not table.rules.same_as(previous.rules) or table.nodes[:m] != previous.nodes:
+            table.score = table._evaluate()
+            return table
+
+        changed = np.ones(len(table.nodes), dtype=bool)
+        changed[:m] = ((table.patterns[:m] != previous.patterns)
+                       | (table.in_amount[:m] != previous.in_amount)
+                       | (table.out_amount[:m] != previous.out_amount)
+                       | (table.durations[:m] != previous.durations))
+        rows = np.flatnonzero(changed)
+        table.score = np.empty(len(table.nodes))
+        table.score[:m] = previous.score
+        table.score[rows] = table._evaluate(rows)
+        return table
+
+    def _flag(self, name, rows=None):
+        patterns = self.patterns if rows is None else self.patterns[rows]
+        return (patterns & PATTERN_BITS[name]) != 0
+
+    def _terms(self, rows=None):
+        """
+        Every rule's effect as arrays, shared by _evaluate and breakdown_columns:
+        the pattern rules as (reason, mask, points) in the order they add up,
+        the volume scores and the masks of the later rules. With rows (account
+        positions) the arrays cover only those accounts, in that order.
+        """
+        in_cycle = self._flag('in_cycle', rows)
+        fan_in, fan_out = self._flag('fan_in', rows), self._flag('fan_out', rows)
+        shell, high_velocity = self._flag('shell', rows), self._flag('high_velocity', rows)
+        in_amt, out_amt = self.in_amount, self.out_amount
+        durations = self.durations
+        if rows is not None:
+            in_amt, out_amt, durations = in_amt[rows], out_amt[rows], durations[rows]
+        total_vol = in_amt + out_amt
+        r = self.rules
+
+        flow_ratio = np.full(len(in_amt), float(r.flow_no_inflow_ratio))
+        np.divide(out_amt, in_amt, out=flow_ratio, where=in_amt > 0)
+        is_pass_through = (flow_ratio >= r.flow_pass_through_min) & (flow_ratio <= r.flow_pass_through_max)
+        is_merchant_like = (flow_ratio < r.flow_merchant_max_ratio) & (in_amt > r.flow_merchant_min_in)
+        is_payroll_like = (flow_ratio > r.flow_payroll_min_ratio) & (out_amt > r.flow_payroll_min_out)
+
+        pattern_rules = [
+            ("In Cycle", in_cycle, r.points_cycle),
+            ("Short Cycle (3-5 hops)", in_cycle & self._flag('cycle_length_3_5', rows), r.points_short_cycle),
+            ("Fan In (Merchant-like)", fan_in & is_merchant_like, r.points_fan_in_merchant),
+            ("Fan In (Pass-through)", fan_in & ~is_merchant_like & is_pass_through, r.points_fan_in_pass_through),
+            ("Fan In Pattern", fan_in & ~is_merchant_like & ~is_pass_through, r.points_fan_in),
+            ("Fan Out (Payroll-like)", fan_out & is_payroll_like, r.points_fan_out_payroll),
+            ("Fan Out (Pass-through)", fan_out & ~is_payroll_like & is_pass_through, r.points_fan_out_pass_through),
+            ("Fan Out Pattern", fan_out & ~is_payroll_like & ~is_pass_through, r.points_fan_out),
+            ("Shell Chain Member", shell, r.points_shell),
+            ("Shell Pass-through", shell & is_pass_through, r.points_shell_pass_through),
+            ("High Velocity", high_velocity, r.points_high_velocity),
+        ]
+
+        # Pattern points, in rule order (at most one fan in / fan out variant applies)
+        points = np.zeros(len(in_amt))
+        for _, mask, rule_points in pattern_rules:
+            points += np.where(mask, rule_points, 0)
+
+        vol_score = np.zeros(len(in_amt))
+        has_volume = total_vol > 0
+        vol_score[has_volume] = [
+            min(r.volume_max_points, math.log10(v) * r.volume_log10_multiplier)
+            for v in total_vol[has_volume].tolist()
+        ]
+
+        adds_volume = points > r.volume_min_pattern_points
+        mule = is_pass_through & (in_cycle | shell)
+        long_duration = ~in_cycle & ~fan_in & ~fan_out & ~high_velocity & (durations > r.long_duration_ns)
+
+        score = points
+        score[adds_volume] += vol_score[adds_volume]
+        score[mule] += r.points_confirmed_mule
+        score[long_duration] += r.points_long_duration
+
+        return {
+            "pattern_rules": pattern_rules,
+            "total_vol": total_vol,
+            "vol_score": vol_score,
+            "adds_volume": adds_volume,
+            "mule": mule,
+            "long_duration": long_duration,
+            "merchant_cap": is_merchant_like & ~in_cycle & (score > r.trust_cap),
+            "payroll_cap": is_payroll_like & ~in_cycle & (score > r.trust_cap),
+            "uncapped": score,
+        }
+
+    def _evaluate(self, rows=None):
+        """Scores of every account, or of the accounts at positions rows."""
+        r = self.rules
+        terms = self._terms(rows)
+        score = terms["uncapped"].copy()
+        score[terms["merchant_cap"] | terms["payroll_cap"]] = r.trust_cap
+        return np.clip(score, r.score_min, r.score_max)
+
+    @property
+    def ids(self):
+        if self._ids is None:
+            self._ids = {label: i for i, label in enumerate(self.nodes)}
+        return self._ids
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __contains__(self, account):
+        return account in self.ids
+
+    def pattern_names(self, i):
+        """Detected patterns of account i, as in the output (cycle members also count as high_velocity)."""
+        bits = int(self.patterns[i])
+        names = {name for name, bit in PATTERN_BITS.items() if bits & bit and name != 'in_cycle'}
+        if bits & PATTERN_BITS['in_cycle']:
+            names.add('high_velocity')
+        return sorted(names)
+
+    def breakdown(self, account):
+        """The score_breakdown entries of one account: each rule that applied and its points."""
+        r = self.rules
+        i = self.ids[account]
+        bits = int(self.patterns[i])
+        in_amt = float(self.in_amount[i])
+        out_amt = float(self.out_amount[i])
+        total_vol = in_amt + out_amt
+        vol_score = min(r.volume_max_points, math.log10(total_vol) * r.volume_log10_multiplier) if total_vol > 0 else 0
+
+        flow_ratio = out_amt / in_amt if in_amt > 0 else r.flow_no_inflow_ratio
+        is_pass_through = r.flow_pass_through_min <= flow_ratio <= r.flow_pass_through_max
+        is_merchant_like = flow_ratio < r.flow_merchant_max_ratio and in_amt > r.flow_merchant_min_in
+        is_payroll_like = flow_ratio > r.flow_payroll_min_ratio and out_amt > r.flow_payroll_min_out
+        in_cycle = bool(bits & PATTERN_BITS['in_cycle'])
+
+        score = 0
+        breakdown = []
+
+        def add(reason, points):
+            nonlocal score
+            score += points
+            breakdown.append({"reason": reason, "points": points})
+
+        if in_cycle:
+            add("In Cycle", r.points_cycle)
+            if bits & PATTERN_BITS['cycle_length_3_5']:
+                add("Short Cycle (3-5 hops)", r.points_short_cycle)
+
+        if bits & PATTERN_BITS['fan_in']:
+            if is_merchant_like:
+                add("Fan In (Merchant-like)", r.points_fan_in_merchant)
+            elif is_pass_through:
+                add("Fan In (Pass-through)", r.points_fan_in_pass_through)
+            else:
+                add("Fan In Pattern", r.points_fan_in)
+
+        if bits & PATTERN_BITS['fan_out']:
+            if is_payroll_like:
+                add("Fan Out (Payroll-like)", r.points_fan_out_payroll)
+            elif is_pass_through:
+                add("Fan Out (Pass-through)", r.points_fan_out_pass_through)
+            else:
+                add("Fan Out Pattern", r.points_fan_out)
+
+        if bits & PATTERN_BITS['shell']:
+            add("Shell Chain Member", r.points_shell)
+            if is_pass_through:
+                add("Shell Pass-through", r.points_shell_pass_through)
+
+        if bits & PATTERN_BITS['high_velocity']:
+            add("High Velocity", r.points_high_velocity)
+
+        if score > r.volume_min_pattern_points:
+            score += vol_score
+            breakdown.append({"reason": f"High Volume (${total_vol:,.0f})", "points": round(vol_score, 1)})
+
+        if is_pass_through and (in_cycle or bits & PATTERN_BITS['shell']):
+            add("Confirmed Mule Behavior", r.points_confirmed_mule)
+
+        burst = PATTERN_BITS['fan_in'] | PATTERN_BITS['fan_out'] | PATTERN_BITS['high_velocity']
+        if not in_cycle and not bits & burst and self.durations[i] > r.long_duration_ns:
+            add(f"Long Duration (>{r.long_duration_days} days)", r.points_long_duration)
+
+        if is_merchant_like and not in_cycle and score > r.trust_cap:
+            breakdown.append({"reason": "Merchant Trust Cap", "points": -(score - r.trust_cap)})
+            score = r.trust_cap
+        if is_payroll_like and not in_cycle and score > r.trust_cap:
+            breakdown.append({"reason": "Payroll Trust Cap", "points": -(score - r.trust_cap)})
+
+        return breakdown
+
+    def breakdown_columns(self):
+        """
+        The breakdown entries of every account as columns (account index, reason,
+        points), ordered by account index and then rule order: the entries
+        breakdown(account) returns, evaluated rule by rule over the arrays.
+        """
+        r = self.rules
+        terms = self._terms()
+        positions, steps, reasons, points = [], [], [], []
+
+        def add(mask, reason, rule_points):
+            idx = np.flatnonzero(mask)
+            positions.append(idx)
+            steps.append(np.full(len(idx), len(steps)))
+            reasons.append(np.full(len(idx), reason, dtype=object) if isinstance(reason, str) else reason)
+            points.append(np.broadcast_to(np.asarray(rule_points, dtype=np.float64), idx.shape)
+                          if np.ndim(rule_points) == 0 else rule_points)
+
+        for reason, mask, rule_points in terms["pattern_rules"]:
+            add(mask, reason, rule_points)
+
+        volume = np.flatnonzero(terms["adds_volume"])
+        add(terms["adds_volume"],
+            np.array([f"High Volume (${v:,.0f})" for v in terms["total_vol"][volume].tolist()], dtype=object),
+            np.array([round(v, 1) for v in terms["vol_score"][volume].tolist()], dtype=np.float64))
+        add(terms["mule"], "Confirmed Mule Behavior", r.points_confirmed_mule)
+        add(terms["long_duration"], f"Long Duration (>{r.long_duration_days} days)", r.points_long_duration)
+
+        over_cap = -(terms["uncapped"] - r.trust_cap)
+        add(terms["merchant_cap"], "Merchant Trust Cap", over_cap[terms["merchant_cap"]])
+        # Payroll cap only applies when the merchant cap did not already bring the score down
+        payroll_cap = terms["payroll_cap"] & ~terms["merchant_cap"]
+        add(payroll_cap, "Payroll Trust Cap", over_cap[payroll_cap])
+
+        positions = np.concatenate(positions)
+        order = np.lexsort((np.concatenate(steps), positions))
+        return positions[order], np.concatenate(reasons)[order], np.concatenate(points)[order]
+
+    def to_dict(self):
+        """Plain lists plus the rule set, for the session meta file (see from_dict)."""
+        return {
+            "nodes": self.nodes,
+            "patterns": self.patterns.tolist(),
+            "in_amount": self.in_amount.tolist(),
+            "out_amount": self.out_amount.tolist(),
+            "durations": self.durations.tolist(),
+            "rules": self.rules.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["nodes"], data["patterns"], data["in_amount"], data["out_amount"], data["durations"],
+                   RuleSet(data["rules"]))
@@ -1,246 +1,217 @@
 from .cycle_detector import detect_cycles
 from .fan_detector import detect_fan_patterns, detect_high_velocity, calculate_fan_counts
 from .shell_detector import detect_shell_chains
+from .account_index import get_account_index
+from .ring_index import RingIndex
+from .score_engine import ScoreTable, PATTERN_BITS
+from .parallel import run_detectors_parallel
 import networkx as nx
-import math
-from datetime import timedelta
+import numpy as np
 
-def analyze_graph(G: nx.DiGraph, df):
+def run_detectors(G: nx.DiGraph, index, df=None, progress=None, shell_compact=False):
     """
-    Orchestrates detection and scoring.
+    Runs every detector serially and returns their results keyed by name.
+    progress(stage) is called as each detector starts.
+    shell_compact reports one ring per shell component (see detect_shell_chains).
     """
+    progress = progress or _no_progress
 
-    # 1. Detect Patterns
+    progress('cycles')
     cycles = detect_cycles(G)
-    fan_in_nodes, fan_out_nodes = detect_fan_patterns(G)
-    fan_in_counts, fan_out_counts, fan_in_amounts, fan_out_amounts = calculate_fan_counts(G)
-    high_velocity = detect_high_velocity(G)
-    shell_chains = detect_shell_chains(G, df)
-
-    # 2. Build Account Metadata
-    account_info = {
-        n: {
-            'patterns': set(),
-            'in_cycle': False,
-            'rings': []
-        }
-        for n in G.nodes()
+
+    progress('fan_patterns')
+    fan_in_nodes, fan_out_nodes = detect_fan_patterns(G, index)
+    fan_in_counts, fan_out_counts, fan_in_amounts, fan_out_amounts = calculate_fan_counts(G, index)
+
+    progress('high_velocity')
+    high_velocity = detect_high_velocity(G, index)
+
+    progress('shell_chains')
+    shell_chains = detect_shell_chains(G, compact=shell_compact)
+
+    return {
+        'cycles': cycles,
+        'fan_in_nodes': fan_in_nodes,
+        'fan_out_nodes': fan_out_nodes,
+        'fan_in_counts': fan_in_counts,
+        'fan_out_counts': fan_out_counts,
+        'fan_in_amounts': fan_in_amounts,
+        'fan_out_amounts': fan_out_amounts,
+        'high_velocity': high_velocity,
+        'shell_chains': shell_chains,
     }
 
-    all_rings = []
+def _no_progress(stage):
+    pass
 
-    def next_ring_id():
-        return f"RING_{len(all_rings) + 1:03d}"
+def analyze_graph(G: nx.DiGraph, df, workers=None, progress=None, shell_compact=False, rules=None):
+    """
+    Orchestrates detection and scoring.
+    rules: the RuleSet to score with (default: the shipped rule file).
+    workers > 1 runs the detectors on a process pool (same output as serial).
+    progress(stage), if given, is called as each stage starts.
+    """
+    progress = progress or _no_progress
 
-    # -------------------- CYCLES --------------------
-    for cycle in cycles:
-        rid = next_ring_id()
+    # 0. Per-account transaction index, shared by the detectors and the scorer
+    progress('index')
+    index = get_account_index(G)
 
-        ring_data = {
-            "ring_id": rid,
-            "member_accounts": list(cycle),
-            "pattern_type": "cycle"
-        }
-        all_rings.append(ring_data)
+    # 1. Detect Patterns
+    if workers and workers > 1:
+        progress('detectors')
+        detections = run_detectors_parallel(G, index, workers, shell_compact)
+    else:
+        detections = run_detectors(G, index, df, progress, shell_compact)
 
-        for node in cycle:
-            account_info[node]['in_cycle'] = True
+    return assemble_results(G, index, detections, progress, rules)
+
+def assemble_results(G: nx.DiGraph, index, detections, progress=None, rules=None, previous=None):
+    """
+    Builds rings from the detector results and scores every account (see
+    ScoreTable). previous, the ScoreTable of the run G extends, limits scoring
+    to the accounts whose features changed (ScoreTable.updated). The detections and the score table are kept in
+    G.graph['analysis'] so later appends can build on them and the account
+    endpoint can explain a score.
+    """
+    progress = progress or _no_progress
+
+    cycles = detections['cycles']
+    fan_in_nodes = detections['fan_in_nodes']
+    fan_out_nodes = detections['fan_out_nodes']
+    fan_in_counts = detections['fan_in_counts']
+    fan_out_counts = detections['fan_out_counts']
+    high_velocity = detections['high_velocity']
+    shell_chains = detections['shell_chains']
+
+    # 2. Build Account Metadata: pattern bits per account (index order)
+    progress('rings')
+    ids = index.ids
+    patterns = np.zeros(len(index), dtype=np.uint8)
+    IN_CYCLE = PATTERN_BITS['in_cycle']
+    STRUCTURAL = (PATTERN_BITS['cycle'] | PATTERN_BITS['cycle_length_3_5'] | PATTERN_BITS['fan_in']
+                  | PATTERN_BITS['fan_out'] | PATTERN_BITS['shell'])
+
+    # Rings by id, and account -> ring ids, filled as rings are created
+    ring_index = RingIndex()
 
-            if 3 <= len(cycle) <= 5:
-                account_info[node]['patterns'].add('cycle_length_3_5')
-            else:
-                account_info[node]['patterns'].add('cycle')
+    # -------------------- CYCLES --------------------
+    for cycle in cycles:
+        ring_index.add("cycle", list(cycle))
 
-            account_info[node]['rings'].append(rid)
+        bit = PATTERN_BITS['cycle_length_3_5'] if 3 <= len(cycle) <= 5 else PATTERN_BITS['cycle']
+        for node in cycle:
+            patterns[ids[node]] |= IN_CYCLE | bit
 
     # -------------------- FAN IN --------------------
     for node in fan_in_nodes:
-        account_info[node]['patterns'].add('fan_in')
+        i = ids[node]
+        patterns[i] |= PATTERN_BITS['fan_in']
 
-        if not account_info[node]['in_cycle']:
+        if not patterns[i] & IN_CYCLE:
             members = [node] + sorted(list(G.predecessors(node)))
-            rid = next_ring_id()
-
-            all_rings.append({
-                "ring_id": rid,
-                "member_accounts": members,
-                "pattern_type": "fan_in"
-            })
-
-            for m in members:
-                account_info[m]['rings'].append(rid)
+            ring_index.add("fan_in", members)
 
     # -------------------- FAN OUT --------------------
     for node in fan_out_nodes:
-        account_info[node]['patterns'].add('fan_out')
+        i = ids[node]
+        patterns[i] |= PATTERN_BITS['fan_out']
 
-        if not account_info[node]['in_cycle']:
+        if not patterns[i] & IN_CYCLE:
             members = [node] + sorted(list(G.successors(node)))
-            rid = next_ring_id()
-
-            all_rings.append({
-                "ring_id": rid,
-                "member_accounts": members,
-                "pattern_type": "fan_out"
-            })
-
-            for m in members:
-                account_info[m]['rings'].append(rid)
+            ring_index.add("fan_out", members)
 
     # -------------------- SHELL CHAINS --------------------
     for chain in shell_chains:
-        is_overlapping = any(account_info[m]['in_cycle'] for m in chain['members'])
+        member_ids = [ids[m] for m in chain['members']]
+        is_overlapping = bool((patterns[member_ids] & IN_CYCLE).any())
 
         if not is_overlapping:
-            rid = next_ring_id()
-
-            all_rings.append({
-                "ring_id": rid,
-                "member_accounts": chain['members'],
-                "pattern_type": "shell_chain"
-            })
-
-            for m in chain['members']:
-                account_info[m]['patterns'].add('shell')
-                account_info[m]['rings'].append(rid)
+            ring_index.add("shell_chain", chain['members'])
+            patterns[member_ids] |= PATTERN_BITS['shell']
 
     # -------------------- HIGH VELOCITY --------------------
     for node in high_velocity:
-        account_info[node]['patterns'].add('high_velocity')
-        
+        i = ids[node]
+        patterns[i] |= PATTERN_BITS['high_velocity']
+
         # Only create a high_velocity ring if the node is NOT involved in any other STRUCTURAL ring pattern
         # checking 'rings' list might be insufficient if ring creation failed for some reason
         # so we check if they have any of the structural patterns.
-        existing_patterns = account_info[node]['patterns']
-        has_structural_ring = any(p in existing_patterns for p in ['cycle', 'cycle_length_3_5', 'fan_in', 'fan_out', 'shell'])
-        
-        if not has_structural_ring:
-            rid = next_ring_id()
-            all_rings.append({
-                "ring_id": rid,
-                "member_accounts": [node],
-                "pattern_type": "high_velocity"
-            })
-            account_info[node]['rings'].append(rid)
+        if not patterns[i] & STRUCTURAL:
+            ring_index.add("high_velocity", [node])
 
     # -------------------- SCORING --------------------
-    scores = {}
-    scores_breakdown = {}
-
-    node_durations = {}
-    for node in G.nodes():
-        timestamps = []
-
-        for p in G.predecessors(node):
-            for t in G[p][node]['transactions']:
-                timestamps.append(t['timestamp'])
+    progress('scoring')
+    if previous is not None:
+        table = ScoreTable.updated(previous, index, patterns, rules)
+    else:
+        table = ScoreTable.from_index(index, patterns, rules)
+    scores = dict(zip(table.nodes, table.score.tolist()))
 
-        for s in G.successors(node):
-            for t in G[node][s]['transactions']:
-                timestamps.append(t['timestamp'])
-
-        spread = max(timestamps) - min(timestamps) if timestamps else timedelta(0)
-        node_durations[node] = spread
+    # -------------------- RING SCORING --------------------
+    _score_rings(ring_index, scores, table.rules)
 
+    # -------------------- FINAL OUTPUT --------------------
+    # Include ALL accounts, even with score 0. score_breakdown is left out:
+    # ScoreTable.breakdown produces it for the accounts that are looked at.
+    pattern_names = {}
     suspicious_list = []
-
     for node in G.nodes():
-        score = 0
-        breakdown = []
-
-        pats = account_info[node]['patterns']
-        in_cycle = account_info[node]['in_cycle']
-
-        # Volume
-        in_amt = fan_in_amounts.get(node, 0)
-        out_amt = fan_out_amounts.get(node, 0)
-        total_vol = in_amt + out_amt
-
-        vol_score = min(20, math.log10(total_vol) * 2) if total_vol > 0 else 0
-
-        flow_ratio = out_amt / in_amt if in_amt > 0 else 999.0
-
-        is_pass_through = 0.9 <= flow_ratio <= 1.1
-        is_merchant_like = flow_ratio < 0.1 and in_amt > 1000
-        is_payroll_like = flow_ratio > 10.0 and out_amt > 1000
-
-        # --- Pattern Scores ---
-
-        if in_cycle:
-            score += 50
-            breakdown.append({"reason": "In Cycle", "points": 50})
-
-            if 'cycle_length_3_5' in pats:
-                score += 15
-                breakdown.append({"reason": "Short Cycle (3-5 hops)", "points": 15})
-
-        if 'fan_in' in pats:
-            if is_merchant_like:
-                score += 5
-                breakdown.append({"reason": "Fan In (Merchant-like)", "points": 5})
-            elif is_pass_through:
-                score += 40
-                breakdown.append({"reason": "Fan In (Pass-through)", "points": 40})
-            else:
-                score += 25
-                breakdown.append({"reason": "Fan In Pattern", "points": 25})
-
-        if 'fan_out' in pats:
-            if is_payroll_like:
-                score += 5
-                breakdown.append({"reason": "Fan Out (Payroll-like)", "points": 5})
-            elif is_pass_through:
-                score += 40
-                breakdown.append({"reason": "Fan Out (Pass-through)", "points": 40})
-            else:
-                score += 25
-                breakdown.append({"reason": "Fan Out Pattern", "points": 25})
-
-        if 'shell' in pats:
-            score += 30
-            breakdown.append({"reason": "Shell Chain Member", "points": 30})
-
-            if is_pass_through:
-                score += 10
-                breakdown.append({"reason": "Shell Pass-through", "points": 10})
-
-        if 'high_velocity' in pats:
-            score += 15
-            breakdown.append({"reason": "High Velocity", "points": 15})
-
-        if score > 20:
-            score += vol_score
-            breakdown.append({
-                "reason": f"High Volume (${total_vol:,.0f})",
-                "points": round(vol_score, 1)
-            })
-
-        if is_pass_through and (in_cycle or 'shell' in pats):
-            score += 10
-            breakdown.append({"reason": "Confirmed Mule Behavior", "points": 10})
-
-        if (not in_cycle) and ('fan_in' not in pats and 'fan_out' not in pats and 'high_velocity' not in pats):
-            if node_durations[node] > timedelta(days=7):
-                score -= 30
-                breakdown.append({"reason": "Long Duration (>7 days)", "points": -30})
-
-        if is_merchant_like and not in_cycle and score > 40:
-            breakdown.append({"reason": "Merchant Trust Cap", "points": -(score - 40)})
-            score = 40
-
-        if is_payroll_like and not in_cycle and score > 40:
-            breakdown.append({"reason": "Payroll Trust Cap", "points": -(score - 40)})
-            score = 40
-
-        score = max(0, min(100, score))
-
-        scores[node] = score
-        scores_breakdown[node] = breakdown
+        i = ids[node]
+        bits = int(patterns[i])
+        if bits not in pattern_names:
+            pattern_names[bits] = table.pattern_names(i)
+
+        suspicious_list.append({
+            "account_id": node,
+            "suspicion_score": float(f"{scores[node]:.2f}"),
+            "detected_patterns": list(pattern_names[bits]),
+            "ring_id": ring_index.best_ring(node),
+            "total_transactions": G.degree(node),
+            "fan_in": len(list(G.predecessors(node))),
+            "fan_in_count": fan_in_counts.get(node, 0),
+            "fan_out_count": fan_out_counts.get(node, 0)
+        })
 
-    # -------------------- RING SCORING --------------------
-    final_fraud_rings = []
+    suspicious_list.sort(key=lambda x: (-x['suspicion_score'], x['account_id']))
+
+    G.graph['analysis'] = {
+        'detections': detections,
+        'score_table': table,
+    }
+
+    # -------------------- FILTERING REMOVED --------------------
+    # We now return ALL accounts to the frontend for the dashboard.
+    # The JSON download endpoint will handle filtering for "suspicious only".
+    
+    return suspicious_list, ring_index.rings
 
-    for r in all_rings:
+def rescore_results(accounts, rings, table):
+    """
+    Output of an earlier analysis scored again from its ScoreTable (e.g.
+    table.with_rules(new_rules)): account scores, ring risk scores and best rings
+    are recomputed; detections, rings and patterns stay as they were.
+    Returns (accounts, rings) like analyze_graph.
+    """
+    scores = dict(zip(table.nodes, table.score.tolist()))
+    ring_index = RingIndex.from_rings(dict(r) for r in rings)
+    _score_rings(ring_index, scores, table.rules)
+
+    rescored = []
+    for acc in accounts:
+        node = acc['account_id']
+        rescored.append({
+            **acc,
+            "suspicion_score": float(f"{scores[node]:.2f}"),
+            "ring_id": ring_index.best_ring(node),
+        })
+    rescored.sort(key=lambda x: (-x['suspicion_score'], x['account_id']))
+    return rescored, ring_index.rings
+
+def _score_rings(ring_index, scores, rules):
+    """Sets each ring's risk_score from its members' scores (weighted max and mean, see RuleSet)."""
+    for r in ring_index:
         members = r['member_accounts']
         member_scores = [scores[m] for m in members]
 
@@ -249,50 +220,6 @@ def analyze_graph(G: nx.DiGraph, df):
         else:
             max_s = max(member_scores)
             avg_s = sum(member_scores) / len(member_scores)
-            risk_score = (max_s * 0.6) + (avg_s * 0.4)
+            risk_score = (max_s * rules.ring_max_weight) + (avg_s * rules.ring_mean_weight)
 
         r['risk_score'] = round(risk_score, 2)
-        final_fraud_rings.append(r)
-
-    # -------------------- FINAL OUTPUT --------------------
-    for node, score in scores.items():
-        # Include ALL accounts, even with score 0
-        if True:
-
-            my_rings = account_info[node]['rings']
-
-            candidate_rings = [
-                r for r in final_fraud_rings if r['ring_id'] in my_rings
-            ]
-
-            if candidate_rings:
-                candidate_rings.sort(key=lambda x: (-x['risk_score'], x['ring_id']))
-                best_rid = candidate_rings[0]['ring_id']
-            else:
-                best_rid = None
-
-            # ✅ IMPORTANT CHANGE: Add high_velocity to cycle accounts
-            patterns = set(account_info[node]['patterns'])
-            if account_info[node]['in_cycle']:
-                patterns.add('high_velocity')
-
-            suspicious_list.append({
-                "account_id": node,
-                "suspicion_score": float(f"{score:.2f}"),
-                "score_breakdown": scores_breakdown[node],
-                "detected_patterns": sorted(list(patterns)),
-                "ring_id": best_rid,
-                "total_transactions": G.degree(node),
-                "fan_in": len(list(G.predecessors(node))),
-                "fan_in_count": fan_in_counts.get(node, 0),
-                "fan_out_count": fan_out_counts.get(node, 0)
-            })
-
-    suspicious_list.sort(key=lambda x: (-x['suspicion_score'], x['account_id']))
-
-    # -------------------- FILTERING REMOVED --------------------
-    # We now return ALL accounts to the frontend for the dashboard.
-    # The JSON download endpoint will handle filtering for "suspicious only".
-    
-    return suspicious_list, final_fraud_rings
-
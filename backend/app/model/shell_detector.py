@@ -1,120 +1,375 @@
 import networkx as nx
+from collections import Counter
 
-def detect_shell_chains(G: nx.DiGraph, df_tx):
+# Accounts with at most this many counterparties (in + out edges) can be shell intermediates
+SHELL_MAX_DEGREE = 3
+
+# Cap on (entry, exit) combinations emitted per chain in expanded mode (None: no cap)
+MAX_ENDPOINT_PAIRS = None
+
+# Maximal paths walked per shell component. Branches multiply paths (a row of
+# k diamonds has 2^k), so a component with more is split into its non-branching
+# runs instead: linear, but it can miss accounts of chains around its loops.
+MAX_COMPONENT_PATHS = 256
+
+def detect_shell_chains(G: nx.DiGraph, compact=False, max_degree=SHELL_MAX_DEGREE, max_pairs=MAX_ENDPOINT_PAIRS):
     """
     Detects shell chains: Directed simple paths A -> B -> C -> ... -> Z
     where length >= 3 (edges), so at least 4 nodes.
     And all INTERMEDIATE nodes (B, C, ...) have total_degree <= 3.
+
+    Each weakly connected component of the shell candidates (degree <=
+    max_degree) is walked along its maximal paths: simple paths that cannot be
+    extended at either end, continuing through branch points. A component with
+    more than MAX_COMPONENT_PATHS of them is split into its maximal
+    non-branching runs instead. Money can enter or leave a path at any of its
+    accounts: the outside predecessors of a path account are entries there, its
+    outside successors exits. A path that no ring enters at its first account
+    starts at that account (likewise for exits at its last one). An entry and a
+    later exit with at least two path accounts between them form a ring, which
+    is a shell chain of the original definition; together the rings of the
+    maximal paths cover every account that lies on any such chain.
+
+    Output:
+      - expanded: one ring per (entry, exit) pair, at most max_pairs per path
+        (None: every pair); rings repeated across paths are reported once
+      - compact: one ring per component (per run when it was split), members =
+        entries + shell accounts + exits, found without listing the pairs
+    Each ring is {"members", "type", "path"}, path being its shell accounts.
+    Rings are ordered by length, then first member (ties by path, then members).
+    """
+    candidates = {n for n, d in G.degree() if d <= max_degree}
+    chains = _chains_in(G, candidates, candidates, compact, max_pairs)
+    _sort_chains(chains)
+    return chains
+
+def update_shell_chains(G: nx.DiGraph, chains, new_edges, compact=False, max_degree=SHELL_MAX_DEGREE,
+                        max_pairs=MAX_ENDPOINT_PAIRS):
+    """
+    Shell chains of G after new_edges were added to it, given the chains found
+    before. Only the candidate components within reach of a new edge's endpoints
+    (before or after the change) can differ; their chains are found again and
+    every other chain is kept. Same result as detect_shell_chains(G).
+    """
+    new_edges = [(u, v) for u, v in new_edges]
+    added = set(new_edges)
+    added_degree = Counter()
+    for u, v in new_edges:
+        added_degree[u] += 1
+        added_degree[v] += 1
+
+    def is_candidate(n):
+        return G.degree(n) <= max_degree
+
+    def was_candidate(n):
+        return G.degree(n) - added_degree[n] <= max_degree
+
+    changed = set(added_degree)
+    seeds = set()
+    for n in changed:
+        seeds.add(n)
+        seeds.update(G.predecessors(n))
+        seeds.update(G.successors(n))
+
+    # Union of the candidate components (old and new) around the change
+    region = {n for n in seeds if is_candidate(n) or was_candidate(n)}
+    frontier = list(region)
+    while frontier:
+        n = frontier.pop()
+        now, before = is_candidate(n), was_candidate(n)
+        for a, b in [(p, n) for p in G.predecessors(n)] + [(n, s) for s in G.successors(n)]:
+            m = a if b == n else b
+            if m in region:
+                continue
+            if (now and is_candidate(m)) or (before and was_candidate(m) and (a, b) not in added):
+                region.add(m)
+                frontier.append(m)
+
+    kept = [c for c in chains if region.isdisjoint(c["path"])]
+    candidates = {n for n in region if is_candidate(n)}
+    fresh = _chains_in(G, candidates, candidates, compact, max_pairs)
+
+    updated = kept + fresh
+    _sort_chains(updated)
+    return updated
+
+def _sort_chains(chains):
+    # Ties of _chain_order by content, so an update orders them as a full detection does
+    chains.sort(key=lambda c: (c["path"], c["members"]))
+    chains.sort(key=_chain_order)
+
+def _chain_order(chain):
+    return (len(chain["members"]), chain["members"][0])
+
+def shell_adjacency(G, candidates, region=None):
     """
-    shell_chains = []
-    
-    # Pre-calculate total degrees (in + out)
-    # Note: G.degree() is in_degree + out_degree for DiGraph
-    degrees = dict(G.degree())
-    
-    # Identify shell candidates (degree <= 3)
-    shell_candidates = {n for n, d in degrees.items() if d <= 3}
-    
-    if not shell_candidates:
-        return []
-        
-    # Build subgraph of ONLY shell candidates
-    G_shell = G.subgraph(shell_candidates).copy()
-    
-    # Find all path fragments in G_shell
-    # Since max degree is 3, these components are small (lines or simple cycles)
-    # We want simple paths.
-    
-    # Helper to find paths in G_shell
-    # We can iterate over all nodes in G_shell and run DFS
-    # But optimal way for sparse graph:
-    # Find weakly connected components, then explore.
-    
-    # Even simpler: Just standard DFS from each node in G_shell, 
-    # but since it's a subgraph of low degree nodes, depths are small.
-    # We store paths as list of nodes.
-    
-    partial_paths = []
-    visited_paths = set()
-    
-    nodes_shell = sorted(list(G_shell.nodes()))
-    
-    for start_node in nodes_shell:
-        stack = [(start_node, [start_node])]
-        while stack:
-            curr, path = stack.pop()
-            
-            # Save this path if it has length >= 1 (at least 2 nodes)
-            # This represents a chain of shell nodes: S1 -> ... -> Sk
-            if len(path) >= 2:
-                path_tuple = tuple(path)
-                if path_tuple not in visited_paths:
-                    visited_paths.add(path_tuple)
-                    partial_paths.append(path)
-            
-            # Continue DFS
-            neighbors = sorted(list(G_shell.successors(curr)))
-            for nbr in neighbors:
-                if nbr not in path: # Simple path
-                    stack.append((nbr, path + [nbr]))
-
-    # Now we have all valid chains of shell nodes.
-    # A shell chain in the full definition is: Pre -> S_chain -> Post
-    # Length of full path = 1 + (len(S_chain)-1) + 1 = len(S_chain) + 1.
-    # Requirement: Length >= 3 => len(S_chain)+1 >= 3 => len(S_chain) >= 2 edges => 3 nodes?
-    # Wait. 
-    # Path A -> S1 -> S2 -> B. Intermediates S1, S2.
-    # Edges: (A,S1), (S1,S2), (S2,B). Total 3 edges.
-    # Here S_chain is [S1, S2]. Length of S_chain is 1 edge. 
-    # So if S_chain has length 1 (2 nodes), total path has length 3.
-    # So we need S_chain with >= 2 nodes.
-    
-    # What if A -> S1 -> B ? Intermed S1. Length 2. Not enough.
-    # So yes, we need at least 2 Shell Nodes connected.
-    
-    final_rings = []
-    
-    for path in partial_paths:
-        # path is [S1, S2, ..., Sk]
-        s_start = path[0]
-        s_end = path[-1]
-        
-        # Check for Predecessors of s_start in G (not in path)
-        preds = sorted([p for p in G.predecessors(s_start) if p not in path])
-        # Check for Successors of s_end in G (not in path)
-        succs = sorted([s for s in G.successors(s_end) if s not in path])
-        
-        # Determine strict extensions
-        # If we have valid preds and succs, we can form at least one chain
-        if preds and succs:
-            # We found a valid shell chain structure.
-            # Create a ring/pattern for this.
-            # "Each unique path found ... group all accounts in that path"
-            # To avoid combinatorial explosion (A->S...->B, C->S...->D),
-            # we can report one ring per core shell-chain?
-            # Or iterate all combinations?
-            # Prompt: "Each unique path found can contribute... For ring creation: group all accounts in that path"
-            
-            # Let's emit one ring for each valid (Pre, Post) pair.
-            for p in preds:
-                for s in succs:
-                    if p != s: # Simple path
-                         full_path = [p] + path + [s]
-                         # Check length explicitly
-                         # Edges = len(full_path) - 1. 
-                         # Since len(path)>=2, full_path has >= 4 nodes. Edges >= 3.
-                         
-                         final_rings.append({
-                             "members": full_path,
-                             "type": "shell_chain"
-                         })
-    
-    # Deduplicate based on member sets or exact paths?
-    # "Each unique path found ... unique canonical cycle is one fraud ring"
-    # For shell chains, maybe similar?
-    # I'll return list of paths (list of nodes).
-    
-    # Sort for determinism
-    final_rings.sort(key=lambda x: (len(x["members"]), x["members"][0]))
-    
-    return final_rings
+    Degree-filtered view of G for shell detection: sorted shell successors of
+    every node in `region` (default: all candidates) and their shell in-degrees,
+    counting only edges between candidates (no self-loops). Topology only, built
+    from G's adjacency without copying nodes, edges or their transaction lists.
+    """
+    succ = {}
+    indeg = Counter()
+    for n in candidates if region is None else region:
+        succ[n] = sorted(v for v in G.successors(n) if v in candidates and v != n)
+        for v in succ[n]:
+            indeg[v] += 1
+    return succ, indeg
+
+def _chains_in(G, candidates, region, compact, max_pairs):
+    """Shell rings of the chains whose nodes lie in `region` (whole candidate components)."""
+    succ, indeg = shell_adjacency(G, candidates, region)
+
+    rings = []
+    seen = set()
+    for component in _components(succ, indeg):
+        paths = _maximal_paths(succ, indeg, component, MAX_COMPONENT_PATHS)
+        walked = paths is not None
+        if not walked:
+            paths = _runs(succ, indeg, component)
+
+        if compact:
+            covers = [_chain_cover(G, path) for path in paths]
+            # One ring for the component, or per run when it has too many paths
+            groups = [covers] if walked else [[cover] for cover in covers]
+            for group in groups:
+                ring = _merged_ring(group)
+                if ring is not None:
+                    rings.append(ring)
+            continue
+
+        for path in paths:
+            for ring in _chain_rings(G, path, max_pairs):
+                key = tuple(ring["members"])
+                if key not in seen:
+                    seen.add(key)
+                    rings.append(ring)
+    return rings
+
+def _merged_ring(covers):
+    """One ring from chain covers: entries, then the chain accounts, then exits."""
+    chain = list(dict.fromkeys(n for _, covered, _ in covers for n in covered))
+    if not chain:
+        return None
+    on_chain = set(chain)
+    heads = [p for p in dict.fromkeys(p for entries, _, _ in covers for p in entries) if p not in on_chain]
+    tails = [s for s in dict.fromkeys(s for _, _, exits in covers for s in exits)
+             if s not in on_chain and s not in heads]
+    return {"members": heads + chain + tails, "type": "shell_chain", "path": chain}
+
+def _components(succ, indeg):
+    """Weakly connected components of the shell adjacency, as sorted node lists."""
+    preds = {n: [] for n in succ if indeg[n]}
+    for n, vs in succ.items():
+        for v in vs:
+            preds[v].append(n)
+    seen = set()
+    for start in sorted(succ):
+        if start in seen:
+            continue
+        seen.add(start)
+        component, frontier = [start], [start]
+        while frontier:
+            n = frontier.pop()
+            for m in succ[n] + preds.get(n, []):
+                if m not in seen:
+                    seen.add(m)
+                    component.append(m)
+                    frontier.append(m)
+        yield sorted(component)
+
+def _runs(succ, indeg, component):
+    """
+    Maximal non-branching runs of a component: runs of candidates that only pass
+    money along (one shell predecessor, one shell successor), between accounts
+    where the component branches, starts or stops. A loop back to a branch
+    account is also walked ending at it; loops of pass-through accounts only
+    are opened at their smallest account.
+    """
+    def passes_through(n):
+        return indeg[n] == 1 and len(succ[n]) == 1
+
+    runs = []
+    visited = set()
+    for start in component:
+        if passes_through(start):
+            continue
+        visited.add(start)
+        for nxt in succ[start]:
+            path = [start]
+            while True:
+                path.append(nxt)
+                visited.add(nxt)
+                if not passes_through(nxt) or succ[nxt][0] == start:
+                    break
+                nxt = succ[nxt][0]
+            runs.append(path)
+            if passes_through(path[-1]) and succ[path[-1]][0] == start:
+                # A loop back to the branch account: also walk it ending there
+                runs.append(path[1:] + [start])
+
+    for start in component:
+        if start in visited:
+            continue
+        path = [start]
+        visited.add(start)
+        nxt = succ[start][0]
+        while nxt != start:
+            path.append(nxt)
+            visited.add(nxt)
+            nxt = succ[nxt][0]
+        runs.append(path)
+    return runs
+
+def _maximal_paths(succ, indeg, component, limit):
+    """
+    Simple paths of a component that cannot be extended at either end, or None
+    when walking them takes more than `limit` paths. A path can only start at
+    an account whose shell predecessors it can come back to, so the walks start
+    at accounts without a shell predecessor and at loop accounts whose
+    predecessors all lie in their own strongly connected component.
+    """
+    component_of = _scc_ids(succ, component)
+    preds = {n: [] for n in component}
+    for n in component:
+        for v in succ[n]:
+            preds[v].append(n)
+
+    paths = []
+    walked = 0
+    for start in component:
+        if any(component_of[p] != component_of[start] for p in preds[start]):
+            continue
+        for path in _paths_from(succ, start):
+            walked += 1
+            if walked > limit:
+                return None
+            on_path = set(path)
+            if all(p in on_path for p in preds[start]):
+                paths.append(path)
+    return paths
+
+def _scc_ids(succ, nodes):
+    """Strongly connected component id of each node (iterative Tarjan over succ)."""
+    index, low, ids = {}, {}, {}
+    stack, on_stack = [], set()
+    for root in nodes:
+        if root in index:
+            continue
+        work = [(root, iter(succ[root]))]
+        index[root] = low[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            n, children = work[-1]
+            for v in children:
+                if v not in index:
+                    index[v] = low[v] = len(index)
+                    stack.append(v)
+                    on_stack.add(v)
+                    work.append((v, iter(succ[v])))
+                    break
+                if v in on_stack:
+                    low[n] = min(low[n], index[v])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[n])
+                if low[n] == index[n]:
+                    while True:
+                        v = stack.pop()
+                        on_stack.discard(v)
+                        ids[v] = n
+                        if v == n:
+                            break
+    return ids
+
+def _paths_from(succ, start):
+    """
+    Simple paths from start that cannot be extended at their end. Walks one
+    shared path with backtracking, so a run without branches is followed in
+    linear time.
+    """
+    path = [start]
+    on_path = {start}
+    # Per path node: its remaining successors, and whether the path went on from it
+    stack = [[iter(succ[start]), False]]
+    while stack:
+        frame = stack[-1]
+        for v in frame[0]:
+            if v not in on_path:
+                frame[1] = True
+                path.append(v)
+                on_path.add(v)
+                stack.append([iter(succ[v]), False])
+                break
+        else:
+            if not frame[1] and len(path) >= 2:
+                yield list(path)
+            stack.pop()
+            on_path.discard(path.pop())
+
+def _chain_anchors(G, path):
+    """Entries and exits of a chain as (position on the chain, account), in chain order."""
+    on_path = set(path)
+    entries = [(k, p) for k, n in enumerate(path) for p in sorted(G.predecessors(n)) if p not in on_path]
+    exits = [(k, s) for k, n in enumerate(path) for s in sorted(G.successors(n)) if s not in on_path]
+
+    # Without a ring entering at the first (leaving at the last) account, the chain starts (ends) there
+    last = len(path) - 1
+    enters = any(j > 0 and p != s for i, p in entries if i == 0 for j, s in exits)
+    leaves = any(i < last and p != s for j, s in exits if j == last for i, p in entries)
+    if not enters:
+        entries.insert(0, (1, path[0]))
+    if not leaves:
+        exits.append((last - 1, path[-1]))
+    return entries, exits
+
+def _chain_rings(G, path, max_pairs):
+    """Entry -> chain -> exit rings of one chain (see detect_shell_chains)."""
+    entries, exits = _chain_anchors(G, path)
+    # At least 2 chain accounts between entry and exit: length >= 3 edges
+    pairs = [(i, p, j, s) for i, p in entries for j, s in exits if j > i and p != s]
+    return [
+        {"members": [p] + path[i:j + 1] + [s], "type": "shell_chain", "path": path[i:j + 1]}
+        for i, p, j, s in pairs[:max_pairs]
+    ]
+
+def _chain_cover(G, path):
+    """
+    Accounts on the rings of one chain, without listing the rings: entries and
+    exits that are part of a ring, and the chain accounts between them. Each
+    entry is paired with its farthest exit (another account), which is linear in
+    the chain where listing every pair is quadratic.
+    """
+    entries, exits = _chain_anchors(G, path)
+
+    def farthest(anchors, pick):
+        # Best anchor, and the best one for another account than the best one's
+        best = pick(anchors, key=lambda a: a[0])
+        others = [a for a in anchors if a[1] != best[1]]
+        return best, pick(others, key=lambda a: a[0]) if others else None
+
+    last, last_other = farthest(exits, max)
+    first, first_other = farthest(entries, min)
+    heads, tails = [], []
+    reach = [None] * len(path)
+    for i, p in entries:
+        exit_ = last if last[1] != p else last_other
+        if exit_ is not None and exit_[0] > i:
+            heads.append(p)
+            reach[i] = max(reach[i] or 0, exit_[0])
+    for j, s in exits:
+        entry = first if first[1] != s else first_other
+        if entry is not None and entry[0] < j:
+            tails.append(s)
+
+    # Chain accounts within the span of some entry and its farthest exit
+    covered, end = [], -1
+    for k, n in enumerate(path):
+        if reach[k] is not None:
+            end = max(end, reach[k])
+        if k <= end:
+            covered.append(n)
+    return heads, covered, tails
@@ -0,0 +1,166 @@
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from .graph_builder import TransactionStore, graph_from_store
+from .account_index import AccountIndex
+from .csr_graph import CSRGraph
+
+# Graph snapshot: a directory of raw .npy arrays plus meta.json, opened with mmap.
+SNAPSHOT_FORMAT = "forensics-graph"
+SNAPSHOT_VERSION = 2
+
+STORE_ARRAYS = ('nodes', 'txn_ids', 'src', 'dst', 'amount', 'timestamp', 'txn_index',
+                'edge_offsets', 'edge_src', 'edge_dst')
+ADJACENCY_ARRAYS = ('succ_offsets', 'succ', 'pred_offsets', 'pred')
+
+
+class SnapshotError(ValueError):
+    """Missing, incomplete or incompatible snapshot."""
+
+
+def save_snapshot(G, path: str, include_index: bool = True):
+    """
+    Saves a graph from graph_from_store (DiGraph or CSRGraph) as a versioned
+    snapshot directory at `path`:
+      - node table and transaction columns of the TransactionStore, plus its edge table
+      - CSR successor / predecessor arrays
+      - the AccountIndex arrays, if the index was built and include_index is set
+    Every array is a plain .npy file so open_snapshot can memory-map it. The
+    directory is written next to `path` and renamed into place, so readers never
+    see a partial snapshot.
+    """
+    store = G.graph['store']
+    csr = G if isinstance(G, CSRGraph) else CSRGraph(store)
+    index = G.graph.get('account_index') if include_index else None
+
+    arrays = {
+        'nodes': _to_array(store.nodes),
+        'txn_ids': _to_array(store.txn_ids),
+        'src': store.src,
+        'dst': store.dst,
+        'amount': store.amount,
+        'timestamp': store.timestamp,
+        'txn_index': store.txn_index,
+        'edge_offsets': store.edge_offsets,
+        'edge_src': store.edge_src,
+        'edge_dst': store.edge_dst,
+    }
+    for name in ADJACENCY_ARRAYS:
+        arrays[name] = getattr(csr, name)
+    if index is not None:
+        for name in AccountIndex.ARRAYS:
+            arrays[f'index_{name}'] = getattr(index, name)
+
+    meta = {
+        "format": SNAPSHOT_FORMAT,
+        "version": SNAPSHOT_VERSION,
+        "num_nodes": int(store.num_nodes),
+        "num_transactions": int(len(store.src)),
+        "num_edges": int(store.num_edges),
+        "tz": str(store.tz) if store.tz is not None else None,
+        "content_hash": store.content_hash,
+        "has_index": index is not None,
+        "arrays": {name: str(a.dtype) for name, a in arrays.items()},
+    }
+
+    path = os.path.abspath(path)
+    parent = os.path.dirname(path)
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=parent, prefix=".snapshot-")
+    try:
+        for name, a in arrays.items():
+            np.save(os.path.join(tmp, f"{name}.npy"), np.ascontiguousarray(a), allow_pickle=False)
+        # meta.json last: its presence marks a complete snapshot
+        with open(os.path.join(tmp, "meta.json"), "w") as f:
+            json.dump(meta, f)
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.replace(tmp, path)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+
+def read_meta(path: str) -> dict:
+    try:
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        raise SnapshotError(f"Not a graph snapshot: {path}")
+    if meta.get("format") != SNAPSHOT_FORMAT:
+        raise SnapshotError(f"Not a graph snapshot: {path}")
+    if meta.get("version") != SNAPSHOT_VERSION:
+        raise SnapshotError(f"Unsupported snapshot version {meta.get('version')} (expected {SNAPSHOT_VERSION})")
+    return meta
+
+
+def load_store(path: str, mmap: bool = True) -> TransactionStore:
+    """The TransactionStore of a snapshot; columns are memory-mapped (read-only) unless mmap=False."""
+    meta = read_meta(path)
+    return _store(path, meta, _loader(path, mmap))
+
+
+def open_snapshot(path: str, backend: str = 'csr', mmap: bool = True):
+    """
+    Opens a snapshot as a graph. With the default CSR backend nothing is parsed
+    or rebuilt: every array, including the saved AccountIndex, is memory-mapped
+    and paged in by the OS as the endpoints and detectors touch it.
+    backend='networkx' builds a DiGraph over the memory-mapped store instead.
+    """
+    meta = read_meta(path)
+    load = _loader(path, mmap)
+    store = _store(path, meta, load)
+
+    if backend == 'csr':
+        G = CSRGraph.from_arrays(store, *(load(name) for name in ADJACENCY_ARRAYS))
+    else:
+        G = graph_from_store(store, backend)
+
+    if meta["has_index"]:
+        G.graph['account_index'] = AccountIndex.from_arrays(
+            store, {name: load(f'index_{name}') for name in AccountIndex.ARRAYS}
+        )
+    return G
+
+
+def _loader(path, mmap):
+    def load(name):
+        try:
+            return np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r' if mmap else None, allow_pickle=False)
+        except OSError:
+            raise SnapshotError(f"Snapshot {path} is missing {name}")
+    return load
+
+
+def _store(path, meta, load):
+    tz = meta["tz"]
+    arrays = {name: load(name) for name in STORE_ARRAYS}
+    if len(arrays['src']) != meta["num_transactions"] or len(arrays['nodes']) != meta["num_nodes"]:
+        raise SnapshotError(f"Snapshot {path} is truncated")
+    return TransactionStore(
+        nodes=arrays['nodes'],
+        txn_ids=arrays['txn_ids'],
+        src=arrays['src'],
+        dst=arrays['dst'],
+        amount=arrays['amount'],
+        timestamp=arrays['timestamp'],
+        txn_index=arrays['txn_index'],
+        tz=pd.Timestamp(0, tz=tz).tz if tz else None,
+        content_hash=meta["content_hash"],
+        edge_table=(arrays['edge_offsets'], arrays['edge_src'], arrays['edge_dst']),
+    )
+
+
+def _to_array(values):
+    # Object arrays cannot be memory-mapped: store ids as numbers or fixed-width unicode
+    if values.dtype != object:
+        return values
+    if not len(values):
+        return np.zeros(0, dtype=str)
+    arr = np.asarray(values.tolist())
+    if arr.dtype == object:
+        arr = arr.astype(str)
+    return arr
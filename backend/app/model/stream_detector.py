@@ -0,0 +1,210 @@
+from collections import deque
+from datetime import timedelta
+import networkx as nx
+import pandas as pd
+from .cycle_detector import find_cycles_through_edges, MIN_CYCLE_LENGTH, MAX_CYCLE_LENGTH
+from .fan_detector import FAN_WINDOW, FAN_THRESHOLD, VELOCITY_THRESHOLD
+
+# Expired state is dropped every this many events
+PRUNE_EVERY = 10000
+
+
+class _Window:
+    """
+    One account's transactions in one direction within the sliding window,
+    oldest first, with a partner -> count map for distinct counterparties.
+    """
+    __slots__ = ('entries', 'partners')
+
+    def __init__(self):
+        self.entries = deque()
+        self.partners = {}
+
+    def add(self, ts, partner):
+        self.entries.append((ts, partner))
+        if partner is not None:
+            self.partners[partner] = self.partners.get(partner, 0) + 1
+
+    def evict(self, cutoff):
+        entries, partners = self.entries, self.partners
+        while entries and entries[0][0] < cutoff:
+            _, p = entries.popleft()
+            if p is not None:
+                if partners[p] == 1:
+                    del partners[p]
+                else:
+                    partners[p] -= 1
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class _AccountState:
+    __slots__ = ('incoming', 'outgoing', 'activity', 'active')
+
+    def __init__(self):
+        self.incoming = _Window()
+        self.outgoing = _Window()
+        self.activity = _Window()   # both directions, for velocity
+        self.active = set()         # alert types currently above threshold
+
+
+class StreamDetector:
+    """
+    Real-time counterpart of the batch detectors, fed one transaction at a time.
+
+    Every account keeps 72h sliding windows (incoming, outgoing, both) that evict
+    expired entries as new transactions arrive, so a window always ends at the
+    newest transaction. The thresholds are the batch ones (FAN_THRESHOLD,
+    VELOCITY_THRESHOLD, FAN_WINDOW), and since the largest window count is the same
+    whether windows are anchored at their first or their last transaction, an
+    account alerts here exactly when detect_fan_patterns / detect_high_velocity
+    would flag it on the transactions seen so far.
+
+    Short cycles are searched when a transaction creates a new (sender, receiver)
+    edge, only through that edge. By default edges never expire, matching
+    detect_cycles over the whole history; with `cycle_window` only edges used
+    within that span take part.
+
+    Transactions are expected in timestamp order, as a feed delivers them.
+    Alerts are raised when an account crosses a threshold and again only after it
+    has dropped back below it.
+    """
+
+    def __init__(self, window=FAN_WINDOW, fan_threshold=FAN_THRESHOLD,
+                 velocity_threshold=VELOCITY_THRESHOLD, min_cycle_length=MIN_CYCLE_LENGTH,
+                 max_cycle_length=MAX_CYCLE_LENGTH, cycle_window=None):
+        self.window_ns = window // timedelta(microseconds=1) * 1000
+        self.fan_threshold = fan_threshold
+        self.velocity_threshold = velocity_threshold
+        self.min_cycle_length = min_cycle_length
+        self.max_cycle_length = max_cycle_length
+        self.cycle_window_ns = cycle_window // timedelta(microseconds=1) * 1000 if cycle_window else None
+
+        self.accounts = {}
+        self.graph = nx.DiGraph()   # topology; edges carry 'last_seen' (epoch ns)
+        self.events = 0
+        self.latest_ts = None
+
+    def process(self, txn):
+        """
+        Adds one transaction ({'sender_id', 'receiver_id', 'timestamp'} plus optional
+        'transaction_id' and 'amount'; see normalize_event) and returns the alerts it
+        triggered, as a list of dicts.
+        """
+        sender = str(txn['sender_id'])
+        receiver = str(txn['receiver_id'])
+        ts = _to_ns(txn['timestamp'])
+        self.events += 1
+        txn_id = txn.get('transaction_id') or f"TXN_{self.events - 1}"
+        if self.latest_ts is None or ts > self.latest_ts:
+            self.latest_ts = ts
+
+        alerts = []
+        cutoff = ts - self.window_ns
+
+        out_state = self._state(sender)
+        out_state.outgoing.add(ts, receiver)
+        out_state.activity.add(ts, None)
+        in_state = self._state(receiver)
+        in_state.incoming.add(ts, sender)
+        in_state.activity.add(ts, None)
+
+        for account, state in ((receiver, in_state), (sender, out_state)):
+            for w in (state.incoming, state.outgoing, state.activity):
+                w.evict(cutoff)
+            self._check(alerts, account, state, 'fan_in', len(state.incoming.partners), self.fan_threshold, txn_id, ts)
+            self._check(alerts, account, state, 'fan_out', len(state.outgoing.partners), self.fan_threshold, txn_id, ts)
+            self._check(alerts, account, state, 'high_velocity', len(state.activity), self.velocity_threshold, txn_id, ts)
+            if sender == receiver:
+                break
+
+        for cycle in self._new_cycles(sender, receiver, ts):
+            alerts.append({
+                "type": "cycle",
+                "members": list(cycle),
+                "transaction_id": txn_id,
+                "timestamp": _iso(ts),
+            })
+
+        if self.events % PRUNE_EVERY == 0:
+            self.prune()
+        return alerts
+
+    def process_many(self, transactions):
+        """Generator of alerts for an iterable of transactions."""
+        for txn in transactions:
+            yield from self.process(txn)
+
+    def prune(self):
+        """Drops accounts with empty windows and, with cycle_window, expired edges."""
+        if self.latest_ts is None:
+            return
+        cutoff = self.latest_ts - self.window_ns
+        idle = []
+        for account, state in self.accounts.items():
+            for w in (state.incoming, state.outgoing, state.activity):
+                w.evict(cutoff)
+            if not len(state.activity):
+                idle.append(account)
+        for account in idle:
+            del self.accounts[account]
+
+        if self.cycle_window_ns is not None:
+            edge_cutoff = self.latest_ts - self.cycle_window_ns
+            expired = [(u, v) for u, v, seen in self.graph.edges(data='last_seen') if seen < edge_cutoff]
+            self.graph.remove_edges_from(expired)
+            self.graph.remove_nodes_from([n for n in list(self.graph) if self.graph.degree(n) == 0])
+
+    def _state(self, account):
+        state = self.accounts.get(account)
+        if state is None:
+            state = self.accounts[account] = _AccountState()
+        return state
+
+    def _check(self, alerts, account, state, kind, value, threshold, txn_id, ts):
+        if value >= threshold:
+            if kind not in state.active:
+                state.active.add(kind)
+                alerts.append({
+                    "type": kind,
+                    "account_id": account,
+                    "count": value,
+                    "transaction_id": txn_id,
+                    "timestamp": _iso(ts),
+                })
+        else:
+            state.active.discard(kind)
+
+    def _new_cycles(self, u, v, ts):
+        G = self.graph
+        data = G.get_edge_data(u, v)
+        if data is None:
+            G.add_edge(u, v, last_seen=ts)
+            is_new = True
+        else:
+            is_new = self._expired(data['last_seen'], ts)
+            data['last_seen'] = ts
+        if not is_new or u == v:
+            return []
+
+        view = G
+        if self.cycle_window_ns is not None:
+            view = nx.subgraph_view(G, filter_edge=lambda a, b: not self._expired(G[a][b]['last_seen'], ts))
+        return find_cycles_through_edges(view, [(u, v)], self.min_cycle_length, self.max_cycle_length)
+
+    def _expired(self, seen, now):
+        return self.cycle_window_ns is not None and seen < now - self.cycle_window_ns
+
+
+def _to_ns(value):
+    if isinstance(value, int):
+        return value
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert(None)
+    return ts.value
+
+
+def _iso(ns):
+    return pd.Timestamp(ns).strftime('%Y-%m-%d %H:%M:%S')
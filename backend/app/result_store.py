@@ -0,0 +1,276 @@
+import gzip
+import os
+import shutil
+import tempfile
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from .serialization import dumps, loads
+
+# Names of the spill files (tempfile.mkstemp prefix / suffix), in a directory of
+# each store's own under spill_dir
+SPILL_PREFIX = "run-"
+SPILL_SUFFIX = ".json.gz"
+
+
+class ResultStore:
+    """
+    Bounded store for analysis results, keyed by run_id.
+
+    - Memory tier: LRU ordered, limited to `max_bytes` (estimated result size).
+      Least recently used runs are evicted and spilled to disk as gzip JSON.
+    - Disk tier: spilled runs stay readable (and are promoted back on access)
+      until `max_disk_bytes` pushes the oldest out.
+    - Every entry expires `ttl_seconds` after it was stored, in either tier. A
+      looked-up entry is checked on access; the full sweep for expired entries
+      runs at most every `ttl_seconds / 10` (and at least once a minute).
+    - Spill files are only readable by the store that wrote them. Each store
+      spills into a directory of its own under `spill_dir` (shared by workers
+      and restarts), which it removes on `close()` or at interpreter exit.
+
+    Spilled results are written, read and parsed outside the lock, so neither
+    an eviction nor a disk hit holds up other lookups; a result is served from
+    _spilling while its file is being written.
+
+    Supports the dict operations the API uses (`in`, `[]`, `[]=`, `get`) and
+    exposes hit/miss/eviction counters through `metrics()`.
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: float, spill_dir: str,
+                 max_disk_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.spill_dir = spill_dir
+        self.max_disk_bytes = max_disk_bytes
+
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()   # run_id -> (result, size, stored_at)
+        self._disk: "OrderedDict[str, tuple]" = OrderedDict()     # run_id -> (path, size, stored_at)
+        self._spilling: Dict[str, tuple] = {}  # run_id -> memory entry whose spill file is being written
+        self._own_dir: Optional[str] = None
+        self._cleanup = None
+        self._memory_bytes = 0
+        self._disk_bytes = 0
+        self._lock = threading.RLock()
+        self._next_sweep = 0.0
+        self._counters = {
+            "hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "disk_evictions": 0,
+        }
+
+    # ---------------- dict interface ----------------
+
+    def __setitem__(self, run_id: str, result: Dict[str, Any]):
+        self.put(run_id, result)
+
+    def __getitem__(self, run_id: str) -> Dict[str, Any]:
+        result = self.get(run_id)
+        if result is None:
+            raise KeyError(run_id)
+        return result
+
+    def __contains__(self, run_id: str) -> bool:
+        with self._lock:
+            self._expire()
+            self._expire_entry(run_id)
+            return run_id in self._memory or run_id in self._spilling or run_id in self._disk
+
+    def __len__(self):
+        with self._lock:
+            return len(self._memory) + len(self._spilling) + len(self._disk)
+
+    # ---------------- operations ----------------
+
+    def put(self, run_id: str, result: Dict[str, Any], stored_at: Optional[float] = None):
+        with self._lock:
+            self._discard(run_id)
+            size = estimate_size(result)
+            self._memory[run_id] = (result, size, stored_at or time.time())
+            self._memory_bytes += size
+            self._expire()
+            evicted = self._evict()
+        self._spill(evicted)
+
+    def get(self, run_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._expire()
+            self._expire_entry(run_id)
+
+            entry = self._memory.get(run_id)
+            if entry is not None:
+                self._memory.move_to_end(run_id)
+                self._counters["hits"] += 1
+                return entry[0]
+
+            entry = self._spilling.get(run_id)
+            if entry is not None:
+                self._counters["hits"] += 1
+                return entry[0]
+
+            entry = self._disk.get(run_id)
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+
+        path, _, stored_at = entry
+        try:
+            with gzip.open(path, "rb") as f:
+                result = loads(f.read())
+        except OSError:
+            # Expired or evicted (file removed) while it was being read
+            result = None
+
+        with self._lock:
+            current = self._memory.get(run_id)
+            if current is not None:
+                # Promoted by a concurrent lookup in the meantime
+                self._memory.move_to_end(run_id)
+                self._counters["hits"] += 1
+                return current[0]
+            if result is None or self._disk.get(run_id) != entry:
+                self._counters["misses"] += 1
+                return None
+            self._counters["disk_hits"] += 1
+        # Promote back into memory; keeps its original TTL
+        self.put(run_id, result, stored_at=stored_at)
+        return result
+
+    def close(self):
+        """Removes this store's spill files."""
+        if self._cleanup is not None:
+            self._cleanup()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            self._expire()
+            return {
+                **self._counters,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "memory_budget_bytes": self.max_bytes,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_bytes,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+    # ---------------- internals ----------------
+
+    def _evict(self):
+        """Moves the least recently used results from memory to _spilling and returns them (lock held)."""
+        evicted = []
+        # Always keep the most recent result in memory, even if it alone exceeds the budget
+        while self._memory_bytes > self.max_bytes and len(self._memory) > 1:
+            run_id, entry = self._memory.popitem(last=False)
+            self._memory_bytes -= entry[1]
+            self._counters["evictions"] += 1
+            self._spilling[run_id] = entry
+            evicted.append((run_id, entry))
+        return evicted
+
+    def _spill(self, evicted):
+        """Writes evicted results to disk (no lock held) and registers the files."""
+        for run_id, entry in evicted:
+            result, _, stored_at = entry
+            try:
+                path = self._write(result)
+            except Exception:
+                with self._lock:
+                    if self._spilling.get(run_id) is entry:
+                        del self._spilling[run_id]
+                raise
+            size = os.path.getsize(path)
+
+            with self._lock:
+                current = self._spilling.get(run_id) is entry
+                if current:
+                    del self._spilling[run_id]
+                    self._disk[run_id] = (path, size, stored_at)
+                    self._disk_bytes += size
+                    if self.max_disk_bytes is not None:
+                        while self._disk_bytes > self.max_disk_bytes and self._disk:
+                            old_id = next(iter(self._disk))
+                            self._remove_disk(old_id)
+                            self._counters["disk_evictions"] += 1
+            if not current:
+                # Stored again or discarded while the file was written
+                _remove_file(path)
+
+    def _write(self, result: Dict[str, Any]) -> str:
+        fd, path = tempfile.mkstemp(prefix=SPILL_PREFIX, suffix=SPILL_SUFFIX, dir=self._spill_dir())
+        with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6) as f:
+            f.write(dumps(result))
+        return path
+
+    def _spill_dir(self) -> str:
+        """This store's directory under spill_dir, created on the first spill."""
+        with self._lock:
+            if self._own_dir is None:
+                os.makedirs(self.spill_dir, exist_ok=True)
+                self._own_dir = tempfile.mkdtemp(prefix=f"store-{os.getpid()}-", dir=self.spill_dir)
+                self._cleanup = weakref.finalize(self, shutil.rmtree, self._own_dir, True)
+            return self._own_dir
+
+    def _expire(self):
+        """Drops every expired entry, at most once per sweep interval (see the class docstring)."""
+        if not self.ttl_seconds:
+            return
+        now = time.time()
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + min(self.ttl_seconds / 10, 60)
+        cutoff = now - self.ttl_seconds
+        for run_id in [rid for rid, e in self._memory.items() if e[2] < cutoff]:
+            _, size, _ = self._memory.pop(run_id)
+            self._memory_bytes -= size
+            self._counters["expirations"] += 1
+        for run_id in [rid for rid, e in self._disk.items() if e[2] < cutoff]:
+            self._remove_disk(run_id)
+            self._counters["expirations"] += 1
+
+    def _expire_entry(self, run_id: str):
+        """Drops run_id if it has expired, so lookups never see an entry past its TTL."""
+        if not self.ttl_seconds:
+            return
+        entry = self._memory.get(run_id) or self._spilling.get(run_id) or self._disk.get(run_id)
+        if entry is not None and entry[2] < time.time() - self.ttl_seconds:
+            self._discard(run_id)
+            self._counters["expirations"] += 1
+
+    def _discard(self, run_id: str):
+        entry = self._memory.pop(run_id, None)
+        if entry is not None:
+            self._memory_bytes -= entry[1]
+        self._spilling.pop(run_id, None)
+        if run_id in self._disk:
+            self._remove_disk(run_id)
+
+    def _remove_disk(self, run_id: str):
+        path, size, _ = self._disk.pop(run_id)
+        self._disk_bytes -= size
+        _remove_file(path)
+
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def estimate_size(result: Dict[str, Any]) -> int:
+    """
+    Cheap structural estimate of a formatted result's in-memory size (bytes),
+    so inserting a run does not require serializing it.
+    """
+    size = 1024
+    for acc in result.get("suspicious_accounts", []):
+        size += 400 + 60 * len(acc.get("detected_patterns", ()))
+    for ring in result.get("fraud_rings", []):
+        size += 300 + 70 * len(ring.get("member_accounts", ()))
+    return size
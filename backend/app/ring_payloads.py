@@ -0,0 +1,181 @@
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Rings with more transactions than this get one edge per (sender, receiver) pair by default
+RING_DETAIL_MAX_TRANSACTIONS = 2000
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class RingPayloadCache:
+    """
+    LRU of built /ring payloads keyed by (run_id, ring_id, aggregate), limited to
+    `max_bytes` (estimated payload size). A run's graph, rings and scores never
+    change once it is stored, so entries need no invalidation; they just age out.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()   # key -> (payload, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get_or_build(self, session, ring_id: str, aggregate: Optional[bool] = None) -> Optional[dict]:
+        """The payload of a ring of `session` (built on first request); None if the ring does not exist."""
+        key = (session.run_id, ring_id, aggregate)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry[0]
+
+        # Built outside the lock: a concurrent duplicate build is harmless
+        payload = build_ring_payload(session, ring_id, aggregate)
+        if payload is None:
+            return None
+        size = 300 + 200 * len(payload['nodes']) + 150 * len(payload['edges'])
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (payload, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+        return payload
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+def _ring_edges(G, members: List[str]):
+    """(sender, receiver, first row, end row) of every edge between ring members, in member order."""
+    member_set = set(members)
+    edges = []
+    for u in members:
+        if u not in G:
+            continue
+        for v in G.successors(u):
+            if v in member_set:
+                txs = G[u][v]['transactions']
+                edges.append((u, v, txs.start, txs.stop))
+    return edges
+
+
+def format_timestamps(store, ns) -> List[str]:
+    """TIMESTAMP_FORMAT strings of epoch-ns timestamps, in the store's timezone, in one vectorized pass."""
+    times = pd.to_datetime(np.asarray(ns, dtype=np.int64), utc=store.tz is not None)
+    if store.tz is not None:
+        times = times.tz_convert(store.tz)
+    return list(times.strftime(TIMESTAMP_FORMAT))
+
+
+def _transaction_rows(store, rows):
+    """(transaction ids, amounts, formatted timestamps) of store rows."""
+    txn_ids = store.txn_ids[store.txn_index[rows]].tolist()
+    return txn_ids, store.amount[rows].tolist(), format_timestamps(store, store.timestamp[rows])
+
+
+def build_ring_payload(session, ring_id: str, aggregate: Optional[bool] = None) -> Optional[dict]:
+    """
+    ReactFlow nodes and edges of one ring (members only). Edges are one per
+    transaction, or with `aggregate` one per (sender, receiver) pair carrying the
+    transaction count, total amount and first / last timestamps; aggregate=None
+    picks aggregation for rings above RING_DETAIL_MAX_TRANSACTIONS transactions.
+    """
+    G = session.G
+    ring_index = session.ring_index
+    ring = ring_index.get(ring_id)
+    if not ring:
+        return None
+    # A ring listing an account twice still gets one node and one set of edges for it
+    members = list(dict.fromkeys(ring['member_accounts']))
+    store = G.graph['store']
+
+    nodes = []
+    for n in members:
+        score_info = session.scores.get(n)
+        in_deg = G.in_degree(n) if n in G else 0
+        out_deg = G.out_degree(n) if n in G else 0
+        nodes.append({
+            "id": n,
+            "data": {"label": n},  # ReactFlow format
+            "suspicionScore": score_info['suspicion_score'] if score_info else 0.0,
+            "patterns": score_info['detected_patterns'] if score_info else [],
+            "totalTransactions": in_deg + out_deg,
+            "fanIn": in_deg,
+            "fanOut": out_deg,
+            "isMember": True,
+            "rings": ring_index.rings_of(n),
+        })
+
+    ring_edges = _ring_edges(G, members)
+    if aggregate is None:
+        aggregate = sum(stop - start for _, _, start, stop in ring_edges) > RING_DETAIL_MAX_TRANSACTIONS
+
+    edges = []
+    if aggregate:
+        # Transactions of an edge are contiguous and sorted by timestamp
+        starts = np.array([e[2] for e in ring_edges], dtype=np.int64)
+        stops = np.array([e[3] for e in ring_edges], dtype=np.int64)
+        firsts = format_timestamps(store, store.timestamp[starts])
+        lasts = format_timestamps(store, store.timestamp[stops - 1])
+        for (u, v, start, stop), first, last in zip(ring_edges, firsts, lasts):
+            edges.append({
+                "id": f"{u}-{v}",
+                "source": u,
+                "target": v,
+                "amount": float(store.amount[start:stop].sum()),
+                "transactionCount": stop - start,
+                "firstTimestamp": first,
+                "lastTimestamp": last,
+            })
+    elif ring_edges:
+        rows = np.concatenate([np.arange(start, stop) for _, _, start, stop in ring_edges])
+        txn_ids, amounts, timestamps = _transaction_rows(store, rows)
+        i = 0
+        for u, v, start, stop in ring_edges:
+            for _ in range(stop - start):
+                edges.append({
+                    "id": f"{u}-{v}-{txn_ids[i]}",
+                    "source": u,
+                    "target": v,
+                    "amount": amounts[i],
+                    "timestamp": timestamps[i],
+                    "transaction_id": txn_ids[i],
+                })
+                i += 1
+
+    return {
+        "ringId": ring_id,
+        "patternType": ring['pattern_type'],
+        "riskScore": ring['risk_score'],
+        "aggregated": bool(aggregate),
+        "nodes": nodes,
+        "edges": edges,
+    }
+
+
+def edge_transactions(session, ring_id: str, source: str, target: str) -> Optional[List[dict]]:
+    """
+    Transactions of one edge of a ring (the detail behind an aggregated edge),
+    oldest first; None if the ring or the edge between two of its members does not exist.
+    """
+    G = session.G
+    ring = session.ring_index.get(ring_id)
+    if not ring or source not in ring['member_accounts'] or target not in ring['member_accounts']:
+        return None
+    if source not in G or not G.has_edge(source, target):
+        return None
+    txs = G[source][target]['transactions']
+    txn_ids, amounts, timestamps = _transaction_rows(G.graph['store'], np.arange(txs.start, txs.stop))
+    return [
+        {"transaction_id": t, "amount": a, "timestamp": ts}
+        for t, a, ts in zip(txn_ids, amounts, timestamps)
+    ]
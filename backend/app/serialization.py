@@ -0,0 +1,93 @@
+import json
+from itertools import islice
+from typing import Any, Iterable, Iterator, Optional
+
+from fastapi.responses import JSONResponse, StreamingResponse
+
+try:
+    import orjson
+except ImportError:  # optional: stdlib json is used without it (same output, slower)
+    orjson = None
+
+# Records serialized per chunk of a streamed result
+STREAM_CHUNK_ROWS = 5000
+
+RESULT_FORMATS = ("json", "ndjson")
+
+
+def dumps(obj: Any) -> bytes:
+    """Compact UTF-8 JSON of obj (orjson when installed)."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with dumps (orjson when installed)."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def _chunks(items: Iterable, size: int) -> Iterator[list]:
+    it = iter(items)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _json_array(items: Iterable) -> Iterator[bytes]:
+    """A JSON array, one chunk of STREAM_CHUNK_ROWS items per piece."""
+    yield b"["
+    first = True
+    for chunk in _chunks(items, STREAM_CHUNK_ROWS):
+        body = dumps(chunk)[1:-1]  # the items of the chunk, comma separated
+        yield body if first else b"," + body
+        first = False
+    yield b"]"
+
+
+def iter_result_json(result: dict, accounts: Optional[Iterable] = None) -> Iterator[bytes]:
+    """
+    The result document ({"suspicious_accounts", "fraud_rings", "summary"}) as
+    JSON pieces, serialized a chunk of records at a time so a large result is
+    never rendered into one string. `accounts` replaces the result's account
+    list (e.g. a filtered generator).
+    """
+    accounts = result["suspicious_accounts"] if accounts is None else accounts
+    yield b'{"suspicious_accounts":'
+    yield from _json_array(accounts)
+    yield b',"fraud_rings":'
+    yield from _json_array(result["fraud_rings"])
+    yield b',"summary":' + dumps(result["summary"]) + b"}"
+
+
+def iter_result_ndjson(result: dict, accounts: Optional[Iterable] = None) -> Iterator[bytes]:
+    """
+    The result as newline-delimited JSON: a {"summary": ...} line, then one
+    {"suspicious_account": ...} line per account and one {"fraud_ring": ...}
+    line per ring.
+    """
+    accounts = result["suspicious_accounts"] if accounts is None else accounts
+    yield dumps({"summary": result["summary"]}) + b"\n"
+    for chunk in _chunks(accounts, STREAM_CHUNK_ROWS):
+        yield b"".join(dumps({"suspicious_account": acc}) + b"\n" for acc in chunk)
+    for chunk in _chunks(result["fraud_rings"], STREAM_CHUNK_ROWS):
+        yield b"".join(dumps({"fraud_ring": ring}) + b"\n" for ring in chunk)
+
+
+def stream_result(result: dict, fmt: str = "json", accounts: Optional[Iterable] = None,
+                  headers: Optional[dict] = None) -> StreamingResponse:
+    """Chunked response of a result document, as JSON or (fmt="ndjson") NDJSON."""
+    if fmt == "ndjson":
+        return StreamingResponse(iter_result_ndjson(result, accounts), media_type="application/x-ndjson",
+                                 headers=headers)
+    return StreamingResponse(iter_result_json(result, accounts), media_type="application/json", headers=headers)
@@ -0,0 +1,286 @@
+import gzip
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import networkx as nx
+
+from .model.snapshot import save_snapshot, open_snapshot, read_meta, SnapshotError
+from .model.csr_graph import CSRGraph
+from .model.ring_index import RingIndex
+from .model.result_query import ResultQuery
+from .model.score_engine import ScoreTable
+
+
+class RunSession:
+    """Graph, rings and account scores of one analysis run, for the investigation endpoints."""
+
+    def __init__(self, run_id: str, G: nx.DiGraph, rings: List[dict], scores: Dict[str, dict],
+                 score_table: Optional[ScoreTable] = None, graph_run_id: Optional[str] = None):
+        self.run_id = run_id
+        self.G = G
+        # Run whose snapshot holds G, when it is shared with another run (e.g. a rescore)
+        self.graph_run_id = graph_run_id
+        self.rings = rings
+        # Rings by ID and account -> ring IDs, for the ring / account lookups
+        self.ring_index = RingIndex.from_rings(rings)
+        self.scores = scores
+        # Score inputs per account, from which breakdowns are derived on request
+        self.score_table = score_table
+        self._query = None
+
+    @property
+    def query(self) -> ResultQuery:
+        """Score / pattern / ring indexes over the run's accounts and rings (built on first use)."""
+        if self._query is None:
+            self._query = ResultQuery(list(self.scores.values()), self.ring_index)
+        return self._query
+
+    def breakdown(self, account_id: str) -> List[dict]:
+        if self.score_table is not None and account_id in self.score_table:
+            return self.score_table.breakdown(account_id)
+        return self.scores.get(account_id, {}).get('score_breakdown', [])
+
+    @property
+    def graph_key(self) -> str:
+        return self.graph_run_id or self.run_id
+
+    def estimated_bytes(self) -> int:
+        return self.graph_bytes() + self.result_bytes()
+
+    def graph_bytes(self) -> int:
+        store = self.G.graph['store']
+        columns = (store.src, store.dst, store.amount, store.timestamp, store.txn_index)
+        size = sum(a.nbytes for a in columns)
+        if isinstance(self.G, CSRGraph):
+            size += self.G.estimated_bytes()
+        else:
+            # NetworkX adjacency dicts and per-edge views dominate the rest
+            size += 600 * self.G.number_of_edges() + 300 * self.G.number_of_nodes()
+        return size
+
+    def result_bytes(self) -> int:
+        size = 500 * len(self.scores)
+        if self.score_table is not None:
+            size += 100 * len(self.score_table)
+        size += sum(300 + 70 * len(r['member_accounts']) for r in self.rings)
+        return size
+
+
+class SessionCache:
+    """
+    Memory-bounded LRU of RunSessions. Every session is persisted as a graph
+    snapshot (memory-mapped store/adjacency/index arrays + rings/scores) when
+    added; sessions evicted from memory are reopened from their snapshot on the
+    next request. Snapshots already in snapshot_dir are picked up at startup, so
+    runs survive a restart. Only the newest `max_snapshots` graphs are kept on disk.
+
+    A session with a graph_run_id shares that run's graph: only its rings and
+    scores are written (with a reference to the graph's snapshot), the graph is
+    counted once against max_bytes while any of its sessions is resident, and
+    the run goes when the graph's snapshot is trimmed.
+
+    Snapshots are written outside the lock, so lookups are not held up by a
+    put; a session is served from _pending until its snapshot is registered.
+    """
+
+    def __init__(self, max_bytes: int, snapshot_dir: str, max_snapshots: int = 50, graph_backend: str = "networkx"):
+        self.max_bytes = max_bytes
+        self.snapshot_dir = snapshot_dir
+        self.max_snapshots = max_snapshots
+        self.graph_backend = graph_backend
+        self.latest_run_id: Optional[str] = None
+
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()   # run_id -> (session, size)
+        self._snapshots: "OrderedDict[str, tuple]" = OrderedDict()  # run_id -> (graph path, meta path)
+        self._pending: Dict[str, RunSession] = {}  # run_id -> session whose snapshot is being written
+        self._graphs: Dict[str, list] = {}  # graph key -> [resident sessions, size, graph]
+        self._memory_bytes = 0
+        self._lock = threading.RLock()
+        self._discover()
+
+    def __contains__(self, run_id: str) -> bool:
+        with self._lock:
+            return run_id in self._memory or run_id in self._snapshots or run_id in self._pending
+
+    def put(self, session: RunSession):
+        run_id = session.run_id
+        with self._lock:
+            self._pending[run_id] = session
+            self._insert(session)
+            self.latest_run_id = run_id
+            graph_run_id = session.graph_run_id
+            if graph_run_id not in self._snapshots and graph_run_id not in self._pending:
+                # The shared graph is not on disk (any more): the run gets its own snapshot
+                graph_run_id = None
+        try:
+            paths = self._persist(session, graph_run_id)
+        except Exception:
+            with self._lock:
+                self._pending.pop(run_id, None)
+            raise
+        with self._lock:
+            self._pending.pop(run_id, None)
+            self._snapshots[run_id] = paths
+            removed = self._trim_snapshots()
+        _remove_snapshots(removed)
+
+    def get(self, run_id: str) -> Optional[RunSession]:
+        with self._lock:
+            entry = self._memory.get(run_id)
+            if entry is not None:
+                self._memory.move_to_end(run_id)
+                return entry[0]
+
+            pending = self._pending.get(run_id)
+            if pending is not None:
+                self._insert(pending)
+                return pending
+
+            paths = self._snapshots.get(run_id)
+            if paths is None:
+                return None
+            session = self._restore(run_id, *paths)
+            self._insert(session)
+            return session
+
+    def latest(self) -> Optional[RunSession]:
+        return self.get(self.latest_run_id) if self.latest_run_id else None
+
+    def _insert(self, session: RunSession):
+        old = self._memory.pop(session.run_id, None)
+        if old is not None:
+            self._memory_bytes -= old[1]
+            self._release_graph(old[0])
+        size = session.result_bytes()
+        self._memory[session.run_id] = (session, size)
+        self._memory_bytes += size
+        self._hold_graph(session)
+
+        # The most recently used session always stays resident
+        while self._memory_bytes > self.max_bytes and len(self._memory) > 1:
+            _, (evicted, evicted_size) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted_size
+            self._release_graph(evicted)
+
+    def _hold_graph(self, session: RunSession):
+        """Counts the session's graph against max_bytes, unless a resident session already shares it."""
+        entry = self._graphs.get(session.graph_key)
+        if entry is None:
+            entry = self._graphs[session.graph_key] = [0, session.graph_bytes(), session.G]
+            self._memory_bytes += entry[1]
+        entry[0] += 1
+
+    def _release_graph(self, session: RunSession):
+        entry = self._graphs[session.graph_key]
+        entry[0] -= 1
+        if entry[0] == 0:
+            del self._graphs[session.graph_key]
+            self._memory_bytes -= entry[1]
+
+    def _paths(self, run_id: str):
+        return (
+            os.path.join(self.snapshot_dir, f"{run_id}.graph"),
+            os.path.join(self.snapshot_dir, f"{run_id}.meta.json.gz"),
+        )
+
+    def _graph_ref_path(self, run_id: str) -> str:
+        return os.path.join(self.snapshot_dir, f"{run_id}.graph-of")
+
+    def _persist(self, session: RunSession, graph_run_id: Optional[str]):
+        """
+        Writes the session's snapshot (no lock held); the meta file is renamed
+        into place when complete. With a graph_run_id only a reference to that
+        run's graph snapshot is written, not the graph.
+        """
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        graph_path, meta_path = self._paths(session.run_id)
+
+        if graph_run_id is None:
+            save_snapshot(session.G, graph_path)
+        else:
+            with open(self._graph_ref_path(session.run_id), "w", encoding="utf-8") as f:
+                f.write(graph_run_id)
+            graph_path = self._paths(graph_run_id)[0]
+        tmp_path = meta_path + ".tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            meta = {"rings": session.rings, "scores": session.scores}
+            if session.score_table is not None:
+                meta["score_table"] = session.score_table.to_dict()
+            json.dump(meta, f, separators=(",", ":"))
+        os.replace(tmp_path, meta_path)
+        return graph_path, meta_path
+
+    def _trim_snapshots(self):
+        """
+        Unregisters the oldest graph snapshots beyond max_snapshots, with the
+        runs sharing them, and returns the paths to remove.
+        """
+        owners = [run_id for run_id, (graph_path, _) in self._snapshots.items()
+                  if graph_path == self._paths(run_id)[0]]
+        removed = []
+        for owner in owners[:max(0, len(owners) - self.max_snapshots)]:
+            graph_path = self._paths(owner)[0]
+            for run_id, paths in list(self._snapshots.items()):
+                if paths[0] != graph_path:
+                    continue
+                del self._snapshots[run_id]
+                removed.append(paths[1])
+                removed.append(graph_path if run_id == owner else self._graph_ref_path(run_id))
+        return removed
+
+    def _discover(self):
+        """Registers the complete snapshots left in snapshot_dir by an earlier process, oldest first."""
+        try:
+            names = os.listdir(self.snapshot_dir)
+        except OSError:
+            return
+        found = []
+        for name in names:
+            if not name.endswith(".meta.json.gz"):
+                continue
+            run_id = name[:-len(".meta.json.gz")]
+            graph_path, meta_path = self._paths(run_id)
+            try:
+                with open(self._graph_ref_path(run_id), encoding="utf-8") as f:
+                    graph_path = self._paths(f.read().strip())[0]
+            except OSError:
+                pass
+            try:
+                read_meta(graph_path)
+            except SnapshotError:
+                continue
+            found.append((os.path.getmtime(meta_path), run_id, graph_path, meta_path))
+
+        for _, run_id, graph_path, meta_path in sorted(found):
+            self._snapshots[run_id] = (graph_path, meta_path)
+            self.latest_run_id = run_id
+        _remove_snapshots(self._trim_snapshots())
+
+    def _restore(self, run_id: str, graph_path: str, meta_path: str) -> RunSession:
+        graph_run_id = os.path.basename(graph_path)[:-len(".graph")]
+        shared = self._graphs.get(graph_run_id)
+        G = shared[2] if shared is not None else open_snapshot(graph_path, self.graph_backend)
+        with gzip.open(meta_path, "rt", encoding="utf-8") as f:
+            meta = json.load(f)
+        try:
+            table = ScoreTable.from_dict(meta["score_table"])
+        except (KeyError, ValueError):
+            # Written by an older version: scores are served as stored, without rescoring
+            table = None
+        return RunSession(run_id, G, meta["rings"], meta["scores"], table,
+                          graph_run_id if graph_run_id != run_id else None)
+
+
+def _remove_snapshots(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,123 @@
+import argparse
+import csv
+import json
+import logging
+import socket
+import sys
+import time
+from .ingest import RENAME_MAP, IngestError
+from .model.stream_detector import StreamDetector
+
+logger = logging.getLogger("money_muling_detector")
+
+# Seconds between polls of a tailed file that has no new lines
+POLL_INTERVAL = 0.2
+
+STREAM_FIELDS = ('sender_id', 'receiver_id', 'timestamp')
+
+
+def normalize_event(record: dict) -> dict:
+    """Applies the upload column renames to one event and checks the required fields."""
+    event = {RENAME_MAP.get(k, k): v for k, v in record.items()}
+    missing = [f for f in STREAM_FIELDS if not event.get(f)]
+    if missing:
+        raise IngestError(f"Missing fields: {missing}")
+    if event.get('amount') not in (None, ''):
+        event['amount'] = float(event['amount'])
+    return event
+
+
+def tail_csv(path, poll_interval=POLL_INTERVAL, follow=True):
+    """
+    Yields the rows of a CSV file as dicts, then keeps waiting for rows appended
+    to it (like `tail -f`) unless follow is False. The first line is the header.
+    """
+    with open(path, newline='') as f:
+        header = None
+        pending = ''
+        while True:
+            line = f.readline()
+            if not line:
+                if not follow:
+                    return
+                time.sleep(poll_interval)
+                continue
+            pending += line
+            if not pending.endswith('\n'):
+                continue  # writer is mid-line
+            row, pending = next(csv.reader([pending])), ''
+            if header is None:
+                header = row
+            elif row:
+                yield dict(zip(header, row))
+
+
+def socket_events(host='127.0.0.1', port=9009):
+    """
+    Listens on a local TCP socket and yields newline-delimited JSON objects, one
+    connection after another.
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as server:
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind((host, port))
+        server.listen()
+        while True:
+            conn, _ = server.accept()
+            with conn, conn.makefile('r', encoding='utf-8') as lines:
+                for line in lines:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        logger.warning("Skipping malformed stream line: %r", line[:200])
+
+
+def run_stream(records, detector=None, on_alert=None):
+    """
+    Feeds records (any iterable of dicts: a list, tail_csv, socket_events) through
+    a StreamDetector and hands every alert to on_alert as soon as it is raised.
+    Malformed records are logged and skipped so one bad line does not stop the feed.
+    Returns the detector.
+    """
+    detector = detector or StreamDetector()
+    on_alert = on_alert or (lambda alert: None)
+    for record in records:
+        try:
+            event = normalize_event(record)
+            alerts = detector.process(event)
+        except (IngestError, ValueError, TypeError) as e:
+            logger.warning("Skipping transaction %r: %s", record, e)
+            continue
+        for alert in alerts:
+            on_alert(alert)
+    return detector
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Real-time fraud pattern alerts over a transaction stream")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--tail", metavar="CSV", help="follow a CSV file as rows are appended")
+    source.add_argument("--listen", metavar="HOST:PORT", help="read JSON lines from a local TCP socket")
+    parser.add_argument("--no-follow", action="store_true", help="stop at the end of the tailed file")
+    args = parser.parse_args(argv)
+
+    if args.tail:
+        records = tail_csv(args.tail, follow=not args.no_follow)
+    else:
+        host, _, port = args.listen.rpartition(':')
+        records = socket_events(host or '127.0.0.1', int(port))
+
+    def print_alert(alert):
+        sys.stdout.write(json.dumps(alert) + "\n")
+        sys.stdout.flush()
+
+    try:
+        run_stream(records, on_alert=print_alert)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
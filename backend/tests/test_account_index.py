@@ -0,0 +1,63 @@
+import pandas as pd
+import sys
+import os
+import io
+
+# Add backend to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.model.graph_builder import build_graph
+from app.model.account_index import get_account_index
+
+CSV = """transaction_id,sender_id,receiver_id,amount,timestamp
+T1,A,B,100.00,2026-02-01 10:00:00
+T2,B,C,90.00,2026-02-03 11:00:00
+T3,C,B,50.00,2026-02-01 09:00:00
+T4,B,A,20.00,2026-02-10 12:00:00
+"""
+
+def test_account_index_groups_by_account():
+    df = pd.read_csv(io.StringIO(CSV))
+    G = build_graph(df)
+    index = get_account_index(G)
+
+    # Built once and cached on the graph
+    assert get_account_index(G) is index
+
+    b = index.id_of('B')
+    in_ts, in_amount, in_partner = index.incoming(b)
+    assert list(index.nodes[in_partner]) == ['C', 'A']   # time ordered
+    assert list(in_amount) == [50.0, 100.0]
+
+    out_ts, out_amount, out_partner = index.outgoing(b)
+    assert list(index.nodes[out_partner]) == ['C', 'A']
+    assert index.in_total[b] == 150.0
+    assert index.out_total[b] == 110.0
+
+    assert len(index.timestamps(b)) == 4
+    assert index.first_seen[b] == pd.Timestamp('2026-02-01 09:00:00').value
+    assert index.last_seen[b] == pd.Timestamp('2026-02-10 12:00:00').value
+
+def test_transaction_page_cursor_and_filters():
+    df = pd.read_csv(io.StringIO(CSV))
+    G = build_graph(df)
+    index = get_account_index(G)
+    store = index.store
+    b = index.id_of('B')
+
+    def ids(rows):
+        return [store.transaction(r)['transaction_id'] for r in rows]
+
+    # Newest first, two per page
+    rows, incoming, cursor, total = index.transaction_page(b, 2)
+    assert (ids(rows), incoming, total) == (['T4', 'T2'], [False, False], 4)
+    rows, incoming, cursor, _ = index.transaction_page(b, 2, cursor)
+    assert (ids(rows), incoming, cursor) == (['T1', 'T3'], [True, True], None)
+
+    rows, _, cursor, total = index.transaction_page(b, 10, direction='in')
+    assert (ids(rows), total, cursor) == (['T1', 'T3'], 2, None)
+
+    start = pd.Timestamp('2026-02-01 10:00:00').value
+    end = pd.Timestamp('2026-02-03 11:00:00').value
+    rows, _, _, total = index.transaction_page(b, 10, start=start, end=end)
+    assert (ids(rows), total) == (['T2', 'T1'], 2)
@@ -0,0 +1,326 @@
+import sys
+import time
+import os
+import pytest
+
+# Add backend to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app import ingest
+
+client = TestClient(app)
+
+CSV = """from_account,to_account,amount,timestamp
+A,B,100.00,2026-02-01 10:00:00
+B,C,90.00,2026-02-01 11:00:00
+C,A,95.00,2026-02-01 12:00:00
+N,O,5.00,2026-02-04 10:00:00
+O,P,5.00,2026-02-04 11:00:00
+P,Q,5.00,2026-02-04 12:00:00
+"""
+
+def _upload(content, name="tx.csv"):
+    return client.post("/upload", files={"file": (name, content, "text/csv")})
+
+def test_upload_streams_chunks(monkeypatch):
+    # Force several chunks so ids/columns are handled across chunk boundaries
+    monkeypatch.setattr(ingest, "CHUNK_ROWS", 2)
+
+    res = _upload(CSV)
+    assert res.status_code == 200
+    body = res.json()
+    assert body["summary"]["total_accounts_analyzed"] == 7
+    cycle = next(r for r in body["fraud_rings"] if r["pattern_type"] == "cycle")
+    assert cycle["member_accounts"] == ["A", "B", "C"]
+
+    account = client.get("/account/A").json()
+    assert [tx["id"] for tx in account["recentTransactions"]] == ["TXN_2", "TXN_0"]
+    assert account["scoreBreakdown"][0] == {"reason": "In Cycle", "points": 50}
+
+def test_account_transactions_paginated():
+    rows = "".join(f"H{i},S{i % 7},HUB,{10 + i}.00,2026-03-01 {i // 60:02d}:{i % 60:02d}:00\n" for i in range(120))
+    rows += "".join(f"G{i},HUB,R{i},5.00,2026-03-02 10:{i:02d}:00\n" for i in range(5))
+    run_id = _upload("transaction_id,sender_id,receiver_id,amount,timestamp\n" + rows).headers["X-Run-ID"]
+
+    page = client.get(f"/runs/{run_id}/account/HUB", params={"limit": 50}).json()
+    assert page["totalTransactions"] == 125
+    assert [tx["id"] for tx in page["recentTransactions"][:6]] == ["G4", "G3", "G2", "G1", "G0", "H119"]
+
+    seen = [tx["id"] for tx in page["recentTransactions"]]
+    while page["nextCursor"] is not None:
+        page = client.get(f"/runs/{run_id}/account/HUB", params={"limit": 50, "cursor": page["nextCursor"]}).json()
+        seen += [tx["id"] for tx in page["recentTransactions"]]
+    assert len(seen) == len(set(seen)) == 125
+
+    outgoing = client.get(f"/runs/{run_id}/account/HUB", params={"direction": "out"}).json()
+    assert [tx["type"] for tx in outgoing["recentTransactions"]] == ["Outgoing"] * 5
+
+    window = client.get(f"/runs/{run_id}/account/HUB",
+                        params={"start": "2026-03-01 01:00:00", "end": "2026-03-01 01:09:00"}).json()
+    assert [tx["id"] for tx in window["recentTransactions"]] == [f"H{i}" for i in range(69, 59, -1)]
+
+    assert client.get(f"/runs/{run_id}/account/HUB", params={"direction": "sideways"}).status_code == 422
+    assert client.get(f"/runs/{run_id}/account/HUB", params={"start": "not a date"}).status_code == 400
+
+def test_ring_payload_aggregated_and_cached():
+    from app import api
+    rows = "".join(f"K{i},X,Y,{i + 1}.00,2026-04-01 10:{i:02d}:00\n" for i in range(4))
+    rows += "Y1,Y,Z,50.00,2026-04-01 11:00:00\nZ1,Z,X,40.00,2026-04-01 12:00:00\n"
+    run_id = _upload("transaction_id,sender_id,receiver_id,amount,timestamp\n" + rows).headers["X-Run-ID"]
+
+    detail = client.get(f"/runs/{run_id}/ring/RING_001").json()
+    assert not detail["aggregated"] and len(detail["edges"]) == 6
+    session = api.SESSIONS.get(run_id)
+    assert api.RING_PAYLOADS.get_or_build(session, "RING_001") is api.RING_PAYLOADS.get_or_build(session, "RING_001")
+
+    summary = client.get(f"/runs/{run_id}/ring/RING_001", params={"aggregate": True}).json()
+    xy = next(e for e in summary["edges"] if e["id"] == "X-Y")
+    assert (xy["transactionCount"], xy["amount"]) == (4, 10.0)
+    assert (xy["firstTimestamp"], xy["lastTimestamp"]) == ("2026-04-01 10:00:00", "2026-04-01 10:03:00")
+
+    edge = client.get(f"/runs/{run_id}/ring/RING_001/transactions", params={"source": "X", "target": "Y"}).json()
+    assert [tx["transaction_id"] for tx in edge["transactions"]] == ["K0", "K1", "K2", "K3"]
+    assert client.get(f"/runs/{run_id}/ring/RING_001/transactions",
+                      params={"source": "Y", "target": "X"}).status_code == 404
+    assert client.get(f"/runs/{run_id}/ring/RING_999").status_code == 404
+
+def test_ring_payload_repeated_member():
+    from app import api
+    from app.sessions import RunSession
+    from app.ring_payloads import build_ring_payload
+    run_id = _upload(CSV).headers["X-Run-ID"]
+    session = api.SESSIONS.get(run_id)
+    ring = next(r for r in session.rings if r["member_accounts"] == ["A", "B", "C"])
+
+    repeated = RunSession("repeated", session.G, [dict(ring, member_accounts=["A", "B", "C", "A"])], session.scores)
+    payload = build_ring_payload(repeated, ring["ring_id"])
+    assert [n["id"] for n in payload["nodes"]] == ["A", "B", "C"]
+    assert payload["edges"] == build_ring_payload(session, ring["ring_id"])["edges"]
+
+def test_result_as_ndjson():
+    import json
+    run_id = _upload(CSV + "Q,R,2.00,2026-02-06 12:00:00\n").headers["X-Run-ID"]
+
+    res = client.get(f"/runs/{run_id}/result", params={"format": "ndjson"})
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in res.text.splitlines()]
+    assert lines[0]["summary"]["total_accounts_analyzed"] == 8
+    assert sum("suspicious_account" in line for line in lines) == 8
+
+    download = [json.loads(line) for line in client.get(f"/download/{run_id}", params={"format": "ndjson"}).text.splitlines()]
+    flagged = [line["suspicious_account"] for line in download if "suspicious_account" in line]
+    assert flagged and all(acc["suspicion_score"] > 0 or acc["ring_id"] for acc in flagged)
+    assert client.get(f"/runs/{run_id}/result", params={"format": "xml"}).status_code == 422
+
+def test_upload_top_n_and_query_api():
+    rows = "T1,A,B,100.00,2026-05-01 09:00:00\nT2,B,C,90.00,2026-05-01 09:10:00\nT3,C,A,95.00,2026-05-01 09:20:00\n"
+    rows += "".join(f"F{i},S{i},SINK,{100 + i}.00,2026-05-01 10:{i:02d}:00\n" for i in range(12))
+    res = client.post("/upload", params={"top": 3},
+                      files={"file": ("tx.csv", "transaction_id,sender_id,receiver_id,amount,timestamp\n" + rows, "text/csv")})
+    run_id = res.headers["X-Run-ID"]
+    body = res.json()
+    assert len(body["suspicious_accounts"]) == 3
+    assert body["summary"]["total_accounts_analyzed"] == 16
+
+    full = client.get(f"/runs/{run_id}/result").json()
+    page = client.get(f"/runs/{run_id}/accounts", params={"limit": 5}).json()
+    assert page["total"] == 16
+    # Same account fields as the result document
+    assert page["accounts"] == full["suspicious_accounts"][:5]
+
+    seen, cursor = [], 0
+    while cursor is not None:
+        page = client.get(f"/runs/{run_id}/accounts", params={"min_score": 1, "limit": 4, "cursor": cursor}).json()
+        seen += page["accounts"]
+        cursor = page["nextCursor"]
+    assert [a["account_id"] for a in seen] == [a["account_id"] for a in full["suspicious_accounts"] if a["suspicion_score"] >= 1]
+
+    fan_in = client.get(f"/runs/{run_id}/accounts", params={"pattern": "fan_in"}).json()
+    assert [a["account_id"] for a in fan_in["accounts"]] == ["SINK"]
+    cycle = client.get(f"/runs/{run_id}/rings", params={"type": "cycle"}).json()
+    assert [r["member_accounts"] for r in cycle["rings"]] == [["A", "B", "C"]]
+    ring_id = cycle["rings"][0]["ring_id"]
+    members = client.get(f"/runs/{run_id}/accounts", params={"ring": ring_id}).json()
+    assert sorted(a["account_id"] for a in members["accounts"]) == ["A", "B", "C"]
+    assert client.get(f"/runs/{run_id}/accounts", params={"ring": "RING_999"}).status_code == 404
+
+def test_upload_rejects_bad_input():
+    assert _upload(CSV, name="tx.txt").status_code == 400
+    assert _upload("sender_id,amount\nA,1\n").status_code == 400
+    assert _upload("sender_id,receiver_id,amount\nA,B,1\n").json()["detail"] == "Missing timestamp column"
+
+def test_background_run_reports_stages():
+    content = CSV + "Q,R,7.00,2026-02-05 12:00:00\n"
+    res = client.post("/runs", files={"file": ("tx.csv", content, "text/csv")})
+    assert res.status_code == 202
+    run_id = res.json()["run_id"]
+
+    for _ in range(200):
+        status = client.get(f"/runs/{run_id}").json()
+        if status["status"] in ("done", "failed"):
+            break
+        time.sleep(0.05)
+
+    assert status["status"] == "done"
+    stages = [s["name"] for s in status["stages"]]
+    assert stages[:4] == ["hash", "ingest", "graph", "index"]
+    assert "cycles" in stages and stages[-1] == "output"
+
+    result = client.get(f"/runs/{run_id}/result").json()
+    assert result["summary"]["total_accounts_analyzed"] == 8
+    assert client.get("/runs/missing/result").status_code == 404
+
+def test_run_scoped_sessions(monkeypatch):
+    from app import api
+
+    first = _upload(CSV).headers["X-Run-ID"]
+    # No memory budget: the next upload evicts every other resident session
+    monkeypatch.setattr(api.SESSIONS, "max_bytes", 0)
+    second = _upload("sender_id,receiver_id,amount,timestamp\nX,Y,1.0,2026-02-01 10:00:00\n").headers["X-Run-ID"]
+    assert first not in api.SESSIONS._memory
+
+    # Legacy route follows the latest upload, run-scoped routes keep their own graph
+    assert client.get("/account/A").status_code == 404
+    assert client.get(f"/runs/{second}/account/X").status_code == 200
+
+    # The evicted run is rebuilt from its snapshot
+    restored = client.get(f"/runs/{first}/account/A").json()
+    assert [tx["id"] for tx in restored["recentTransactions"]] == ["TXN_2", "TXN_0"]
+    assert client.get(f"/runs/{first}/ring/RING_001").json()["patternType"] == "cycle"
+    assert client.get("/runs/unknown/account/A").status_code == 404
+
+def test_repeat_upload_served_from_cache():
+    content = "transaction_id,sender_id,receiver_id,amount,timestamp\nD1,K,L,3.0,2026-03-01 10:00:00\nD2,L,M,4.0,2026-03-01 11:00:00\n"
+    reordered = "amount,timestamp,receiver_id,sender_id,transaction_id\n3.0,2026-03-01 10:00:00,L,K,D1\n4.0,2026-03-01 11:00:00,M,L,D2\n"
+
+    first = _upload(content)
+    again = _upload(content)
+    shuffled = _upload(reordered)
+
+    run_id = first.headers["X-Run-ID"]
+    assert again.headers["X-Run-ID"] == run_id
+    assert shuffled.headers["X-Run-ID"] == run_id
+    assert shuffled.json() == first.json()
+
+    chain = client.get("/blockchain").json()["chain"]
+    hits = [b["data"] for b in chain if b["data"].get("cache_hit")]
+    assert hits[-1]["run_id"] == run_id
+
+def test_append_to_run():
+    base = "transaction_id,sender_id,receiver_id,amount,timestamp\nE1,U,V,10.0,2026-04-01 10:00:00\nE2,V,W,10.0,2026-04-01 11:00:00\n"
+    delta = "transaction_id,sender_id,receiver_id,amount,timestamp\nE3,W,U,10.0,2026-04-01 12:00:00\n"
+
+    parent = _upload(base).headers["X-Run-ID"]
+    res = client.post(f"/runs/{parent}/append", files={"file": ("delta.csv", delta, "text/csv")})
+    assert res.status_code == 200
+
+    run_id = res.headers["X-Run-ID"]
+    assert run_id != parent
+    cycle = next(r for r in res.json()["fraud_rings"] if r["pattern_type"] == "cycle")
+    assert cycle["member_accounts"] == ["U", "V", "W"]
+
+    # Parent run is unchanged; the appended run has the merged transactions
+    assert not client.get(f"/download/{parent}").json()["fraud_rings"]
+    account = client.get(f"/runs/{run_id}/account/U").json()
+    assert sorted(tx["id"] for tx in account["recentTransactions"]) == ["E1", "E3"]
+
+    assert client.post("/runs/unknown/append", files={"file": ("delta.csv", delta, "text/csv")}).status_code == 404
+
+def test_rescore_run():
+    run_id = _upload(CSV.replace("100.00", "102.00")).headers["X-Run-ID"]
+    before = {a["account_id"]: a["suspicion_score"] for a in client.get(f"/download/{run_id}").json()["suspicious_accounts"]}
+
+    from app.model.rules import DEFAULT_RULES_PATH
+    import json
+    with open(DEFAULT_RULES_PATH) as f:
+        rules = json.load(f)
+    rules["points"]["cycle"] = 20
+
+    res = client.post(f"/runs/{run_id}/rescore", json=rules)
+    assert res.status_code == 200
+    rescored = res.headers["X-Run-ID"]
+    assert rescored != run_id
+    after = {a["account_id"]: a["suspicion_score"] for a in res.json()["suspicious_accounts"]}
+    assert after["A"] == before["A"] - 30
+    assert after["N"] == before["N"]
+    # Same rings, new risk scores; breakdowns follow the new weights
+    assert [r["member_accounts"] for r in res.json()["fraud_rings"]][0] == ["A", "B", "C"]
+    account = client.get(f"/runs/{rescored}/account/A").json()
+    assert account["scoreBreakdown"][0] == {"reason": "In Cycle", "points": 20}
+
+    # No body: the current rule file, which gives back the original scores
+    res = client.post(f"/runs/{rescored}/rescore")
+    assert {a["account_id"]: a["suspicion_score"] for a in res.json()["suspicious_accounts"]} == before
+
+    rules["points"]["cycle"] = "lots"
+    assert client.post(f"/runs/{run_id}/rescore", json=rules).status_code == 400
+    assert client.post("/runs/unknown/rescore").status_code == 404
+
+def test_csr_graph_backend(monkeypatch):
+    from app import api
+    monkeypatch.setattr(api, "GRAPH_BACKEND", "csr")
+
+    content = CSV.replace("100.00", "101.00")
+    res = _upload(content)
+    run_id = res.headers["X-Run-ID"]
+    assert res.json()["fraud_rings"][0]["member_accounts"] == ["A", "B", "C"]
+
+    account = client.get(f"/runs/{run_id}/account/A").json()
+    assert [tx["id"] for tx in account["recentTransactions"]] == ["TXN_2", "TXN_0"]
+    ring = client.get(f"/runs/{run_id}/ring/RING_001").json()
+    assert sorted(e["id"] for e in ring["edges"]) == ["A-B-TXN_0", "B-C-TXN_1", "C-A-TXN_2"]
+    assert all(node["rings"] == ["RING_001"] for node in ring["nodes"])
+
+def test_parquet_upload():
+    pa = pytest.importorskip("pyarrow")
+    import io
+    import pyarrow.parquet as pq
+
+    table = pa.table({
+        "sender_id": ["P1", "P2", "P3"],
+        "receiver_id": ["P2", "P3", "P1"],
+        "amount": [5.0, 6.0, 7.0],
+        "timestamp": pa.array([1_780_000_000_000, 1_780_000_360_000, 1_780_000_720_000], type=pa.timestamp("ms")),
+    })
+    buf = io.BytesIO()
+    pq.write_table(table, buf)
+
+    res = client.post("/upload", files={"file": ("tx.parquet", buf.getvalue(), "application/octet-stream")})
+    assert res.status_code == 200
+    assert res.json()["fraud_rings"][0]["member_accounts"] == ["P1", "P2", "P3"]
+
+def test_columnar_download():
+    pa = pytest.importorskip("pyarrow")
+    import io
+    import pyarrow.parquet as pq
+
+    run_id = _upload(CSV.replace("5.00", "6.00")).headers["X-Run-ID"]
+    json_accounts = client.get(f"/download/{run_id}").json()["suspicious_accounts"]
+
+    res = client.get(f"/download/{run_id}", params={"format": "parquet"})
+    assert res.headers["content-type"] == "application/vnd.apache.parquet"
+    assert pq.read_table(io.BytesIO(res.content)).to_pylist() == json_accounts
+
+    members = client.get(f"/download/{run_id}", params={"format": "arrow", "table": "ring_members", "compressed": True})
+    rows = pa.ipc.open_file(io.BytesIO(members.content)).read_all().to_pylist()
+    assert [r["account_id"] for r in rows if r["ring_id"] == "RING_001"] == ["A", "B", "C"]
+
+    breakdowns = pq.read_table(io.BytesIO(client.get(
+        f"/download/{run_id}", params={"format": "parquet", "table": "score_breakdowns", "compressed": True}).content))
+    a_rows = [(r["reason"], r["points"]) for r in breakdowns.to_pylist() if r["account_id"] == "A"]
+    assert a_rows == [(b["reason"], b["points"]) for b in client.get(f"/runs/{run_id}/account/A").json()["scoreBreakdown"]]
+
+    assert client.get(f"/download/{run_id}", params={"format": "parquet", "table": "nope"}).status_code == 422
+    assert client.get("/download/unknown", params={"format": "arrow"}).status_code == 404
+
+def test_columnar_download_after_session_is_gone(monkeypatch):
+    from app import api
+    run_id = _upload(CSV.replace("5.00", "7.00")).headers["X-Run-ID"]
+    monkeypatch.setattr(api.SESSIONS, "get", lambda rid: None)
+
+    res = client.get(f"/download/{run_id}", params={"format": "parquet"})
+    assert res.status_code == 409
+    assert "format=json" in res.json()["detail"]
+    assert client.get(f"/download/{run_id}").status_code == 200
@@ -0,0 +1,57 @@
+import json
+import random
+import sys
+import os
+import networkx as nx
+import pandas as pd
+
+# Add backend to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.model.graph_builder import TransactionStore, graph_from_store
+from app.model.csr_graph import CSRGraph
+from app.model.scoring import analyze_graph
+
+def _random_transactions(seed=7, n=500):
+    rng = random.Random(seed)
+    accounts = [f"ACC_{i:03d}" for i in range(100)] + ['HUB']
+    base = pd.Timestamp('2026-02-01')
+    rows = []
+    for i in range(n):
+        s, r = rng.choice(accounts), rng.choice(accounts)  # includes self-loops
+        rows.append((f"T{i}", s, r, round(rng.uniform(10, 2000), 2), base + pd.Timedelta(hours=rng.randint(0, 240))))
+    return pd.DataFrame(rows, columns=['transaction_id', 'sender_id', 'receiver_id', 'amount', 'timestamp'])
+
+def test_csr_matches_networkx_api():
+    store = TransactionStore.from_frame(_random_transactions())
+    G = graph_from_store(store)
+    C = graph_from_store(store, 'csr')
+    assert isinstance(C, CSRGraph)
+
+    assert list(C.nodes()) == list(G.nodes())
+    assert list(C.edges()) == list(G.edges())
+    assert C.number_of_edges() == G.number_of_edges()
+    assert dict(C.degree()) == dict(G.degree())
+    for n in G.nodes():
+        assert list(C.successors(n)) == list(G.successors(n))
+        assert list(C.predecessors(n)) == list(G.predecessors(n))
+        assert (C.in_degree(n), C.out_degree(n)) == (G.in_degree(n), G.out_degree(n))
+
+    u, v = next(iter(G.edges()))
+    assert C.has_edge(u, v) and not C.has_edge(u, 'missing')
+    assert list(C[u][v]['transactions']) == list(G[u][v]['transactions'])
+
+    expected = sorted(sorted(c) for c in nx.strongly_connected_components(G))
+    assert sorted(sorted(c) for c in C.strongly_connected_components()) == expected
+
+    shell = {n for n, d in G.degree() if d <= 3}
+    sub_g, sub_c = G.subgraph(shell), C.subgraph(shell)
+    assert sorted(sub_c.nodes()) == sorted(sub_g.nodes())
+    assert all(list(sub_c.successors(n)) == list(sub_g.successors(n)) for n in shell)
+
+def test_csr_analysis_matches_networkx():
+    store = TransactionStore.from_frame(_random_transactions())
+
+    expected = analyze_graph(graph_from_store(store), None)
+    assert json.dumps(analyze_graph(graph_from_store(store, 'csr'), None)) == json.dumps(expected)
+    assert json.dumps(analyze_graph(graph_from_store(store, 'csr'), None, workers=2)) == json.dumps(expected)
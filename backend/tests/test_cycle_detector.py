@@ -0,0 +1,58 @@
+import random
+import sys
+import os
+import networkx as nx
+import pytest
+
+# Add backend to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.model.cycle_detector import detect_cycles, find_component_cycles
+
+def _exhaustive_cycles(G, min_length, max_length):
+    """The original search: DFS from every node over the whole graph, rotated to the smallest node."""
+    cycles = set()
+    for start in sorted(G.nodes()):
+        stack = [(start, [start])]
+        while stack:
+            curr, path = stack.pop()
+            for nbr in sorted(G.successors(curr)):
+                if nbr == start:
+                    if min_length <= len(path) <= max_length:
+                        k = path.index(min(path))
+                        cycles.add(tuple(path[k:] + path[:k]))
+                elif nbr not in path and len(path) < max_length:
+                    stack.append((nbr, path + [nbr]))
+    return sorted(cycles)
+
+def _graph_with_several_sccs(seed=4):
+    rng = random.Random(seed)
+    G = nx.DiGraph()
+    blocks = [[f"B{b}_{i}" for i in range(7)] for b in range(4)]
+    for block in blocks:
+        for _ in range(18):
+            u, v = rng.sample(block, 2)
+            G.add_edge(u, v)
+    # One-way links between the blocks (and a tail) do not merge components
+    for a, b in zip(blocks, blocks[1:]):
+        G.add_edge(rng.choice(a), rng.choice(b))
+    G.add_edge(blocks[-1][0], "TAIL")
+    return G
+
+@pytest.mark.parametrize("min_length,max_length", [(3, 5), (3, 4), (2, 3)])
+def test_component_search_matches_exhaustive_search(min_length, max_length):
+    G = _graph_with_several_sccs()
+    components = [c for c in nx.strongly_connected_components(G) if len(c) > 1]
+    assert len(components) >= 3
+
+    expected = _exhaustive_cycles(G, min_length, max_length)
+    assert expected
+    assert detect_cycles(G, min_length, max_length) == expected
+
+    per_component = []
+    for component in components:
+        found = find_component_cycles(G, component, min_length, max_length)
+        assert len(found) == len(set(found))
+        assert all(set(c) <= component for c in found)
+        per_component.extend(found)
+    assert sorted(per_component) == expected
@@ -0,0 +1,31 @@
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add backend to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.model.fan_detector import sliding_window_stats
+
+def test_sliding_window_matches_brute_force():
+    base = datetime(2026, 2, 1)
+    hours = [0, 1, 1, 5, 30, 71, 72, 73, 100, 140, 143, 144, 200]
+    timestamps = [base + timedelta(hours=h) for h in hours]
+    partners = ['A', 'B', 'A', 'C', 'D', 'E', 'F', 'A', 'G', 'H', 'I', 'J', 'K']
+
+    max_distinct, hit, max_count = sliding_window_stats(timestamps, partners, threshold=6)
+
+    # Per-start rescan (the old O(n^2) definition): window end is inclusive
+    expected_distinct = 0
+    expected_count = 0
+    for i, start in enumerate(timestamps):
+        window = [j for j in range(i, len(timestamps)) if timestamps[j] <= start + timedelta(hours=72)]
+        expected_distinct = max(expected_distinct, len({partners[j] for j in window}))
+        expected_count = max(expected_count, len(window))
+
+    assert max_distinct == expected_distinct == 6
+    assert max_count == expected_count == 7
+    assert hit
+
+def test_sliding_window_empty():
+    assert sliding_window_stats([], []) == (0, False, 0)
@@ -0,0 +1,36 @@
+import pandas as pd
+import sys
+import os
+import io
+
+# Add backend to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.model.graph_builder import build_graph
+
+CSV = """transaction_id,sender_id,receiver_id,amount,timestamp
+T1,A,B,100.00,2026-02-01 10:00:00
+T2,B,C,90.00,2026-02-01 11:00:00
+T3,A,B,50.00,2026-02-01 09:00:00
+T4,C,A,95.00,2026-02-01 12:00:00
+T5,A,B,25.00,2026-02-01 09:00:00
+"""
+
+def test_columnar_graph_matches_rows():
+    df = pd.read_csv(io.StringIO(CSV))
+    G = build_graph(df)
+
+    assert list(G.nodes()) == ['A', 'B', 'C']
+    assert list(G.edges()) == [('A', 'B'), ('B', 'C'), ('C', 'A')]
+
+    # Edge transactions are ordered by timestamp, ties keep upload order
+    txs = G['A']['B']['transactions']
+    assert len(txs) == 3
+    assert [tx['transaction_id'] for tx in txs] == ['T3', 'T5', 'T1']
+    assert [tx['amount'] for tx in txs] == [50.0, 25.0, 100.0]
+    assert txs[-1]['timestamp'] == pd.Timestamp('2026-02-01 10:00:00')
+
+    store = G.graph['store']
+    assert store.num_nodes == 3
+    assert store.num_edges == 3
+    assert list(store.nodes[store.src]) == ['A', 'A', 'A', 'B', 'C']
@@ -0,0 +1,76 @@
+import json
+import random
+import sys
+import os
+import pandas as pd
+
+# Add backend to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.ingest import add_chunk
+from app.model.graph_builder import StoreBuilder, graph_from_store
+from app.model.scoring import analyze_graph
+from app.model.incremental import analyze_appended
+
+def _random_transactions(seed=3, n=400):
+    rng = random.Random(seed)
+    accounts = [f"ACC_{i:03d}" for i in range(120)] + ['HUB']
+    base = pd.Timestamp('2026-02-01')
+    rows = []
+    for i in range(n):
+        s, r = rng.sample(accounts, 2)
+        rows.append((f"T{i}", s, r, round(rng.uniform(10, 2000), 2), base + pd.Timedelta(hours=rng.randint(0, 240))))
+    return pd.DataFrame(rows, columns=['transaction_id', 'sender_id', 'receiver_id', 'amount', 'timestamp'])
+
+def _store(df, builder=None):
+    builder = builder or StoreBuilder()
+    add_chunk(builder, df.copy())
+    return builder.build()
+
+def _rows(*rows):
+    return pd.DataFrame(
+        [(tid, s, r, 50.0, pd.Timestamp('2026-02-05') + pd.Timedelta(hours=h)) for tid, s, r, h in rows],
+        columns=['transaction_id', 'sender_id', 'receiver_id', 'amount', 'timestamp'],
+    )
+
+def test_append_matches_full_analysis():
+    df = _random_transactions()
+    # Base: half of a shell chain, a complete shell chain and part of a fan-in
+    fixed_base = _rows(
+        ("B1", "PRE", "S1", 0), ("B2", "S1", "S2", 1),
+        ("B3", "ACC_010", "T1", 0), ("B4", "T1", "T2", 1), ("B5", "T2", "ACC_011", 2),
+        *[(f"F{i}", f"ACC_{20 + i:03d}", "FAN", i) for i in range(6)],
+    )
+    # Delta: completes the first chain, breaks the second (T1 degree > 3),
+    # completes the fan-in and adds a cycle through a new account
+    fixed_delta = _rows(
+        ("D1", "S2", "POST", 2),
+        ("D2", "T1", "ACC_012", 3), ("D3", "T1", "ACC_013", 3),
+        *[(f"G{i}", f"ACC_{30 + i:03d}", "FAN", 10 + i) for i in range(5)],
+        ("X1", "NEW_1", "ACC_001", 0), ("X2", "ACC_001", "ACC_002", 1), ("X3", "ACC_002", "NEW_1", 2),
+    )
+
+    for cut in (200, 380):
+        base_rows = pd.concat([df.iloc[:cut], fixed_base], ignore_index=True)
+        delta_rows = pd.concat([df.iloc[cut:], fixed_delta], ignore_index=True)
+
+        base_store = _store(base_rows)
+        base = graph_from_store(base_store)
+        analyze_graph(base, None)
+
+        G = graph_from_store(_store(delta_rows, StoreBuilder.from_store(base_store)))
+        appended = analyze_appended(G, base)
+
+        full = analyze_graph(graph_from_store(_store(pd.concat([base_rows, delta_rows], ignore_index=True))), None)
+        assert json.dumps(appended) == json.dumps(full)
+
+    patterns = {r['pattern_type'] for r in appended[1]}
+    assert {'cycle', 'fan_in', 'shell_chain'} <= patterns
+
+def test_append_without_cached_analysis_runs_full_pass():
+    df = _random_transactions(n=200)
+    base_store = _store(df.iloc[:100])
+    base = graph_from_store(base_store)  # never analyzed
+
+    G = graph_from_store(_store(df.iloc[100:], StoreBuilder.from_store(base_store)))
+    assert analyze_appended(G, base) == analyze_graph(graph_from_store(_store(df)), None)
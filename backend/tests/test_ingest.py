@@ -0,0 +1,90 @@
+import decimal
+import io
+import sys
+import os
+import pandas as pd
+import pytest
+
+# Add backend to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import ingest
+from app.ingest import read_transactions, IngestError
+
+pa = pytest.importorskip("pyarrow")
+import pyarrow.parquet as pq
+
+CSV = """transaction_id,from_account,to_account,amount,timestamp
+T1,A,B,100.50,2026-02-01 10:00:00
+T2,B,C,90.25,2026-02-01 11:00:00
+T3,C,A,95.00,2026-02-01 12:00:00
+"""
+
+def _typed_table(extra_column=True):
+    columns = {
+        "transaction_id": pa.array(["T1", "T2", "T3"]),
+        "from_account": pa.array(["A", "B", "C"]),
+        "to_account": pa.array(["B", "C", "A"]),
+        "amount": pa.array([decimal.Decimal("100.50"), decimal.Decimal("90.25"), decimal.Decimal("95.00")],
+                           type=pa.decimal128(12, 2)),
+        "timestamp": pa.array(pd.to_datetime(["2026-02-01 10:00", "2026-02-01 11:00", "2026-02-01 12:00"]),
+                              type=pa.timestamp("us")),
+    }
+    if extra_column:
+        columns["memo"] = pa.array(["x", "y", "z"])
+    return pa.table(columns)
+
+def _parquet_bytes(table):
+    buf = io.BytesIO()
+    pq.write_table(table, buf, row_group_size=2)
+    buf.seek(0)
+    return buf
+
+def _arrow_bytes(table, stream=False):
+    buf = io.BytesIO()
+    opener = pa.ipc.new_stream if stream else pa.ipc.new_file
+    with opener(buf, table.schema) as writer:
+        writer.write_table(table, max_chunksize=2)
+    buf.seek(0)
+    return buf
+
+def test_typed_uploads_match_csv(monkeypatch):
+    monkeypatch.setattr(ingest, "CHUNK_ROWS", 2)
+    expected = read_transactions(io.BytesIO(CSV.encode()), "tx.csv")
+
+    for name, fileobj in (
+        ("tx.parquet", _parquet_bytes(_typed_table())),
+        ("tx.arrow", _arrow_bytes(_typed_table())),
+        ("tx.ipc", _arrow_bytes(_typed_table(), stream=True)),
+    ):
+        store = read_transactions(fileobj, name)
+        assert store.content_hash == expected.content_hash, name
+        assert store.nodes.tolist() == ["A", "B", "C"]
+        assert store.amount.tolist() == expected.amount.tolist()
+
+def test_typed_upload_errors():
+    table = _typed_table().drop(["timestamp"])
+    with pytest.raises(IngestError, match="Missing timestamp column"):
+        read_transactions(_parquet_bytes(table), "tx.parquet")
+
+    with pytest.raises(IngestError, match="Corrupt Parquet file"):
+        read_transactions(io.BytesIO(b"not parquet"), "tx.parquet")
+    with pytest.raises(IngestError, match="Corrupt Arrow file"):
+        read_transactions(io.BytesIO(b"not arrow"), "tx.arrow")
+
+def test_csv_id_types_fixed_across_chunks():
+    # Chunk 1 has only numeric-looking ids, chunk 2 mixes in text and a missing id
+    content = "transaction_id,sender_id,receiver_id,amount,timestamp\n" \
+              "1,00123,200,5.0,2026-02-01 10:00:00\n" \
+              "T2,X,00123,6.0,2026-02-01 11:00:00\n" \
+              "T3,200,,7.0,2026-02-01 12:00:00\n"
+    store = read_transactions(io.BytesIO(content.encode()), "tx.csv", chunk_rows=1)
+    # One node per account: no 123 / 200.0 variants from per-chunk type inference
+    assert sorted(store.nodes.tolist()) == ["00123", "200", "X"]
+    assert "1" in store.txn_ids.tolist()
+
+def test_header_only_csv_is_validated():
+    with pytest.raises(IngestError):
+        read_transactions(io.BytesIO(b"sender_id,amount\n"), "tx.csv")
+    store = read_transactions(io.BytesIO(b"sender_id,receiver_id,amount,timestamp\n"), "tx.csv")
+    assert store.num_nodes == 0
@@ -0,0 +1,29 @@
+import json
+import random
+import sys
+import os
+import pandas as pd
+
+# Add backend to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.model.graph_builder import build_graph
+from app.model.scoring import analyze_graph
+
+def _random_transactions(seed=1, n=600):
+    rng = random.Random(seed)
+    accounts = [f"ACC_{i:03d}" for i in range(80)] + ['HUB']
+    base = pd.Timestamp('2026-02-01')
+    rows = []
+    for i in range(n):
+        s, r = rng.sample(accounts, 2)
+        rows.append((f"T{i}", s, r, round(rng.uniform(10, 2000), 2), base + pd.Timedelta(hours=rng.randint(0, 240))))
+    return pd.DataFrame(rows, columns=['transaction_id', 'sender_id', 'receiver_id', 'amount', 'timestamp'])
+
+def test_parallel_matches_serial():
+    df = _random_transactions()
+
+    serial = analyze_graph(build_graph(df.copy()), df)
+    parallel = analyze_graph(build_graph(df.copy()), df, workers=2)
+
+    assert json.dumps(parallel) == json.dumps(serial)
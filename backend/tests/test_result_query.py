@@ -0,0 +1,76 @@
+import random
+import sys
+import os
+import pytest
+
+# Add backend to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.model.ring_index import RingIndex
+from app.model.result_query import ResultQuery, top_result
+
+PATTERNS = ['cycle', 'fan_in', 'fan_out', 'shell', 'high_velocity']
+
+def _run(seed=1, n=300):
+    rng = random.Random(seed)
+    ring_index = RingIndex()
+    for _ in range(25):
+        rid = ring_index.add(rng.choice(['cycle', 'shell_chain', 'fan_in']), [f"A{rng.randrange(n):03d}" for _ in range(4)])
+        ring_index.get(rid)['risk_score'] = rng.choice([10.0, 55.5, 80.0])
+    accounts = [{
+        "account_id": f"A{i:03d}",
+        "suspicion_score": rng.choice([0.0, 12.5, 40.0, 40.0, 75.25, 90.0]),
+        "detected_patterns": sorted(rng.sample(PATTERNS, rng.randrange(3))),
+    } for i in range(n)]
+    accounts.sort(key=lambda a: (-a['suspicion_score'], a['account_id']))
+    return accounts, ring_index
+
+def _walk(page_fn, limit):
+    rows, cursor = [], 0
+    while cursor is not None:
+        page, cursor, total = page_fn(limit, cursor)
+        rows += page
+    assert len(rows) == total
+    return rows
+
+@pytest.mark.parametrize("min_score,pattern,ring", [
+    (None, None, None), (40.0, None, None), (None, 'shell', None),
+    (12.5, 'fan_in', None), (None, None, 'RING_003'), (40.0, 'cycle', 'RING_007'), (None, 'unknown', None),
+])
+def test_account_pages_match_filter(min_score, pattern, ring):
+    accounts, ring_index = _run()
+    query = ResultQuery(accounts, ring_index)
+    members = set(ring_index.get(ring)['member_accounts']) if ring else None
+    expected = [a for a in accounts
+                if (min_score is None or a['suspicion_score'] >= min_score)
+                and (pattern is None or pattern in a['detected_patterns'])
+                and (members is None or a['account_id'] in members)]
+
+    for limit in (1, 7, 1000):
+        assert _walk(lambda l, c: query.accounts_page(l, c, min_score, pattern, ring), limit) == expected
+
+def test_accounts_put_in_output_order():
+    accounts, ring_index = _run()
+    shuffled = list(accounts)
+    random.Random(2).shuffle(shuffled)
+    query = ResultQuery(shuffled, ring_index)
+    assert _walk(lambda l, c: query.accounts_page(l, c, min_score=40.0), 7) == [
+        a for a in accounts if a['suspicion_score'] >= 40.0]
+
+def test_ring_pages_by_risk():
+    accounts, ring_index = _run()
+    query = ResultQuery(accounts, ring_index)
+    rings = _walk(lambda l, c: query.rings_page(l, c, min_risk=50, pattern_type='cycle'), 4)
+    assert rings == sorted((r for r in ring_index if r['risk_score'] >= 50 and r['pattern_type'] == 'cycle'),
+                           key=lambda r: -r['risk_score'])
+    with pytest.raises(KeyError):
+        query.accounts_page(10, ring='RING_999')
+
+def test_top_result_keeps_summary():
+    accounts, ring_index = _run()
+    top = top_result({"suspicious_accounts": accounts, "fraud_rings": ring_index.rings, "summary": {"n": 1}}, 5)
+    assert top["suspicious_accounts"] == accounts[:5]
+    # The 5 highest-risk rings (ties: earliest), in output order
+    ranked = sorted(range(len(ring_index)), key=lambda i: -ring_index.rings[i]['risk_score'])[:5]
+    assert top["fraud_rings"] == [ring_index.rings[i] for i in sorted(ranked)]
+    assert top["summary"] == {"n": 1}
@@ -0,0 +1,107 @@
+import sys
+import os
+import time
+
+# Add backend to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.result_store import ResultStore, estimate_size
+
+def _result(n):
+    return {
+        "suspicious_accounts": [
+            {"account_id": f"A{i}", "suspicion_score": 1.0, "detected_patterns": [], "ring_id": None}
+            for i in range(n)
+        ],
+        "fraud_rings": [],
+        "summary": {"total_accounts_analyzed": n},
+    }
+
+def test_lru_eviction_spills_to_disk(tmp_path):
+    one = estimate_size(_result(10))
+    store = ResultStore(max_bytes=2 * one, ttl_seconds=3600, spill_dir=str(tmp_path))
+
+    store["r1"] = _result(10)
+    store["r2"] = _result(10)
+    assert store.get("r1") is not None          # r1 becomes most recent
+    store["r3"] = _result(10)                   # evicts r2 (LRU)
+
+    m = store.metrics()
+    assert m["evictions"] == 1
+    assert m["memory_entries"] == 2 and m["disk_entries"] == 1
+    assert len(list(tmp_path.glob("*/*.json.gz"))) == 1
+
+    # Spilled run is still served, and promoted back into memory
+    assert "r2" in store
+    assert store["r2"] == _result(10)
+    m = store.metrics()
+    assert m["disk_hits"] == 1
+    assert m["hits"] == 1
+
+    assert store.get("missing") is None
+    assert store.metrics()["misses"] == 1
+
+def test_ttl_expiry(tmp_path):
+    store = ResultStore(max_bytes=10**9, ttl_seconds=60, spill_dir=str(tmp_path))
+    store.put("old", _result(1), stored_at=time.time() - 120)
+    store["new"] = _result(1)
+
+    assert "old" not in store
+    assert "new" in store
+    assert store.metrics()["expirations"] == 1
+
+def test_expiry_between_sweeps(tmp_path):
+    store = ResultStore(max_bytes=10**9, ttl_seconds=60, spill_dir=str(tmp_path))
+    store["new"] = _result(1)          # runs the sweep
+    store.put("old", _result(1), stored_at=time.time() - 120)
+    # The next sweep is not due yet, but an expired entry is never served
+    assert len(store) == 2
+    assert store.get("old") is None
+    assert len(store) == 1
+    assert store.metrics()["expirations"] == 1
+
+def test_stores_sharing_spill_dir(tmp_path):
+    one = estimate_size(_result(10))
+    first = ResultStore(max_bytes=one, ttl_seconds=3600, spill_dir=str(tmp_path))
+    first["r1"] = _result(10)
+    first["r2"] = _result(10)
+
+    # Another worker (or a restart) on the same directory leaves the first store's files alone
+    second = ResultStore(max_bytes=one, ttl_seconds=3600, spill_dir=str(tmp_path))
+    second["s1"] = _result(10)
+    second["s2"] = _result(10)
+    assert first["r1"] == _result(10)
+    assert len(list(tmp_path.iterdir())) == 2
+
+    first.close()
+    assert len(list(tmp_path.iterdir())) == 1
+    assert second["s1"] == _result(10)
+
+def test_lookups_not_blocked_while_result_is_spilled(tmp_path, monkeypatch):
+    import threading
+    import app.result_store as result_store
+
+    dumps = result_store.dumps
+    writing, release = threading.Event(), threading.Event()
+    def slow_dumps(result):
+        writing.set()
+        release.wait(5)
+        return dumps(result)
+    monkeypatch.setattr(result_store, "dumps", slow_dumps)
+
+    one = estimate_size(_result(10))
+    store = ResultStore(max_bytes=2 * one, ttl_seconds=3600, spill_dir=str(tmp_path))
+    store["r1"] = _result(10)
+    store["r2"] = _result(10)
+    writer = threading.Thread(target=store.put, args=("r3", _result(10)))
+    writer.start()
+    assert writing.wait(5)
+
+    # While r1 is being written, every run is served, including r1 itself
+    assert store["r2"] == _result(10)
+    assert store["r3"] == _result(10)
+    assert store["r1"] == _result(10)
+    release.set()
+    writer.join(5)
+    assert store.metrics()["disk_entries"] == 1
+    assert store["r1"] == _result(10)
@@ -0,0 +1,33 @@
+import sys
+import os
+
+# Add backend to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.model.ring_index import RingIndex
+
+def test_ring_ids_and_account_lookup():
+    index = RingIndex()
+    assert index.add("cycle", ["A", "B", "C"]) == "RING_001"
+    assert index.add("fan_in", ["C", "D"]) == "RING_002"
+    assert index.add("high_velocity", ["E"]) == "RING_003"
+
+    assert index.get("RING_002")["member_accounts"] == ["C", "D"]
+    assert index.get("RING_999") is None
+    assert index.rings_of("C") == ["RING_001", "RING_002"]
+    assert index.rings_of("Z") == []
+
+def test_best_ring_highest_risk_then_lowest_id():
+    index = RingIndex()
+    for members, risk in ((["A", "B"], 40.0), (["A", "C"], 70.0), (["A", "D"], 70.0)):
+        rid = index.add("fan_out", members)
+        index.get(rid)["risk_score"] = risk
+
+    assert index.best_ring("A") == "RING_002"
+    assert index.best_ring("B") == "RING_001"
+    assert index.best_ring("Z") is None
+
+    # Rebuilt from the ring dicts (as a restored session does)
+    restored = RingIndex.from_rings(index.rings)
+    assert restored.best_ring("A") == "RING_002"
+    assert restored.rings_of("D") == ["RING_003"]
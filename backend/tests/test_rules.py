@@ -0,0 +1,73 @@
+import json
+import os
+import sys
+import pytest
+
+# Add backend to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.model.rules import RuleSet, RuleSource, RuleError, default_rules, DEFAULT_RULES_PATH
+from app.model.score_engine import ScoreTable, PATTERN_BITS
+from app.model.scoring import rescore_results
+
+def _spec(**points):
+    with open(DEFAULT_RULES_PATH) as f:
+        spec = json.load(f)
+    spec["points"].update(points)
+    return spec
+
+def test_compile_and_validate():
+    rules = default_rules()
+    assert rules.points_cycle == 50
+    assert rules.flow_pass_through_max == 1.1
+    assert rules.long_duration_ns == 7 * 24 * 3600 * 10**9
+
+    with pytest.raises(RuleError):
+        RuleSet({**_spec(), "schema": 2})
+    with pytest.raises(RuleError):
+        RuleSet(_spec(cycle="high"))
+    with pytest.raises(RuleError):
+        RuleSet(_spec(typo=5))
+    spec = _spec()
+    del spec["flow"]["merchant_min_in"]
+    with pytest.raises(RuleError):
+        RuleSet(spec)
+
+def test_hot_reload_keeps_last_good_rules(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps(_spec()))
+    source = RuleSource(str(path))
+    assert source.get().points_cycle == 50
+
+    path.write_text(json.dumps({**_spec(cycle=70), "version": "tuned"}))
+    os.utime(path, ns=(1, 10**18))
+    assert source.get().points_cycle == 70
+    assert source.get().version == "tuned"
+
+    path.write_text("{not json")
+    os.utime(path, ns=(1, 2 * 10**18))
+    assert source.get().points_cycle == 70
+
+def test_rescore_with_other_weights():
+    table = ScoreTable(["A", "B"], [PATTERN_BITS['in_cycle'] | PATTERN_BITS['cycle'], 0], [0.0, 0.0], [0.0, 0.0], [0, 0])
+    assert table.score.tolist() == [50, 0]
+
+    tuned = table.with_rules(RuleSet(_spec(cycle=35)))
+    assert tuned.score.tolist() == [35, 0]
+    assert tuned.breakdown("A")[0] == {"reason": "In Cycle", "points": 35}
+    # The original table is untouched
+    assert table.score.tolist() == [50, 0]
+
+def test_digest_and_ring_weights():
+    assert RuleSet(_spec()).same_as(default_rules())
+    assert not RuleSet(_spec(cycle=35)).same_as(default_rules())
+
+    table = ScoreTable(["A", "B"], [PATTERN_BITS['in_cycle'] | PATTERN_BITS['cycle'], 0], [0.0, 0.0], [0.0, 0.0], [0, 0])
+    accounts = [{"account_id": n, "suspicion_score": 0.0, "detected_patterns": [], "ring_id": None} for n in "AB"]
+    rings = [{"ring_id": "RING_001", "member_accounts": ["A", "B"], "pattern_type": "cycle", "risk_score": 0.0}]
+    # 50 * 0.6 + 25 * 0.4
+    assert rescore_results(accounts, rings, table)[1][0]["risk_score"] == 40.0
+
+    spec = _spec()
+    spec["ring"] = {"max_weight": 1, "mean_weight": 0}
+    assert rescore_results(accounts, rings, table.with_rules(RuleSet(spec)))[1][0]["risk_score"] == 50.0
@@ -0,0 +1,93 @@
+import math
+import sys
+import os
+import pytest
+from types import SimpleNamespace
+
+import numpy as np
+
+# Add backend to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.model.score_engine import ScoreTable, PATTERN_BITS
+from app.model.rules import RuleSet
+
+B = PATTERN_BITS
+DAY = 24 * 3600 * 10**9
+
+def _table(rows):
+    nodes = [r[0] for r in rows]
+    return ScoreTable(nodes, [r[1] for r in rows], [r[2] for r in rows], [r[3] for r in rows],
+                      [DAY * 30 if r[4] else 0 for r in rows])
+
+def test_rules_and_breakdown_agree():
+    table = _table([
+        # account, pattern bits, in total, out total, long duration
+        ("CYCLE", B['in_cycle'] | B['cycle_length_3_5'], 1000.0, 1000.0, False),
+        ("MERCHANT", B['fan_in'] | B['high_velocity'] | B['shell'], 50000.0, 10.0, False),
+        ("QUIET", 0, 10.0, 0.0, True),
+        ("IDLE", 0, 0.0, 0.0, False),
+    ])
+    score = dict(zip(table.nodes, table.score.tolist()))
+
+    # 50 + 15 + volume (log10(2000) * 2) + confirmed mule 10
+    assert score["CYCLE"] == 50 + 15 + math.log10(2000.0) * 2 + 10
+    # Merchant-like fan-in plus shell and velocity is capped at 40
+    assert score["MERCHANT"] == 40
+    assert score["QUIET"] == 0
+    assert score["IDLE"] == 0
+
+    reasons = [b["reason"] for b in table.breakdown("CYCLE")]
+    assert reasons == ["In Cycle", "Short Cycle (3-5 hops)", "High Volume ($2,000)", "Confirmed Mule Behavior"]
+    assert table.breakdown("MERCHANT")[-1]["reason"] == "Merchant Trust Cap"
+    assert table.breakdown("QUIET") == [{"reason": "Long Duration (>7 days)", "points": -30}]
+    assert table.breakdown("IDLE") == []
+
+    # Breakdowns add up to the score (volume points are shown rounded)
+    for account in ("CYCLE", "MERCHANT"):
+        assert sum(b["points"] for b in table.breakdown(account)) == pytest.approx(score[account], abs=0.05)
+
+    assert table.pattern_names(0) == ["cycle_length_3_5", "high_velocity"]
+
+def test_breakdown_columns_match_breakdown():
+    table = _table([
+        ("CYCLE", B['in_cycle'] | B['cycle_length_3_5'], 1000.0, 1000.0, False),
+        ("IDLE", 0, 0.0, 0.0, False),
+        ("MERCHANT", B['fan_in'] | B['high_velocity'] | B['shell'], 50000.0, 10.0, False),
+        ("PAYROLL", B['fan_out'] | B['shell'], 10.0, 90000.0, False),
+        ("QUIET", 0, 10.0, 0.0, True),
+    ])
+    positions, reasons, points = table.breakdown_columns()
+    rows = list(zip(positions.tolist(), reasons.tolist(), points.tolist()))
+    assert rows == [(i, b["reason"], b["points"]) for i, node in enumerate(table.nodes) for b in table.breakdown(node)]
+
+def test_round_trip():
+    table = _table([("A", B['fan_out'], 5.0, 3000.0, False), ("B", 0, 0.0, 0.0, True)])
+    restored = ScoreTable.from_dict(table.to_dict())
+    assert restored.score.tolist() == table.score.tolist()
+    assert restored.breakdown("A") == table.breakdown("A")
+
+def test_updated_rescores_only_changed_accounts():
+    previous = _table([
+        ("CYCLE", B['in_cycle'] | B['cycle_length_3_5'], 1000.0, 1000.0, False),
+        ("FAN", B['fan_in'], 500.0, 480.0, False),
+        ("QUIET", 0, 10.0, 0.0, True),
+    ])
+    # Marker: an account whose features did not change keeps the previous score
+    previous.score[0] = 12.5
+
+    rows = [
+        ("CYCLE", B['in_cycle'] | B['cycle_length_3_5'], 1000.0, 1000.0, False),
+        ("FAN", B['fan_in'] | B['shell'], 500.0, 980.0, False),
+        ("QUIET", 0, 10.0, 0.0, True),
+        ("NEW", B['fan_out'], 0.0, 500.0, False),
+    ]
+    full = _table(rows)
+    index = SimpleNamespace(nodes=np.array(full.nodes, dtype=object), in_total=full.in_amount,
+                            out_total=full.out_amount, durations=full.durations)
+    table = ScoreTable.updated(previous, index, full.patterns)
+
+    assert table.score.tolist() == [12.5] + full.score.tolist()[1:]
+    # Other rules mean every account is evaluated again
+    other = RuleSet({**full.rules.to_dict(), "version": "other"})
+    assert ScoreTable.updated(previous, index, full.patterns, other).score.tolist() == full.score.tolist()
@@ -0,0 +1,41 @@
+import sys
+import os
+import json
+import pytest
+
+# Add backend to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import serialization
+from app.serialization import iter_result_json, iter_result_ndjson
+
+def _result(n):
+    return {
+        "suspicious_accounts": [
+            {"account_id": f"ACC_{i}", "suspicion_score": i / 3, "detected_patterns": ["cycle"], "ring_id": None}
+            for i in range(n)
+        ],
+        "fraud_rings": [{"ring_id": "RING_001", "member_accounts": ["ACC_0"], "pattern_type": "cycle", "risk_score": 1.5}],
+        "summary": {"total_accounts_analyzed": n},
+    }
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_streamed_json_matches_document(monkeypatch, use_orjson):
+    if use_orjson:
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(serialization, "orjson", None)
+    monkeypatch.setattr(serialization, "STREAM_CHUNK_ROWS", 4)
+
+    for n in (0, 1, 4, 9):
+        result = _result(n)
+        assert json.loads(b"".join(iter_result_json(result))) == result
+
+def test_ndjson_records_and_account_filter():
+    result = _result(6)
+    kept = (acc for acc in result["suspicious_accounts"] if acc["suspicion_score"] > 1)
+    lines = [json.loads(line) for line in b"".join(iter_result_ndjson(result, kept)).splitlines()]
+
+    assert lines[0] == {"summary": result["summary"]}
+    assert [line["suspicious_account"]["account_id"] for line in lines[1:-1]] == ["ACC_4", "ACC_5"]
+    assert lines[-1] == {"fraud_ring": result["fraud_rings"][0]}
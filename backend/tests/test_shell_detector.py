@@ -0,0 +1,153 @@
+import random
+import sys
+import os
+import tracemalloc
+import networkx as nx
+import pandas as pd
+
+# Add backend to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.model.graph_builder import TransactionStore, graph_from_store
+from app.model.shell_detector import detect_shell_chains, update_shell_chains, SHELL_MAX_DEGREE
+
+def _members(chains):
+    return [c['members'] for c in chains]
+
+def test_long_chain_reported_once():
+    G = nx.DiGraph()
+    nx.add_path(G, ['SRC', 'S1', 'S2', 'S3', 'S4', 'DST'])
+    # Make the endpoints busy accounts
+    for i in range(4):
+        G.add_edge(f'IN{i}', 'SRC')
+        G.add_edge('DST', f'OUT{i}')
+
+    chains = detect_shell_chains(G)
+    assert _members(chains) == [['SRC', 'S1', 'S2', 'S3', 'S4', 'DST']]
+    assert chains[0]['path'] == ['S1', 'S2', 'S3', 'S4']
+
+def test_chain_without_outside_entry_starts_at_itself():
+    G = nx.DiGraph()
+    nx.add_path(G, ['N', 'O', 'P', 'Q'])
+    assert _members(detect_shell_chains(G)) == [['N', 'O', 'P', 'Q']]
+
+def test_endpoint_pairs_capped_and_compact():
+    G = nx.DiGraph()
+    nx.add_path(G, ['S1', 'S2'])
+    entries, exits = ['E0', 'E1'], ['X0', 'X1']
+    for e in entries:
+        G.add_edge(e, 'S1')
+    for x in exits:
+        G.add_edge('S2', x)
+    # Busy endpoints, so they are not shell candidates themselves
+    for i in range(4):
+        for e in entries:
+            G.add_edge(f'{e}_IN{i}', e)
+        for x in exits:
+            G.add_edge(x, f'{x}_OUT{i}')
+
+    assert _members(detect_shell_chains(G)) == [[e, 'S1', 'S2', x] for e in entries for x in exits]
+    assert _members(detect_shell_chains(G, max_pairs=2)) == [['E0', 'S1', 'S2', 'X0'], ['E0', 'S1', 'S2', 'X1']]
+
+    compact = detect_shell_chains(G, compact=True)
+    assert _members(compact) == [entries + ['S1', 'S2'] + exits]
+
+def test_paths_continue_through_branching_intermediate():
+    G = nx.DiGraph()
+    nx.add_path(G, ['A', 'S1', 'S2', 'S3', 'B'])
+    # S2 also forwards to S4, so the shell subgraph branches there
+    nx.add_path(G, ['S2', 'S4', 'C'])
+    for i in range(4):
+        G.add_edge(f'IN{i}', 'A')
+        G.add_edge('B', f'OUT{i}')
+        G.add_edge('C', f'OUT{i}')
+
+    # S4 leaves the first path at S2 (and S3 the second), so each path also has a shorter ring
+    assert _members(detect_shell_chains(G)) == [
+        ['A', 'S1', 'S2', 'S3'], ['A', 'S1', 'S2', 'S4'],
+        ['A', 'S1', 'S2', 'S3', 'B'], ['A', 'S1', 'S2', 'S4', 'C'],
+    ]
+    assert _members(detect_shell_chains(G, compact=True)) == [['A', 'S1', 'S2', 'S3', 'S4', 'B', 'C']]
+
+def test_exit_from_inside_a_chain():
+    G = nx.DiGraph()
+    nx.add_path(G, ['A', 'S1', 'S2', 'S3', 'B'])
+    # X is a busy account money can leave the chain to at S2
+    G.add_edge('S2', 'X')
+    for i in range(4):
+        G.add_edge(f'IN{i}', 'A')
+        G.add_edge('B', f'OUT{i}')
+        G.add_edge('X', f'OUT{i}')
+
+    assert _members(detect_shell_chains(G)) == [['A', 'S1', 'S2', 'X'], ['A', 'S1', 'S2', 'S3', 'B']]
+    assert _members(detect_shell_chains(G, compact=True)) == [['A', 'S1', 'S2', 'S3', 'X', 'B']]
+
+def _exhaustive_shell_members(G):
+    """The original detector: every simple shell path with an outside predecessor and successor."""
+    candidates = {n for n, d in G.degree() if d <= SHELL_MAX_DEGREE}
+    members = set()
+    for start in candidates:
+        stack = [[start]]
+        while stack:
+            path = stack.pop()
+            if len(path) >= 2:
+                for p in G.predecessors(path[0]):
+                    for s in G.successors(path[-1]):
+                        if p not in path and s not in path and p != s:
+                            members.update([p, s, *path])
+            stack.extend(path + [v] for v in G.successors(path[-1]) if v in candidates and v not in path)
+    return members
+
+def test_rings_cover_every_shell_chain_account():
+    for seed in range(150):
+        rng = random.Random(seed)
+        nodes = [f'A{i:02d}' for i in range(rng.randrange(8, 50))]
+        G = nx.DiGraph((u, v) for u, v in (rng.sample(nodes, 2) for _ in range(rng.randrange(4, 2 * len(nodes)))))
+        expected = _exhaustive_shell_members(G)
+        for compact in (False, True):
+            assert {m for ring in detect_shell_chains(G, compact=compact) for m in ring['members']} == expected
+
+def test_branches_do_not_multiply_rings():
+    G = nx.DiGraph()
+    # A row of diamonds: X_i -> (a_i | b_i) -> Y_i -> X_i+1 has 2^k paths
+    for i in range(16):
+        G.add_edges_from([(f'X{i}', f'a{i}'), (f'X{i}', f'b{i}'), (f'a{i}', f'Y{i}'), (f'b{i}', f'Y{i}'),
+                          (f'Y{i}', f'X{i + 1}')])
+
+    for compact in (False, True):
+        chains = detect_shell_chains(G, compact=compact)
+        assert len(chains) <= G.number_of_edges() * 2
+        assert {m for c in chains for m in c['members']} == set(G)
+
+def test_update_matches_full_detection():
+    rng = random.Random(3)
+    nodes = [f'A{i:02d}' for i in range(60)]
+    edges = [(rng.choice(nodes), rng.choice(nodes)) for _ in range(70)]
+    G = nx.DiGraph(edges[:50])
+    chains = detect_shell_chains(G)
+
+    for u, v in edges[50:]:
+        new_edges = [] if G.has_edge(u, v) else [(u, v)]
+        G.add_edge(u, v)
+        chains = update_shell_chains(G, chains, new_edges)
+        assert _members(chains) == _members(detect_shell_chains(G))
+
+def _peak(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def test_detection_peaks_below_candidate_subgraph_copy():
+    rng = random.Random(5)
+    base = pd.Timestamp('2026-01-01')
+    rows = [(f"T{i}", f"A{rng.randrange(4000)}", f"A{rng.randrange(4000)}", 10.0, base + pd.Timedelta(minutes=i))
+            for i in range(6000)]
+    G = graph_from_store(TransactionStore.from_frame(
+        pd.DataFrame(rows, columns=['transaction_id', 'sender_id', 'receiver_id', 'amount', 'timestamp'])))
+    candidates = [n for n, d in G.degree() if d <= SHELL_MAX_DEGREE]
+
+    # The shell view is topology only: it must not cost as much as copying the candidate subgraph
+    assert _peak(lambda: detect_shell_chains(G)) < _peak(lambda: G.subgraph(candidates).copy())
@@ -0,0 +1,146 @@
+import json
+import os
+import random
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add backend to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.model.graph_builder import TransactionStore, graph_from_store
+from app.model.account_index import get_account_index
+from app.model.csr_graph import CSRGraph
+from app.model.scoring import analyze_graph
+from app.model.snapshot import save_snapshot, open_snapshot, load_store, SnapshotError
+
+def _random_transactions(seed=11, n=400):
+    rng = random.Random(seed)
+    accounts = [f"ACC_{i:03d}" for i in range(80)]
+    base = pd.Timestamp('2026-02-01', tz='UTC')
+    rows = []
+    for i in range(n):
+        s, r = rng.sample(accounts, 2)
+        rows.append((i, s, r, round(rng.uniform(10, 2000), 2), base + pd.Timedelta(hours=rng.randint(0, 240))))
+    return pd.DataFrame(rows, columns=['transaction_id', 'sender_id', 'receiver_id', 'amount', 'timestamp'])
+
+def test_snapshot_roundtrip_is_memory_mapped(tmp_path):
+    store = TransactionStore.from_frame(_random_transactions())
+    G = graph_from_store(store)
+    expected = analyze_graph(G, None)
+
+    path = str(tmp_path / "run.graph")
+    save_snapshot(G, path)
+    reopened = open_snapshot(path)
+
+    assert isinstance(reopened, CSRGraph)
+    assert isinstance(reopened.succ, np.memmap) and isinstance(reopened.store.amount, np.memmap)
+    index = get_account_index(reopened)
+    assert isinstance(index.in_ts, np.memmap)
+    assert reopened.store.content_hash == store.content_hash
+
+    assert json.dumps(analyze_graph(reopened, None)) == json.dumps(expected)
+    assert json.dumps(analyze_graph(open_snapshot(path, backend='networkx'), None)) == json.dumps(expected)
+
+    u, v = next(iter(G.edges()))
+    assert list(reopened[u][v]['transactions']) == list(G[u][v]['transactions'])
+    assert isinstance(reopened[u][v]['transactions'][0]['transaction_id'], int)
+
+def test_snapshot_rejects_incompatible_or_partial(tmp_path):
+    G = graph_from_store(TransactionStore.from_frame(_random_transactions(n=20)))
+    path = str(tmp_path / "run.graph")
+    save_snapshot(G, path, include_index=False)
+    assert 'account_index' not in open_snapshot(path).graph
+
+    meta_path = os.path.join(path, "meta.json")
+    meta = json.load(open(meta_path))
+    json.dump(dict(meta, version=99), open(meta_path, "w"))
+    with pytest.raises(SnapshotError):
+        load_store(path)
+
+    with pytest.raises(SnapshotError):
+        open_snapshot(str(tmp_path / "missing.graph"))
+
+def test_sessions_survive_restart(tmp_path):
+    from app.sessions import SessionCache, RunSession
+
+    G = graph_from_store(TransactionStore.from_frame(_random_transactions(n=50)))
+    accounts, rings = analyze_graph(G, None)
+    scores = {a['account_id']: a for a in accounts}
+
+    table = G.graph['analysis']['score_table']
+    SessionCache(1 << 30, str(tmp_path)).put(RunSession("run-1", G, rings, scores, table))
+
+    # A new process finds the snapshot and reopens it on demand
+    cache = SessionCache(1 << 30, str(tmp_path), graph_backend='csr')
+    assert cache.latest_run_id == "run-1"
+    session = cache.get("run-1")
+    assert isinstance(session.G, CSRGraph)
+    assert session.scores == json.loads(json.dumps(scores))
+    assert sorted(session.G.successors("ACC_001")) == sorted(G.successors("ACC_001"))
+    assert [session.breakdown(n) for n in table.nodes] == [table.breakdown(n) for n in table.nodes]
+
+def test_lookups_not_blocked_while_snapshot_is_written(tmp_path, monkeypatch):
+    import threading
+    import app.sessions as sessions
+    from app.sessions import SessionCache, RunSession
+
+    G = graph_from_store(TransactionStore.from_frame(_random_transactions(n=50)))
+    accounts, rings = analyze_graph(G, None)
+    scores = {a['account_id']: a for a in accounts}
+
+    writing, release = threading.Event(), threading.Event()
+    def slow_save(graph, path, **kwargs):
+        writing.set()
+        release.wait(5)
+        save_snapshot(graph, path, **kwargs)
+    monkeypatch.setattr(sessions, "save_snapshot", slow_save)
+
+    cache = SessionCache(1, str(tmp_path))
+    release.set()
+    cache.put(RunSession("run-0", G, rings, scores))
+    writing.clear()
+    release.clear()
+    session = RunSession("run-1", G, rings, scores)
+    writer = threading.Thread(target=cache.put, args=(session,))
+    writer.start()
+    assert writing.wait(5)
+
+    # While run-1's snapshot is being written, other runs can be reopened and run-1 is served
+    assert cache.get("run-0") is not None
+    assert cache.get("run-1") is session
+    release.set()
+    writer.join(5)
+    assert os.path.exists(str(tmp_path / "run-1.meta.json.gz"))
+    assert not os.path.exists(str(tmp_path / "run-1.meta.json.gz.tmp"))
+
+def test_rescored_session_shares_parent_snapshot(tmp_path):
+    from app.sessions import SessionCache, RunSession
+
+    G = graph_from_store(TransactionStore.from_frame(_random_transactions(n=50)))
+    accounts, rings = analyze_graph(G, None)
+    scores = {a['account_id']: a for a in accounts}
+
+    cache = SessionCache(1 << 30, str(tmp_path), max_snapshots=1)
+    parent = RunSession("run-1", G, rings, scores)
+    child = RunSession("run-2", G, rings, scores, graph_run_id="run-1")
+    cache.put(parent)
+    cache.put(child)
+
+    # Only the rings and scores are written, and the graph is counted once
+    assert not os.path.exists(str(tmp_path / "run-2.graph"))
+    assert cache._memory_bytes == parent.estimated_bytes() + child.result_bytes()
+    assert "run-1" in cache and "run-2" in cache
+
+    # After a restart the rescored run reopens the parent's graph, mapped once for both
+    cache = SessionCache(1 << 30, str(tmp_path), max_snapshots=1)
+    restored = cache.get("run-2")
+    assert restored.graph_run_id == "run-1"
+    assert sorted(restored.G.successors("ACC_001")) == sorted(G.successors("ACC_001"))
+    assert cache.get("run-1").G is restored.G
+
+    # Trimming the parent's snapshot takes the runs sharing it along
+    cache.put(RunSession("run-3", G, rings, scores))
+    assert "run-1" not in cache._snapshots and "run-2" not in cache._snapshots
+    assert sorted(os.listdir(str(tmp_path))) == ["run-3.graph", "run-3.meta.json.gz"]
@@ -0,0 +1,84 @@
+import random
+import sys
+import os
+import pandas as pd
+
+# Add backend to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.model.graph_builder import build_graph
+from app.model.cycle_detector import detect_cycles
+from app.model.fan_detector import detect_fan_patterns, detect_high_velocity
+from app.model.stream_detector import StreamDetector
+from app.streaming import run_stream, tail_csv
+
+def _random_transactions(seed=5, n=1000):
+    rng = random.Random(seed)
+    accounts = [f"ACC_{i:03d}" for i in range(200)] + ['HUB_IN', 'HUB_OUT']
+    base = pd.Timestamp('2026-02-01')
+    rows = []
+    for i in range(n):
+        s, r = rng.sample(accounts, 2)
+        if rng.random() < 0.1:
+            r = 'HUB_IN'
+        elif rng.random() < 0.05:
+            s = 'HUB_OUT'
+        if s != r:
+            rows.append((f"T{i}", s, r, 100.0, base + pd.Timedelta(minutes=rng.randint(0, 20 * 24 * 60))))
+    df = pd.DataFrame(rows, columns=['transaction_id', 'sender_id', 'receiver_id', 'amount', 'timestamp'])
+    return df.sort_values('timestamp', kind='stable').reset_index(drop=True)
+
+def test_stream_alerts_match_batch_detectors():
+    df = _random_transactions()
+    alerts = list(StreamDetector().process_many(df.to_dict('records')))
+
+    G = build_graph(df.copy())
+    fan_in, fan_out = detect_fan_patterns(G)
+    flagged = lambda kind: sorted({a['account_id'] for a in alerts if a['type'] == kind})
+
+    assert fan_in and flagged('fan_in') == fan_in
+    assert fan_out and flagged('fan_out') == fan_out
+    assert flagged("high_velocity") == detect_high_velocity(G) == ["HUB_IN"]
+    assert sorted(tuple(a['members']) for a in alerts if a['type'] == 'cycle') == detect_cycles(G)
+
+def test_alert_raised_on_closing_transaction():
+    detector = StreamDetector()
+    t0 = pd.Timestamp('2026-02-01')
+    for i in range(9):
+        assert detector.process({'sender_id': f'S{i}', 'receiver_id': 'R', 'timestamp': t0 + pd.Timedelta(hours=i)}) == []
+
+    alerts = detector.process({'transaction_id': 'LAST', 'sender_id': 'S9', 'receiver_id': 'R', 'timestamp': t0 + pd.Timedelta(hours=9)})
+    assert [(a['type'], a['account_id'], a['count'], a['transaction_id']) for a in alerts] == [('fan_in', 'R', 10, 'LAST')]
+
+    # Older senders leave the 72h window; the alert re-arms and fires again
+    late = t0 + pd.Timedelta(days=10)
+    assert detector.process({'sender_id': 'S0', 'receiver_id': 'R', 'timestamp': late}) == []
+    for i in range(1, 10):
+        alerts = detector.process({'sender_id': f'S{i}', 'receiver_id': 'R', 'timestamp': late})
+    assert [a['type'] for a in alerts] == ['fan_in']
+
+def test_cycle_window_ignores_stale_edges():
+    detector = StreamDetector(cycle_window=pd.Timedelta(days=1))
+    t0 = pd.Timestamp('2026-02-01')
+    detector.process({'sender_id': 'A', 'receiver_id': 'B', 'timestamp': t0})
+    detector.process({'sender_id': 'B', 'receiver_id': 'C', 'timestamp': t0 + pd.Timedelta(days=2)})
+    assert detector.process({'sender_id': 'C', 'receiver_id': 'A', 'timestamp': t0 + pd.Timedelta(days=2)}) == []
+
+    # A fresh A -> B closes the cycle within the window
+    alerts = detector.process({'sender_id': 'A', 'receiver_id': 'B', 'timestamp': t0 + pd.Timedelta(days=2, hours=1)})
+    assert [a['members'] for a in alerts if a['type'] == 'cycle'] == [['A', 'B', 'C']]
+
+def test_run_stream_from_csv_tail(tmp_path):
+    path = tmp_path / "feed.csv"
+    path.write_text(
+        "from_account,to_account,amount,timestamp\n"
+        "A,B,10,2026-02-01 10:00:00\n"
+        "bad row\n"
+        "B,C,10,2026-02-01 11:00:00\n"
+        "C,A,10,2026-02-01 12:00:00\n"
+    )
+    alerts = []
+    detector = run_stream(tail_csv(str(path), follow=False), on_alert=alerts.append)
+
+    assert detector.events == 3
+    assert [(a['type'], a['members']) for a in alerts] == [('cycle', ['A', 'B', 'C'])]
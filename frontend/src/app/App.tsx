@@ -50,13 +50,9 @@ export default function App() {
     }
   };
 
-  const handleViewRing = (ringId: string) => {
-    if (!analysisData) return;
-    const ring = analysisData.fraud_rings.find(r => r.ring_id === ringId);
-    if (ring) {
-      setSelectedRing(ring);
-      setCurrentScreen("graph");
-    }
+  const handleViewRing = (ring: FraudRing) => {
+    setSelectedRing(ring);
+    setCurrentScreen("graph");
   };
 
   const handleBackToDashboard = () => {
@@ -77,6 +73,7 @@ export default function App() {
       {currentScreen === "dashboard" && analysisData && (
         <DashboardScreen
           data={analysisData}
+          runId={runId}
           onViewRing={handleViewRing}
           onDownloadJSON={handleDownloadJSON}
           currentView={currentView}
@@ -87,6 +84,7 @@ export default function App() {
       {currentScreen === "graph" && selectedRing && (
         <GraphViewScreen
           ring={selectedRing}
+          runId={runId}
           onBack={handleBackToDashboard}
         />
       )}
@@ -1,6 +1,6 @@
 import { useState, useEffect } from "react";
 import { X, Shield, AlertTriangle, ArrowRight, ArrowLeft } from "lucide-react";
-import { API_BASE_URL } from "../config";
+import { API_BASE_URL, runPath } from "../config";
 
 interface Transaction {
     id: string;
@@ -25,11 +25,12 @@ interface AccountDetailsData {
 
 interface AccountDetailsModalProps {
     accountId: string | null;
+    runId: string | null;
     isOpen: boolean;
     onClose: () => void;
 }
 
-export function AccountDetailsModal({ accountId, isOpen, onClose }: AccountDetailsModalProps) {
+export function AccountDetailsModal({ accountId, runId, isOpen, onClose }: AccountDetailsModalProps) {
     const [data, setData] = useState<AccountDetailsData | null>(null);
     const [isLoading, setIsLoading] = useState(false);
     const [error, setError] = useState<string | null>(null);
@@ -40,13 +41,13 @@ export function AccountDetailsModal({ accountId, isOpen, onClose }: AccountDetai
         } else {
             setData(null);
         }
-    }, [isOpen, accountId]);
+    }, [isOpen, accountId, runId]);
 
     const fetchAccountDetails = async (id: string) => {
         setIsLoading(true);
         setError(null);
         try {
-            const response = await fetch(`${API_BASE_URL}/account/${id}`);
+            const response = await fetch(`${API_BASE_URL}${runPath(runId)}/account/${id}`);
             if (!response.ok) {
                 throw new Error("Failed to fetch account details");
             }
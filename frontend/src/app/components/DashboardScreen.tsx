@@ -5,21 +5,29 @@ import { Badge } from "./ui/badge";
 import { ThemeToggle } from "./ThemeToggle";
 import { AccountDetailsModal } from "./AccountDetailsModal";
 import { BlockchainAudit } from "./BlockchainAudit";
-import type { AnalysisData } from "./types";
+import type { AnalysisData, FraudRing, SuspiciousAccount } from "./types";
+import { useRunQuery } from "./useRunQuery";
 
 interface DashboardScreenProps {
   data: AnalysisData;
-  onViewRing: (ringId: string) => void;
+  runId: string | null;
+  onViewRing: (ring: FraudRing) => void;
   onDownloadJSON: () => void;
   currentView: string;
   onChangeView: (view: string) => void;
 }
 
-export function DashboardScreen({ data, onViewRing, onDownloadJSON, currentView, onChangeView }: DashboardScreenProps) {
+export function DashboardScreen({ data, runId, onViewRing, onDownloadJSON, currentView, onChangeView }: DashboardScreenProps) {
   const [selectedAccountId, setSelectedAccountId] = useState<string | null>(null);
   const [isDetailsModalOpen, setIsDetailsModalOpen] = useState(false);
   const [isSidebarOpen, setIsSidebarOpen] = useState(true);
 
+  // Full lists are paged from the run's query API; the upload response only carries the top-N
+  const ringsQuery = useRunQuery<FraudRing>(
+    runId, "rings", currentView === 'rings', data.fraud_rings, data.summary.fraud_rings_detected);
+  const accountsQuery = useRunQuery<SuspiciousAccount>(
+    runId, "accounts", currentView === 'accounts', data.suspicious_accounts, data.summary.total_accounts_analyzed);
+
   const getSuspicionColor = (score: number) => {
     if (score >= 80) return "bg-[#EF4444]";
     if (score >= 50) return "bg-[#F59E0B]";
@@ -248,7 +256,7 @@ export function DashboardScreen({ data, onViewRing, onDownloadJSON, currentView,
                             </div>
                           </div>
                           <Button
-                            onClick={() => onViewRing(ring.ring_id)}
+                            onClick={() => onViewRing(ring)}
                             className="w-full bg-secondary hover:bg-secondary/80 text-secondary-foreground h-9 gap-2"
                             size="sm"
                           >
@@ -348,12 +356,12 @@ export function DashboardScreen({ data, onViewRing, onDownloadJSON, currentView,
                   <p className="text-muted-foreground">Detected suspicious account networks</p>
                 </div>
                 <div className="text-sm text-muted-foreground">
-                  Total Detected: <span className="font-mono font-semibold text-foreground">{data.fraud_rings.length}</span>
+                  Total Detected: <span className="font-mono font-semibold text-foreground">{ringsQuery.total}</span>
                 </div>
               </div>
 
               <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-6">
-                {data.fraud_rings.map((ring) => (
+                {ringsQuery.items.map((ring) => (
                   <div
                     key={ring.ring_id}
                     className="bg-card border border-border rounded-lg p-6 hover:border-primary/50 transition-all hover:shadow-lg hover:shadow-primary/10 cursor-pointer"
@@ -390,7 +398,7 @@ export function DashboardScreen({ data, onViewRing, onDownloadJSON, currentView,
                     </div>
 
                     <Button
-                      onClick={() => onViewRing(ring.ring_id)}
+                      onClick={() => onViewRing(ring)}
                       className="w-full mt-4 bg-secondary hover:bg-secondary/80 text-secondary-foreground gap-2"
                     >
                       <Eye className="w-4 h-4" />
@@ -399,6 +407,14 @@ export function DashboardScreen({ data, onViewRing, onDownloadJSON, currentView,
                   </div>
                 ))}
               </div>
+
+              {ringsQuery.hasMore && (
+                <div className="flex justify-center">
+                  <Button variant="outline" onClick={ringsQuery.loadMore} disabled={ringsQuery.isLoading}>
+                    {ringsQuery.isLoading ? "Loading..." : "Load more rings"}
+                  </Button>
+                </div>
+              )}
             </div>
           )}
 
@@ -411,7 +427,7 @@ export function DashboardScreen({ data, onViewRing, onDownloadJSON, currentView,
                   <p className="text-muted-foreground">All accounts processed by the engine</p>
                 </div>
                 <div className="text-sm text-muted-foreground">
-                  Total Accounts: <span className="font-mono font-semibold text-foreground">{data.suspicious_accounts.length}</span>
+                  Total Accounts: <span className="font-mono font-semibold text-foreground">{accountsQuery.total}</span>
                 </div>
               </div>
 
@@ -428,7 +444,7 @@ export function DashboardScreen({ data, onViewRing, onDownloadJSON, currentView,
                       </tr>
                     </thead>
                     <tbody className="divide-y divide-border">
-                      {data.suspicious_accounts.map((acc) => (
+                      {accountsQuery.items.map((acc) => (
                         <tr
                           key={acc.account_id}
                           className="hover:bg-secondary/20 transition-colors cursor-pointer"
@@ -473,9 +489,9 @@ export function DashboardScreen({ data, onViewRing, onDownloadJSON, currentView,
                           </td>
                           <td className="px-6 py-4 whitespace-nowrap text-sm text-muted-foreground">
                             <div className="flex flex-col gap-0.5 text-xs">
-                              <span>Total Txns: <span className="text-foreground">{acc.total_transactions}</span></span>
-                              <span>Fan-In: <span className="text-emerald-500">{acc.fan_in_count}</span></span>
-                              <span>Fan-Out: <span className="text-destructive">{acc.fan_out_count}</span></span>
+                              <span>Total Txns: <span className="text-foreground">{acc.total_transactions ?? "—"}</span></span>
+                              <span>Fan-In: <span className="text-emerald-500">{acc.fan_in_count ?? "—"}</span></span>
+                              <span>Fan-Out: <span className="text-destructive">{acc.fan_out_count ?? "—"}</span></span>
                             </div>
                           </td>
                           <td className="px-6 py-4 whitespace-nowrap text-right text-sm font-medium">
@@ -497,6 +513,14 @@ export function DashboardScreen({ data, onViewRing, onDownloadJSON, currentView,
                   </table>
                 </div>
               </div>
+
+              {accountsQuery.hasMore && (
+                <div className="flex justify-center">
+                  <Button variant="outline" onClick={accountsQuery.loadMore} disabled={accountsQuery.isLoading}>
+                    {accountsQuery.isLoading ? "Loading..." : "Load more accounts"}
+                  </Button>
+                </div>
+              )}
             </div>
           )}
 
@@ -532,6 +556,7 @@ export function DashboardScreen({ data, onViewRing, onDownloadJSON, currentView,
 
       <AccountDetailsModal
         accountId={selectedAccountId}
+        runId={runId}
         isOpen={isDetailsModalOpen}
         onClose={() => setIsDetailsModalOpen(false)}
       />
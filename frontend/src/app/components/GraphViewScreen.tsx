@@ -17,14 +17,15 @@ import { Button } from "./ui/button";
 import { Badge } from "./ui/badge";
 import type { FraudRing } from "./types";
 import { useTheme } from "next-themes";
-import { API_BASE_URL } from "../config";
+import { API_BASE_URL, runPath } from "../config";
 
 interface GraphViewScreenProps {
   ring: FraudRing;
+  runId: string | null;
   onBack: () => void;
 }
 
-export function GraphViewScreen({ ring, onBack }: GraphViewScreenProps) {
+export function GraphViewScreen({ ring, runId, onBack }: GraphViewScreenProps) {
   const { theme } = useTheme();
   const [selectedNode, setSelectedNode] = useState<string | null>(null);
   const [nodeDetails, setNodeDetails] = useState<Record<string, any>>({});
@@ -37,7 +38,7 @@ export function GraphViewScreen({ ring, onBack }: GraphViewScreenProps) {
   useState(() => {
     const fetchRingDetails = async () => {
       try {
-        const res = await fetch(`${API_BASE_URL}/ring/${ring.ring_id}`);
+        const res = await fetch(`${API_BASE_URL}${runPath(runId)}/ring/${ring.ring_id}`);
         if (!res.ok) throw new Error('Failed to fetch ring details');
         const data = await res.json();
 
@@ -27,7 +27,7 @@ export function LandingScreen({ onUploadComplete, isLoading, error }: LandingScr
     e.preventDefault();
     setIsDragging(false);
     const file = e.dataTransfer.files[0];
-    if (file && file.name.endsWith('.csv')) {
+    if (file && /\.(csv|parquet|pq|arrow|feather|ipc)$/i.test(file.name)) {
       setFileName(file.name);
       setSelectedFile(file);
     }
@@ -109,7 +109,7 @@ export function LandingScreen({ onUploadComplete, isLoading, error }: LandingScr
                   <Upload className="w-12 h-12 md:w-16 md:h-16 text-[#64748B]" />
                   <div className="text-center">
                     <p className="text-base md:text-lg font-medium text-foreground mb-1">
-                      Drag and drop CSV file here
+                      Drag and drop a CSV or Parquet file here
                     </p>
                     <p className="text-sm text-muted-foreground">or</p>
                   </div>
@@ -121,7 +121,7 @@ export function LandingScreen({ onUploadComplete, isLoading, error }: LandingScr
                     <input
                       id="file-upload"
                       type="file"
-                      accept=".csv"
+                      accept=".csv,.parquet,.pq,.arrow,.feather,.ipc"
                       className="hidden"
                       onChange={handleFileChange}
                     />
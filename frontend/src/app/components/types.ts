@@ -9,11 +9,12 @@ export interface SuspiciousAccount {
     account_id: string;
     suspicion_score: number;
     detected_patterns: string[];
-    total_transactions: number;
-    fan_in: number;
-    fan_in_count: number;
-    fan_out: number;
-    fan_out_count: number;
+    // Not part of the result / query API account shape (account_id, suspicion_score, detected_patterns, ring_id)
+    total_transactions?: number;
+    fan_in?: number;
+    fan_in_count?: number;
+    fan_out?: number;
+    fan_out_count?: number;
     ring_id?: string;
     score_breakdown?: { reason: string; points: number }[];
 }
@@ -0,0 +1,50 @@
+import { useCallback, useEffect, useState } from "react";
+import { API_BASE_URL } from "../config";
+
+const PAGE_SIZE = 100;
+
+// Pages of /runs/{runId}/accounts or /runs/{runId}/rings, appended on loadMore().
+// Until the first page arrives (or without a run id) the upload's top-N items are shown.
+export function useRunQuery<T>(
+  runId: string | null,
+  resource: "accounts" | "rings",
+  enabled: boolean,
+  initialItems: T[],
+  initialTotal: number,
+) {
+  const [items, setItems] = useState<T[]>(initialItems);
+  const [total, setTotal] = useState<number>(initialTotal);
+  const [nextCursor, setNextCursor] = useState<number | null>(null);
+  const [isLoading, setIsLoading] = useState(false);
+
+  const load = useCallback(async (cursor: number) => {
+    if (!runId) return;
+    setIsLoading(true);
+    try {
+      const res = await fetch(`${API_BASE_URL}/runs/${runId}/${resource}?limit=${PAGE_SIZE}&cursor=${cursor}`);
+      if (!res.ok) throw new Error(`Failed to fetch ${resource}`);
+      const data = await res.json();
+      setItems((prev) => (cursor === 0 ? data[resource] : [...prev, ...data[resource]]));
+      setTotal(data.total);
+      setNextCursor(data.nextCursor);
+    } catch (err) {
+      console.error(err);
+    } finally {
+      setIsLoading(false);
+    }
+  }, [runId, resource]);
+
+  useEffect(() => {
+    if (enabled) load(0);
+  }, [enabled, load]);
+
+  return {
+    items,
+    total,
+    isLoading,
+    hasMore: nextCursor !== null,
+    loadMore: () => {
+      if (nextCursor !== null) load(nextCursor);
+    },
+  };
+}
@@ -2,3 +2,7 @@
 // In production (monolithic Docker), VITE_API_URL will be set to an empty string to use relative paths.
 const envApiUrl = import.meta.env.VITE_API_URL;
 export const API_BASE_URL = typeof envApiUrl === 'string' ? envApiUrl : 'http://localhost:8000';
+
+// Investigation endpoints are scoped to the run that produced the dashboard data.
+// Without a run id, fall back to the legacy routes that answer from the latest upload.
+export const runPath = (runId: string | null) => (runId ? `/runs/${runId}` : '');
@@ -0,0 +1,55 @@
+import os
+import random
+import sys
+import tracemalloc
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+from app.model.graph_builder import TransactionStore, graph_from_store
+from app.model.shell_detector import detect_shell_chains, SHELL_MAX_DEGREE
+
+def synthetic_store(num_accounts=50000, num_transactions=100000, seed=1):
+    """Sparse random transactions: most accounts end up with degree <= 3, as in production uploads."""
+    rng = random.Random(seed)
+    base = pd.Timestamp('2026-01-01')
+    rows = []
+    for i in range(num_transactions):
+        s, r = rng.randrange(num_accounts), rng.randrange(num_accounts)
+        rows.append((f"TXN_{i}", f"ACC_{s}", f"ACC_{r}", 100.0, base + pd.Timedelta(minutes=i)))
+    df = pd.DataFrame(rows, columns=['transaction_id', 'sender_id', 'receiver_id', 'amount', 'timestamp'])
+    return TransactionStore.from_frame(df)
+
+def peak_bytes(fn):
+    """Peak Python heap allocated while fn() runs (tracemalloc)."""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def subgraph_copy(G):
+    # What shell detection used to materialize before walking the candidates
+    candidates = [n for n, d in G.degree() if d <= SHELL_MAX_DEGREE]
+    return G.subgraph(candidates).copy()
+
+def old_detector(G):
+    # The detector before the topology-only view: the copy stayed alive while the chains were walked
+    shell = subgraph_copy(G)
+    return shell, detect_shell_chains(G)
+
+def main():
+    store = synthetic_store()
+    for backend in ('networkx', 'csr'):
+        G = graph_from_store(store, backend)
+        candidates = sum(1 for _, d in G.degree() if d <= SHELL_MAX_DEGREE)
+        print(f"[{backend}] {G.number_of_nodes()} accounts, {candidates} shell candidates")
+        if backend == 'networkx':
+            print(f"  subgraph copy:        {peak_bytes(lambda: subgraph_copy(G)) / 2**20:8.1f} MiB peak")
+            print(f"  old detector:         {peak_bytes(lambda: old_detector(G)) / 2**20:8.1f} MiB peak")
+        print(f"  detect_shell_chains:  {peak_bytes(lambda: detect_shell_chains(G)) / 2**20:8.1f} MiB peak")
+
+if __name__ == "__main__":
+    main()